@@ -0,0 +1,29 @@
+"""
+AnyCompany Marketing Analytics - application unique
+
+Les trois dashboards (Ventes, Promotions, Marketing) sont les pages d'une
+même application Streamlit : un seul processus, un seul backend (pool de
+connexions, cache de résultats) et un seul cache mémoire, partagés par les
+pages via core/data.py. Passer d'une page à l'autre réutilise les résultats
+déjà calculés ; imports et connexions ne sont payés qu'une fois.
+
+Lancement :
+    streamlit run Streamlit/app.py
+
+Chaque dashboard reste exécutable seul (streamlit run Streamlit/sales_dashboard.py).
+"""
+
+import streamlit as st
+
+st.set_page_config(
+    page_title="AnyCompany Analytics",
+    page_icon="📊",
+    layout="wide"
+)
+
+pages = st.navigation([
+    st.Page("sales_dashboard.py", title="Ventes", icon="📈", default=True),
+    st.Page("promotion_analysis.py", title="Promotions", icon="🎯"),
+    st.Page("marketing_roi.py", title="Marketing ROI", icon="💼"),
+])
+pages.run()
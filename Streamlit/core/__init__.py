@@ -0,0 +1,6 @@
+"""
+Couche d'accès aux données partagée par les dashboards AnyCompany
+"""
+
+from .backends import DuckDBBackend, QueryBackend, SnowflakeBackend, create_backend
+from .result_cache import CachedBackend, ResultCache
@@ -0,0 +1,112 @@
+"""
+Comptages distincts approchés (HyperLogLog)
+
+Les COUNT(DISTINCT ...) sur les transactions (clients uniques, transactions
+distinctes derrière les jointures promo / campagne) sont parmi les
+opérations les plus coûteuses des dashboards : chaque valeur doit être
+mémorisée puis dédoublonnée. En mode approché, ils sont calculés par
+APPROX_COUNT_DISTINCT (HyperLogLog) : un seul passage, mémoire constante.
+
+Seules les expressions désignées par le dashboard sont approchées ; les
+petits comptages (promotions, catégories, régions) restent exacts. La case
+« Comptages distincts exacts » de la sidebar rétablit COUNT(DISTINCT), et
+la borne d'erreur du moteur est affichée à côté des valeurs approchées.
+
+Par défaut : approché sur Snowflake (erreur moyenne 1,6 %), exact sur DuckDB
+(HLL nettement moins précis, et dédoublonnage local peu coûteux). Section
+[dashboard] de secrets.toml pour forcer le mode par défaut :
+
+    [dashboard]
+    approximate_counts = false   # ou ANYCOMPANY_APPROX_COUNTS=0
+"""
+
+import os
+import re
+
+import streamlit as st
+
+from .sql_translate import _rewrite_calls
+
+# Erreur relative d'APPROX_COUNT_DISTINCT par moteur : (moyenne, borne affichée).
+# Snowflake : 1,62 % en moyenne (documentation), borne à trois fois la moyenne.
+# DuckDB : mesurée par `python tools/benchmark.py --hll-only` (identifiants
+# texte de 1 000 à 1 000 000 valeurs, 21 mesures, DuckDB 1.5) : 11,0 % en
+# moyenne, 38,1 % au pire, borne arrondie à 40 %. À remesurer après une
+# montée de version de DuckDB (le benchmark signale tout dépassement).
+HLL_ERRORS = {
+    "snowflake": (0.0162, 0.049),
+    "duckdb": (0.11, 0.40),
+}
+
+# Moteurs approchés par défaut
+APPROXIMATE_BY_DEFAULT = ("snowflake",)
+
+_DISTINCT = re.compile(r"^DISTINCT\s+(.+)$", re.IGNORECASE | re.DOTALL)
+
+
+def approximate_distinct(sql, expressions):
+    """COUNT(DISTINCT expr) -> APPROX_COUNT_DISTINCT(expr) pour les `expressions` données"""
+    targets = {" ".join(expression.lower().split()) for expression in expressions}
+
+    def rewrite(args):
+        match = _DISTINCT.match(args[0]) if len(args) == 1 else None
+        if match and " ".join(match.group(1).lower().split()) in targets:
+            return f"APPROX_COUNT_DISTINCT({match.group(1)})"
+        return f"COUNT({', '.join(args)})"
+
+    return _rewrite_calls(sql, "COUNT", rewrite)
+
+
+class DistinctCounts:
+    """Mode de comptage choisi dans la sidebar (exact ou HyperLogLog)"""
+
+    def __init__(self, exact, engine):
+        self.exact = exact
+        self.mean_error, self.max_error = HLL_ERRORS.get(engine, HLL_ERRORS["snowflake"])
+
+    def query(self, sql, expressions):
+        """Requête inchangée en mode exact, comptages de `expressions` approchés sinon"""
+        return sql if self.exact else approximate_distinct(sql, expressions)
+
+    def format(self, value):
+        """Nombre formaté, préfixé de ≈ s'il est approché"""
+        return f"{value:,.0f}" if self.exact else f"≈ {value:,.0f}"
+
+    def error_bound(self):
+        """Texte de la borne d'erreur (None en mode exact)"""
+        if self.exact:
+            return None
+        precision = ".0%" if self.max_error >= 0.1 else ".1%"
+        return f"± {self.max_error:{precision}} (HyperLogLog)"
+
+    def caption(self, what="Les comptages distincts"):
+        """Légende sous un panneau affichant des comptages approchés"""
+        if not self.exact:
+            st.caption(
+                f"≈ {what} sont approchés par HyperLogLog : erreur relative "
+                f"{self.mean_error:.1%} en moyenne, {self.error_bound()} au plus. "
+                "Cochez « Comptages distincts exacts » dans la sidebar pour les valeurs exactes."
+            )
+
+
+def distinct_counts_checkbox(secrets, engine):
+    """Case de la sidebar « Comptages distincts exacts » ; renvoie le DistinctCounts choisi"""
+    from .backends import _section
+    settings = _section(secrets, "dashboard")
+    value = os.environ.get(
+        "ANYCOMPANY_APPROX_COUNTS",
+        settings.get("approximate_counts", engine in APPROXIMATE_BY_DEFAULT)
+    )
+    approximate = str(value).strip().lower() not in ("0", "false", "no", "non")
+    mean_error, max_error = HLL_ERRORS.get(engine, HLL_ERRORS["snowflake"])
+    exact = st.sidebar.checkbox(
+        "🎯 Comptages distincts exacts",
+        value=not approximate,
+        key="exact_counts",
+        help=(
+            "Décochée : comptages distincts par HyperLogLog (APPROX_COUNT_DISTINCT), "
+            f"plus rapides, erreur relative {mean_error:.1%} en moyenne "
+            f"({max_error:.1%} au plus sur ce moteur)."
+        )
+    )
+    return DistinctCounts(exact, engine)
@@ -0,0 +1,572 @@
+"""
+Backends de requêtes des dashboards
+
+Un backend exécute une requête SQL (écrite en dialecte Snowflake) et renvoie
+un DataFrame dont les colonnes sont en MAJUSCULES, comme le connecteur
+Snowflake. Deux implémentations :
+
+- SnowflakeBackend : le warehouse ANYCOMPANY_LAB (comportement historique)
+- DuckDBBackend    : moteur embarqué chargé depuis des fichiers Parquet locaux,
+                     pour travailler sans warehouse (laptop, edge, tests de charge)
+
+Le choix se fait dans `.streamlit/secrets.toml` (section [backend]) ou via la
+variable d'environnement ANYCOMPANY_BACKEND.
+"""
+
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    # Sans pyarrow : résultats via pandas uniquement (pas de fetch Arrow)
+    pa = None
+
+from .instrumentation import annotate, phase
+from .interval_bridge import BRIDGES, build_bridges
+from .pool import ConnectionPool
+from .query import bind
+from .sql_translate import to_duckdb
+
+DATABASE = "ANYCOMPANY_LAB"
+DEFAULT_SCHEMA = "SILVER"
+
+# Ordre de résolution des noms de tables non qualifiés côté DuckDB
+SEARCH_SCHEMAS = ("SILVER", "ANALYTICS", "GOLD")
+
+# Fréquence de relecture des versions de tables écrites par le pipeline
+VERSION_CHECK_SECONDS = 30
+
+# Sans version connue pour une table : expiration à l'ancienne (10 minutes)
+FALLBACK_TTL_SECONDS = 600
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+
+
+class QueryBackend:
+    """Interface commune des backends"""
+
+    name = None
+    _versions = None
+    _versions_at = 0.0
+
+    def run_query(self, query, params=None):
+        """Exécute une requête (paramètres nommés `:nom`) et retourne un DataFrame"""
+        raise NotImplementedError
+
+    def fetch_arrow(self, query, params=None):
+        """Exécute une requête et retourne une table Arrow (colonnes en majuscules)"""
+        raise NotImplementedError
+
+    def iter_batches(self, query, params=None, batch_rows=100_000):
+        """Itère sur le résultat par DataFrames successifs (exports volumineux)"""
+        yield self.run_query(query, params)
+
+    @contextmanager
+    def record_batches(self, query, params=None, batch_rows=100_000):
+        """Lecteur Arrow du résultat (pa.RecordBatchReader), lots de même schéma.
+
+        Le schéma vient du résultat et non du premier lot : connu même pour
+        un résultat vide, sans type `null` pour une colonne vide dans un lot.
+        Implémentation par défaut : résultat lu en entier puis découpé.
+        """
+        table = self.fetch_arrow(query, params)
+        yield pa.RecordBatchReader.from_batches(table.schema, table.to_batches(batch_rows))
+
+    def table_versions(self):
+        """Versions des tables {NOM_TABLE: version} ({} si inconnues)"""
+        return {}
+
+    def pool_metrics(self):
+        """Compteurs du pool de connexions ({} sans pool)"""
+        pool = getattr(self, "pool", None)
+        return pool.metrics() if pool is not None else {}
+
+    def current_versions(self):
+        """Versions de toutes les tables, relues au plus toutes les VERSION_CHECK_SECONDS"""
+        now = time.monotonic()
+        if self._versions is None or now - self._versions_at > VERSION_CHECK_SECONDS:
+            self._versions = self.table_versions()
+            self._versions_at = now
+        return self._versions
+
+    def versions_for(self, query):
+        """Versions des tables lues par la requête.
+
+        Si une table de la requête n'a pas de version, on retombe sur une
+        tranche de temps de FALLBACK_TTL_SECONDS.
+        """
+        current = self.current_versions()
+        names = set(_IDENTIFIER.findall(query.upper()))
+        versions = {name: current[name] for name in names if name in current}
+        if not versions:
+            versions["*"] = int(time.time() // FALLBACK_TTL_SECONDS)
+        return versions
+
+    def version_token(self, query):
+        """Jeton à passer aux caches Streamlit : change quand une table lue change"""
+        return json.dumps(self.versions_for(query), sort_keys=True)
+
+    def close(self):
+        """Libère les ressources du backend"""
+
+
+def arrow_to_pandas(table):
+    """Conversion Arrow -> pandas, sans copie quand les types le permettent.
+
+    Les DECIMAL sont convertis en float64 (et non en objets Decimal), comme
+    le fait le connecteur Snowflake pour les NUMBER à échelle non nulle.
+    """
+    decimals = [
+        i for i, field in enumerate(table.schema)
+        if pa.types.is_decimal(field.type)
+    ]
+    for i in decimals:
+        table = table.set_column(i, table.schema.field(i).name, table.column(i).cast(pa.float64()))
+    return table.to_pandas(split_blocks=True, self_destruct=True, date_as_object=False)
+
+
+# Types Snowflake (description du curseur) -> types Arrow des exports
+_SNOWFLAKE_TYPES = {
+    "REAL": lambda precision, scale: pa.float64(),
+    "TEXT": lambda precision, scale: pa.string(),
+    "DATE": lambda precision, scale: pa.date32(),
+    "BOOLEAN": lambda precision, scale: pa.bool_(),
+    # NUMBER à échelle non nulle : float64, comme fetch_pandas_*
+    "FIXED": lambda precision, scale: pa.int64() if not scale else pa.float64(),
+}
+
+
+def _description_schema(description, first=None):
+    """Schéma Arrow d'un résultat Snowflake d'après la description du curseur.
+
+    Types non traduits (horodatages, VARIANT...) : ceux du premier lot, ou
+    texte si le résultat est vide.
+    """
+    from snowflake.connector.constants import FIELD_ID_TO_NAME
+    fields = []
+    for index, column in enumerate(description):
+        convert = _SNOWFLAKE_TYPES.get(FIELD_ID_TO_NAME.get(column.type_code))
+        if convert is not None:
+            field_type = convert(column.precision, column.scale)
+        elif first is not None:
+            field_type = first.schema.field(index).type
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(column.name, field_type))
+    return pa.schema(fields)
+
+
+def _upper_columns(table):
+    """Noms de colonnes Arrow en majuscules"""
+    return table.rename_columns([str(name).upper() for name in table.column_names])
+
+
+# ============================================================================
+# SNOWFLAKE
+# ============================================================================
+
+class SnowflakeBackend(QueryBackend):
+    """Backend Snowflake : connexions réutilisées via un pool borné"""
+
+    name = "snowflake"
+
+    def __init__(self, user, password, account, warehouse,
+                 database=DATABASE, schema=DEFAULT_SCHEMA, pool_options=None):
+        self.params = dict(
+            user=user,
+            password=password,
+            account=account,
+            warehouse=warehouse,
+            database=database,
+            schema=schema
+        )
+        self.pool_options = pool_options or {}
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def connect(self):
+        """Ouvre une connexion Snowflake"""
+        import snowflake.connector
+        # Binding côté serveur (qmark, pour cette connexion seulement) : le
+        # texte SQL reste identique quelles que soient les valeurs, le cache
+        # de résultats Snowflake est réutilisé.
+        # Connexions gardées en pool : la session ne doit pas expirer
+        return snowflake.connector.connect(
+            paramstyle="qmark",
+            client_session_keep_alive=True,
+            **self.params
+        )
+
+    @property
+    def pool(self):
+        """Pool de connexions, créé au premier usage (import du connecteur différé)"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    from snowflake.connector.errors import OperationalError
+                    self._pool = ConnectionPool(
+                        self.connect,
+                        is_alive=lambda conn: not conn.is_closed(),
+                        retry_on=(OperationalError, OSError),
+                        **self.pool_options
+                    )
+        return self._pool
+
+    def run_query(self, query, params=None):
+        sql, values = bind(query, params)
+        with self.pool.connection() as conn:
+            if pa is None:
+                with phase("sql"):
+                    return pd.read_sql(sql, conn, params=values or None)
+            # Résultat lu par lots Arrow et converti en colonnes par le
+            # connecteur, au lieu d'un parcours ligne à ligne du curseur DB-API
+            with conn.cursor() as cursor:
+                with phase("sql"):
+                    cursor.execute(sql, values or None)
+                annotate(query_id=cursor.sfqid)
+                # Lecture et construction du DataFrame sont faites ensemble par le connecteur
+                with phase("fetch"):
+                    return cursor.fetch_pandas_all()
+
+    def fetch_arrow(self, query, params=None):
+        sql, values = bind(query, params)
+        with self.pool.connection() as conn, conn.cursor() as cursor:
+            with phase("sql"):
+                cursor.execute(sql, values or None)
+            annotate(query_id=cursor.sfqid)
+            with phase("fetch"):
+                table = cursor.fetch_arrow_all()
+            if table is None:
+                # Résultat vide : le connecteur renvoie None
+                return pa.table({column[0]: pa.array([], pa.null()) for column in cursor.description})
+            annotate(bytes=table.nbytes)
+            return table
+
+    def iter_batches(self, query, params=None, batch_rows=100_000):
+        # Les lots sont ceux du serveur (taille choisie par Snowflake)
+        sql, values = bind(query, params)
+        with self.pool.connection() as conn, conn.cursor() as cursor:
+            cursor.execute(sql, values or None)
+            yield from cursor.fetch_pandas_batches()
+
+    @contextmanager
+    def record_batches(self, query, params=None, batch_rows=100_000):
+        # Lots du serveur ; types d'entiers variables d'un lot à l'autre
+        # (plus petit type par lot) : chaque lot est converti au schéma du curseur
+        sql, values = bind(query, params)
+        with self.pool.connection() as conn, conn.cursor() as cursor:
+            cursor.execute(sql, values or None)
+            annotate(query_id=cursor.sfqid)
+            tables = cursor.fetch_arrow_batches()
+            first = next(tables, None)
+            schema = _description_schema(cursor.description, first)
+
+            def batches():
+                if first is None:
+                    return
+                for table in itertools.chain([first], tables):
+                    yield from table.cast(schema).to_batches(batch_rows)
+
+            yield pa.RecordBatchReader.from_batches(schema, batches())
+
+    def pool_metrics(self):
+        # Pas de pool tant qu'aucune requête n'a été exécutée
+        return self._pool.metrics() if self._pool is not None else {}
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+    def table_versions(self):
+        """Versions écrites par le pipeline dans SILVER.TABLE_VERSIONS (sql/3d)"""
+        from snowflake.connector.errors import ProgrammingError
+        try:
+            df = self.run_query(
+                f"SELECT table_schema, table_name, version FROM {DATABASE}.SILVER.TABLE_VERSIONS"
+            )
+        except ProgrammingError:
+            # Table absente : pas de versions, expiration par durée
+            return {}
+        versions = {}
+        for schema, table, version in df.itertuples(index=False):
+            # Noms non qualifiés dans les requêtes : versions cumulées par nom de table
+            versions[table] = f"{versions.get(table, '')}{schema}.{version};"
+        return versions
+
+
+# ============================================================================
+# DUCKDB LOCAL
+# ============================================================================
+
+# Traduction faite une seule fois par texte de requête
+_translate = lru_cache(maxsize=512)(to_duckdb)
+
+
+class DuckDBBackend(QueryBackend):
+    """Backend DuckDB alimenté par des fichiers Parquet.
+
+    Arborescence attendue : `<parquet_dir>/<SCHEMA>/<TABLE>.parquet`
+    (ex. `SILVER/FINANCIAL_TRANSACTIONS_CLEAN.parquet`). Les fichiers posés
+    directement à la racine sont rangés dans le schéma SILVER.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, parquet_dir, materialize=True, database_path=":memory:", pool_options=None):
+        import duckdb
+
+        self.parquet_dir = Path(parquet_dir)
+        self.materialize = materialize
+        self.conn = duckdb.connect(database_path)
+        # Curseurs déjà positionnés sur ANYCOMPANY_LAB, réutilisés d'une requête à l'autre
+        self.pool = ConnectionPool(self.cursor, **(pool_options or {}))
+        self.conn.execute(f"ATTACH ':memory:' AS {DATABASE}")
+        self.tables = {}
+        for schema in SEARCH_SCHEMAS:
+            self.conn.execute(f"CREATE SCHEMA IF NOT EXISTS {DATABASE}.{schema}")
+        for schema, table, path in self._discover():
+            # Tables matérialisées en mémoire : pas de relecture Parquet par requête
+            kind = "TABLE" if materialize else "VIEW"
+            self.conn.execute(
+                f"CREATE OR REPLACE {kind} {DATABASE}.{schema}.{table} AS "
+                f"SELECT * FROM read_parquet('{path.as_posix()}')"
+            )
+            self.tables[f"{schema}.{table}"] = path
+        self._ensure_bridges()
+        self._ensure_rollups()
+        self._ensure_promo_lift()
+        # Tables matérialisées : la version est celle des fichiers au chargement
+        self._loaded_versions = self._file_versions()
+
+    def _discover(self):
+        """Liste les fichiers Parquet disponibles sous forme (schéma, table, chemin)"""
+        if not self.parquet_dir.is_dir():
+            raise FileNotFoundError(f"Dossier Parquet introuvable : {self.parquet_dir}")
+        for path in sorted(self.parquet_dir.glob("*.parquet")):
+            yield DEFAULT_SCHEMA, path.stem.upper(), path
+        for schema_dir in sorted(p for p in self.parquet_dir.iterdir() if p.is_dir()):
+            schema = schema_dir.name.upper()
+            self.conn.execute(f"CREATE SCHEMA IF NOT EXISTS {DATABASE}.{schema}")
+            for path in sorted(schema_dir.glob("*.parquet")):
+                yield schema, path.stem.upper(), path
+
+    def _ensure_bridges(self):
+        """Construit en mémoire les tables bridge absentes du dossier Parquet"""
+        missing = [name for name in BRIDGES if f"SILVER.{name}" not in self.tables]
+        if not missing or "SILVER.FINANCIAL_TRANSACTIONS_CLEAN" not in self.tables:
+            return
+        tables = {
+            source: self.run_query(f"SELECT * FROM {DATABASE}.SILVER.{source}")
+            for source, _ in BRIDGES.values()
+            if f"SILVER.{source}" in self.tables
+        }
+        transactions = self.run_query(
+            f"SELECT transaction_id, transaction_date, region "
+            f"FROM {DATABASE}.SILVER.FINANCIAL_TRANSACTIONS_CLEAN"
+        )
+        for name, bridge in build_bridges(transactions, tables).items():
+            if name in missing:
+                self.conn.register("bridge_df", bridge)
+                self.conn.execute(f"CREATE TABLE {DATABASE}.SILVER.{name} AS SELECT * FROM bridge_df")
+                self.conn.unregister("bridge_df")
+                self.tables[f"SILVER.{name}"] = None
+
+    def _ensure_rollups(self):
+        """Construit en mémoire les rollups GOLD absents du dossier Parquet (routage, core/rollups.py)"""
+        from .rollups import ROLLUP_SCHEMA, ROLLUPS, rollup_source_query
+        if "SILVER.FINANCIAL_TRANSACTIONS_CLEAN" not in self.tables:
+            return
+        for name, _ in ROLLUPS:
+            if f"{ROLLUP_SCHEMA}.{name}" in self.tables:
+                continue
+            self.conn.execute(
+                f"CREATE TABLE {DATABASE}.{ROLLUP_SCHEMA}.{name} AS "
+                + rollup_source_query(name, f"{DATABASE}.SILVER.FINANCIAL_TRANSACTIONS_CLEAN")
+            )
+            self.tables[f"{ROLLUP_SCHEMA}.{name}"] = None
+
+    def _ensure_promo_lift(self):
+        """Construit en mémoire GOLD.PROMO_LIFT_CATEGORIE si absente du dossier Parquet"""
+        from .promo_lift import PROMO_LIFT_QUERY, PROMO_LIFT_SCHEMA, PROMO_LIFT_TABLE, SOURCES
+        name = f"{PROMO_LIFT_SCHEMA}.{PROMO_LIFT_TABLE}"
+        if name in self.tables or any(f"SILVER.{source}" not in self.tables for source in SOURCES):
+            return
+        with self.pool.connection() as cursor:
+            cursor.execute(f"CREATE TABLE {DATABASE}.{name} AS " + _translate(PROMO_LIFT_QUERY))
+        self.tables[name] = None
+
+    def _file_versions(self):
+        """Version de chaque table : taille et date de modification du fichier Parquet"""
+        versions = {}
+        for name, path in self.tables.items():
+            if path is None:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            versions[name.split(".", 1)[1]] = f"{stat.st_mtime_ns}-{stat.st_size}"
+        # Bridges construits en mémoire : dérivés des transactions et des intervalles
+        for bridge, (source, _) in BRIDGES.items():
+            if self.tables.get(f"SILVER.{bridge}", False) is None:
+                versions[bridge] = "+".join(
+                    versions.get(table, "") for table in ("FINANCIAL_TRANSACTIONS_CLEAN", source)
+                )
+        # Tables GOLD construites en mémoire : dérivées des transactions (rollups)
+        # ou des tables lues par le lift promotionnel
+        from .promo_lift import PROMO_LIFT_TABLE, SOURCES
+        for name, path in self.tables.items():
+            schema, table = name.split(".", 1)
+            if schema == "GOLD" and path is None:
+                sources = SOURCES if table == PROMO_LIFT_TABLE else ("FINANCIAL_TRANSACTIONS_CLEAN",)
+                versions[table] = "+".join(versions.get(source, "") for source in sources)
+        return versions
+
+    def table_versions(self):
+        if self.materialize:
+            return self._loaded_versions
+        return self._file_versions()
+
+    def cursor(self):
+        """Curseur DuckDB positionné sur ANYCOMPANY_LAB (un par thread à la fois)"""
+        cursor = self.conn.cursor()
+        search_path = ",".join(f"{DATABASE}.{schema}" for schema in SEARCH_SCHEMAS)
+        cursor.execute(f"USE {DATABASE}.{DEFAULT_SCHEMA}")
+        cursor.execute(f"SET search_path = '{search_path}'")
+        return cursor
+
+    def run_query(self, query, params=None):
+        if pa is not None:
+            table = self.fetch_arrow(query, params)
+            with phase("build"):
+                return arrow_to_pandas(table)
+        sql, values = bind(query, params)
+        with self.pool.connection() as cursor:
+            with phase("sql"):
+                cursor.execute(_translate(sql), values)
+            with phase("fetch"):
+                df = cursor.df()
+        # Même convention que Snowflake : noms de colonnes en majuscules
+        df.columns = [str(col).upper() for col in df.columns]
+        return df
+
+    def fetch_arrow(self, query, params=None):
+        sql, values = bind(query, params)
+        with self.pool.connection() as cursor:
+            with phase("sql"):
+                cursor.execute(_translate(sql), values)
+            with phase("fetch"):
+                table = cursor.fetch_arrow_table()
+        annotate(bytes=table.nbytes)
+        return _upper_columns(table)
+
+    def iter_batches(self, query, params=None, batch_rows=100_000):
+        sql, values = bind(query, params)
+        with self.pool.connection() as cursor:
+            reader = cursor.execute(_translate(sql), values).fetch_record_batch(batch_rows)
+            for batch in reader:
+                yield arrow_to_pandas(_upper_columns(pa.Table.from_batches([batch])))
+
+    @contextmanager
+    def record_batches(self, query, params=None, batch_rows=100_000):
+        # Schéma fixé par DuckDB avant le premier lot ; colonnes renommées en majuscules
+        sql, values = bind(query, params)
+        with self.pool.connection() as cursor:
+            reader = cursor.execute(_translate(sql), values).fetch_record_batch(batch_rows)
+            schema = pa.schema([field.with_name(field.name.upper()) for field in reader.schema])
+            yield pa.RecordBatchReader.from_batches(
+                schema, (pa.RecordBatch.from_arrays(batch.columns, schema=schema) for batch in reader)
+            )
+
+    def close(self):
+        self.pool.close()
+        self.conn.close()
+
+
+# ============================================================================
+# SÉLECTION DU BACKEND
+# ============================================================================
+
+def _section(secrets, name):
+    """Lit une section de st.secrets (ou d'un dict) sans échouer si absente"""
+    try:
+        return dict(secrets[name]) if name in secrets else {}
+    except FileNotFoundError:
+        # Pas de secrets.toml : configuration uniquement par variables d'environnement
+        return {}
+
+
+def create_backend(secrets):
+    """Instancie le backend configuré.
+
+    Section [backend] de secrets.toml :
+        engine = "snowflake" | "duckdb"
+        parquet_dir = "data/parquet"     # pour duckdb
+
+    Section [pool] (pool de connexions partagé par les sessions) :
+        max_size = 8          # connexions ouvertes au plus
+        timeout = 30          # attente maximale d'une connexion libre (s)
+        max_idle = 300        # fermeture des connexions inactives (s)
+
+    Section [cache] (cache de résultats Parquet sur disque, actif par défaut) :
+        enabled = true
+        dir = ".cache/results"
+        max_mb = 512
+
+    Section [routing] (requêtes d'agrégat lues sur les rollups GOLD, actif par défaut) :
+        enabled = true
+
+    Les variables ANYCOMPANY_BACKEND, ANYCOMPANY_PARQUET_DIR,
+    ANYCOMPANY_CACHE_DIR et ANYCOMPANY_ROLLUP_ROUTING sont prioritaires
+    (ANYCOMPANY_CACHE_DIR vide : cache désactivé ; ANYCOMPANY_ROLLUP_ROUTING=0 :
+    pas de routage).
+    """
+    backend = _create_engine(secrets)
+    routing = os.environ.get("ANYCOMPANY_ROLLUP_ROUTING", _section(secrets, "routing").get("enabled", True))
+    if str(routing).strip().lower() not in ("0", "false", "no", "non"):
+        from .rollups import RoutedBackend
+        backend = RoutedBackend(backend)
+    cache = _section(secrets, "cache")
+    cache_dir = os.environ.get("ANYCOMPANY_CACHE_DIR", cache.get("dir", ".cache/results"))
+    if not cache.get("enabled", True) or not cache_dir:
+        return backend
+
+    from .result_cache import CachedBackend, ResultCache
+    return CachedBackend(backend, ResultCache(cache_dir, max_bytes=int(cache.get("max_mb", 512)) * 1024 * 1024))
+
+
+def _create_engine(secrets):
+    """Instancie le moteur (Snowflake ou DuckDB) sans cache"""
+    settings = _section(secrets, "backend")
+    pool_options = {
+        key: value for key, value in _section(secrets, "pool").items()
+        if key in ("max_size", "timeout", "max_idle", "retries", "backoff")
+    }
+    engine = os.environ.get("ANYCOMPANY_BACKEND", settings.get("engine", "snowflake")).lower()
+
+    if engine == "duckdb":
+        parquet_dir = os.environ.get("ANYCOMPANY_PARQUET_DIR", settings.get("parquet_dir", "data/parquet"))
+        return DuckDBBackend(parquet_dir, materialize=settings.get("materialize", True),
+                             pool_options=pool_options)
+
+    if engine == "snowflake":
+        snowflake = _section(secrets, "snowflake")
+        return SnowflakeBackend(
+            user=snowflake["user"],
+            password=snowflake["password"],
+            account=snowflake["account"],
+            warehouse=snowflake["warehouse"],
+            pool_options=pool_options
+        )
+
+    raise ValueError(f"Backend inconnu : {engine!r} (attendu : 'snowflake' ou 'duckdb')")
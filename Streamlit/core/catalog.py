@@ -0,0 +1,83 @@
+"""
+Catalogue des valeurs de dimensions pour les filtres des sidebars
+
+Le pipeline (sql/3e Catalogue des dimensions SILVER.sql) écrit
+SILVER.DIMENSION_CATALOG : pour chaque table filtrée par les dashboards, une
+ligne par combinaison de valeurs de ses dimensions, avec son nombre de
+lignes. Les dashboards le lisent une seule fois par processus et par version
+(quelques centaines de lignes) au lieu d'un SELECT DISTINCT par filtre ;
+toutes les listes de la sidebar, leurs effectifs et les filtres dépendants
+en sont déduits en pandas.
+
+Tant que le pipeline n'a pas écrit le catalogue (pas de version connue), il
+est calculé à la volée depuis les tables SILVER, avec le même résultat.
+
+Exemple :
+    catalog = run_query(catalog_query(backend))
+    regions = dimension_counts(catalog, "PROMOTIONS_CLEAN", "REGION",
+                               PRODUCT_CATEGORY=selected_category)
+    st.sidebar.selectbox("Région", ["Toutes"] + regions.index.tolist(),
+                         format_func=count_label(regions, "promotions"))
+"""
+
+from .query import ALL_VALUES
+
+CATALOG_TABLE = "DIMENSION_CATALOG"
+
+# Dimensions filtrables de chaque table (même définition que sql/3e)
+DIMENSIONS = {
+    "PROMOTIONS_CLEAN": ("PRODUCT_CATEGORY", "REGION"),
+    "MARKETING_CAMPAIGNS_CLEAN": ("CAMPAIGN_TYPE", "TARGET_AUDIENCE", "REGION"),
+}
+
+COLUMNS = ("PRODUCT_CATEGORY", "CAMPAIGN_TYPE", "TARGET_AUDIENCE", "REGION")
+
+
+def catalog_source_query():
+    """Calcul du catalogue depuis les tables SILVER (sans table DIMENSION_CATALOG)"""
+    selects = []
+    for table, dimensions in DIMENSIONS.items():
+        columns = ",\n    ".join(
+            column.lower() if column in dimensions else f"CAST(NULL AS VARCHAR) AS {column.lower()}"
+            for column in COLUMNS
+        )
+        selects.append(
+            f"SELECT\n    '{table}' AS table_name,\n    {columns},\n    COUNT(*) AS row_count\n"
+            f"FROM {table}\nGROUP BY {', '.join(dimensions).lower()}"
+        )
+    return "\n" + "\nUNION ALL\n".join(selects) + "\n"
+
+
+def catalog_query(backend):
+    """Requête du catalogue : la table du pipeline si elle a une version, sinon son calcul"""
+    if CATALOG_TABLE in backend.current_versions():
+        return f"""
+SELECT table_name, {', '.join(COLUMNS).lower()}, row_count
+FROM {CATALOG_TABLE}
+"""
+    return catalog_source_query()
+
+
+def _rows(catalog, table, selected):
+    """Lignes du catalogue pour `table`, restreintes aux valeurs choisies ("Toutes" ignoré)"""
+    rows = catalog[catalog["TABLE_NAME"] == table]
+    for column, value in selected.items():
+        if value is not None and value not in ALL_VALUES:
+            rows = rows[rows[column] == value]
+    return rows
+
+
+def dimension_counts(catalog, table, dimension, **selected):
+    """Nombre de lignes de `table` par valeur de `dimension` (Series triée par valeur),
+    compte tenu des valeurs choisies pour les autres dimensions"""
+    rows = _rows(catalog, table, selected)
+    return rows.groupby(dimension)["ROW_COUNT"].sum().astype("int64").sort_index()
+
+
+def count_label(counts, unit):
+    """format_func de selectbox : « valeur (n unités) », valeur seule pour Toutes / Tous"""
+    def label(value):
+        if value in counts.index:
+            return f"{value} ({counts[value]:,} {unit})"
+        return value
+    return label
@@ -0,0 +1,89 @@
+"""
+Accès aux données partagé par les pages des dashboards
+
+Backend (pool de connexions, cache de résultats sur disque), journal des
+temps et cache mémoire des résultats sont des ressources du processus :
+définis une seule fois ici, ils sont communs aux trois dashboards, qu'ils
+soient lancés comme pages de l'application unique (Streamlit/app.py) ou
+séparément. Un utilisateur qui passe des Ventes aux Promotions puis au
+Marketing retrouve les résultats déjà calculés, et le serveur n'ouvre qu'un
+seul jeu de connexions.
+
+Les mesures de l'exécution en cours sont gardées dans st.session_state :
+un fragment relancé seul (widget d'une section) rejoue les fonctions de
+l'exécution complète qui l'a créé, et doit mesurer sa relance sous son
+propre run_id, pas sous celui d'une exécution déjà résumée. `start_run`
+renvoie donc un accès à l'exécution courante, résolu à chaque appel.
+
+Utilisation dans une page :
+    timer = start_run("sales_dashboard")
+    run_query = query_runner(timer)
+    df = run_query("SELECT ...", params)
+"""
+
+import streamlit as st
+
+from .backends import create_backend
+from .instrumentation import create_query_log
+
+# Mesures de l'exécution en cours de la session
+RUN_TIMER_KEY = "_run_timer"
+
+# Entrées du cache mémoire des résultats, toutes pages confondues
+# (256 par dashboard auparavant, avec un cache par application)
+CACHE_ENTRIES = 768
+
+
+@st.cache_resource
+def init_backend():
+    """Initialise le backend de requêtes configuré (Snowflake par défaut)"""
+    return create_backend(st.secrets)
+
+
+@st.cache_resource
+def init_query_log():
+    """Journal JSON lines des temps de requêtes, partagé par les sessions"""
+    return create_query_log(st.secrets)
+
+
+class CurrentRun:
+    """Mesures (RunTimer) de l'exécution en cours de la session, résolues à chaque appel"""
+
+    def __getattr__(self, name):
+        return getattr(current_run(), name)
+
+
+def current_run():
+    """RunTimer de l'exécution en cours (script complet ou fragment relancé)"""
+    return st.session_state[RUN_TIMER_KEY]
+
+
+def start_run(dashboard):
+    """Ouvre les mesures d'une exécution du script ; renvoie l'accès à l'exécution courante"""
+    st.session_state[RUN_TIMER_KEY] = init_query_log().run(dashboard)
+    return CurrentRun()
+
+
+def start_fragment_run():
+    """Ouvre les mesures d'une relance de fragment, sous un nouveau run_id"""
+    st.session_state[RUN_TIMER_KEY] = init_query_log().run(current_run().dashboard)
+    return current_run()
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_query(query, params, version):
+    """Cache mémoire invalidé par la version des tables lues (plus de TTL fixe)"""
+    return init_backend().run_query(query, params)
+
+
+def query_runner(timer):
+    """Fonction run_query(query, params=None, panel=None) mesurée par `timer`"""
+
+    def run_query(query, params=None, panel=None):
+        """Exécute une requête (paramètres nommés `:nom`) et retourne un DataFrame"""
+        with timer.query(query, panel) as record:
+            df = cached_query(query, params, init_backend().version_token(query))
+            record.result(df)
+        return df
+
+    return run_query
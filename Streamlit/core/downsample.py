@@ -0,0 +1,80 @@
+"""
+Réduction des grands nuages de points avant envoi au navigateur
+
+Au-delà de MAX_POINTS points, les graphiques ne transmettent plus toutes les
+lignes en JSON Plotly :
+- séries temporelles : sous-échantillonnage LTTB (Largest-Triangle-Three-
+  Buckets), qui garde la forme de la courbe (pics et creux) ;
+- nuages de points : densité sur une grille (nombre de points par case).
+
+Les graphiques utilisent le rendu WebGL (scattergl) : le coût d'affichage
+reste borné quelle que soit la taille des données.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Points envoyés au navigateur par trace, au plus
+MAX_POINTS = 2000
+
+# Cases par axe de la grille de densité
+DENSITY_BINS = 60
+
+
+def _numeric(values):
+    """Abscisses numériques (les dates deviennent des nanosecondes)"""
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype("int64").to_numpy(dtype="float64")
+    return values.to_numpy(dtype="float64")
+
+
+def lttb_indices(x, y, threshold=MAX_POINTS):
+    """Indices des points retenus par LTTB (premier et dernier toujours gardés)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = _numeric(x)
+    y = np.asarray(y, dtype="float64")
+
+    # Seaux entre le premier et le dernier point
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Moyenne du seau suivant (le dernier point pour le dernier seau)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        keep[i + 1] = a
+    return keep
+
+
+def lttb(df, x, y, threshold=MAX_POINTS):
+    """Lignes de `df` (triées par `x`) retenues pour tracer `y` en fonction de `x`"""
+    df = df.sort_values(x)
+    return df.iloc[lttb_indices(df[x], df[y].fillna(0), threshold)]
+
+
+def density_grid(df, x, y, bins=DENSITY_BINS):
+    """Nombre de points par case d'une grille `bins` x `bins` (cases vides omises)
+
+    Renvoie un DataFrame (x, y, COUNT) avec les centres des cases.
+    """
+    values = df[[x, y]].dropna()
+    counts, x_edges, y_edges = np.histogram2d(values[x], values[y], bins=bins)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    xi, yi = np.nonzero(counts)
+    return pd.DataFrame({
+        x: x_centers[xi],
+        y: y_centers[yi],
+        "COUNT": counts[xi, yi].astype("int64"),
+    })
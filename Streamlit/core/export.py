@@ -0,0 +1,110 @@
+"""
+Exports complets écrits lot par lot
+
+Les boutons d'export téléchargeaient jusqu'ici le DataFrame déjà affiché
+(Top 20), converti en une seule chaîne CSV. Pour exporter un jeu complet
+(toutes les campagnes, toutes les transactions de leurs fenêtres), le
+résultat est lu par lots Arrow (backend.record_batches : lots du serveur
+Snowflake, fetch_record_batch sur DuckDB) et chaque lot est écrit à la
+suite dans un fichier temporaire sur disque, en CSV ou en Parquet. Le
+schéma est celui du résultat (types du curseur) : un résultat vide donne
+un fichier avec ses colonnes, sans relancer la requête.
+
+Mémoire : pendant l'écriture, un lot à la fois. Le fichier terminé est
+ensuite relu en entier, car st.download_button garde le contenu à
+télécharger en mémoire (pas de réponse HTTP en flux) : le pic de mémoire
+croît donc avec la taille du fichier produit. Le Parquet, compressé, reste
+le format à privilégier pour les gros volumes.
+
+Le fichier n'est généré qu'au clic (données différées de st.download_button,
+exécutées hors du script).
+
+Utilisation dans une page :
+    fmt = export_format_radio()
+    download_export("📄 Campagnes", backend, query, params, fmt, "campaigns")
+"""
+
+import tempfile
+
+import streamlit as st
+
+try:
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    # Sans pyarrow : export CSV par DataFrames successifs uniquement
+    pq = None
+
+# Lignes par lot (DuckDB ; Snowflake choisit la taille de ses lots)
+EXPORT_BATCH_ROWS = 100_000
+
+# Format -> (extension, type MIME)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def export_formats():
+    """Formats disponibles (Parquet seulement avec pyarrow)"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt == "CSV" or pq is not None]
+
+
+# ============================================================================
+# ÉCRITURE LOT PAR LOT
+# ============================================================================
+
+def _write_pandas_csv(backend, query, params, handle, batch_rows):
+    """Repli sans pyarrow : DataFrames successifs, en-tête avec le premier"""
+    rows = 0
+    for index, batch in enumerate(backend.iter_batches(query, params, batch_rows=batch_rows)):
+        handle.write(batch.to_csv(index=False, header=index == 0).encode("utf-8"))
+        rows += len(batch)
+    return rows
+
+
+def write_export(backend, query, params, handle, fmt="CSV", batch_rows=EXPORT_BATCH_ROWS):
+    """Écrit le résultat dans `handle` (fichier binaire), un lot à la fois ; retourne le nombre de lignes"""
+    if pq is None:
+        return _write_pandas_csv(backend, query, params, handle, batch_rows)
+    rows = 0
+    with backend.record_batches(query, params, batch_rows) as reader:
+        if fmt == "Parquet":
+            writer = pq.ParquetWriter(handle, reader.schema, compression="zstd")
+        else:
+            writer = pa_csv.CSVWriter(handle, reader.schema)
+        with writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    return rows
+
+
+def export_bytes(backend, query, params=None, fmt="CSV", batch_rows=EXPORT_BATCH_ROWS):
+    """Contenu du fichier d'export, écrit d'abord sur disque lot par lot puis relu en entier"""
+    with tempfile.TemporaryFile(prefix="anycompany_export_") as handle:
+        write_export(backend, query, params, handle, fmt, batch_rows)
+        handle.seek(0)
+        return handle.read()
+
+
+# ============================================================================
+# WIDGETS
+# ============================================================================
+
+def export_format_radio(key="export_format"):
+    """Choix du format des exports de la page"""
+    return st.radio("Format", export_formats(), horizontal=True, key=key)
+
+
+def download_export(label, backend, query, params, fmt, file_name, key=None):
+    """Bouton de téléchargement dont le fichier n'est généré qu'au clic"""
+    extension, mime = EXPORT_FORMATS[fmt]
+    st.download_button(
+        label=label,
+        data=lambda: export_bytes(backend, query, params, fmt),
+        file_name=f"{file_name}.{extension}",
+        mime=mime,
+        on_click="ignore",
+        key=key or f"export_{file_name}"
+    )
@@ -0,0 +1,248 @@
+"""
+Instrumentation des requêtes et du rendu des dashboards
+
+Chaque exécution du script Streamlit (ou relance seule d'un fragment, cf.
+core/data.start_run) ouvre un RunTimer. Les sections de la
+page sont marquées (`timer.panel("Top 10 Campagnes")`) ; chaque requête est
+rattachée à son panneau et mesurée par phase :
+
+- sql      exécution de la requête (jusqu'au premier résultat)
+- fetch    rapatriement du résultat (lots Arrow)
+- build    construction du DataFrame
+- render   temps passé dans la section hors requêtes (figures Plotly, widgets)
+
+plus l'identifiant de requête du warehouse, le nombre de lignes, les octets
+lus et l'origine du résultat (cache mémoire, cache disque ou warehouse).
+Les mesures alimentent le panneau de temps de la sidebar et sont écrites en
+JSON lines (une ligne par requête / par panneau rendu).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+# Mesure en cours dans le thread qui exécute la requête
+_local = threading.local()
+
+
+@contextmanager
+def phase(name):
+    """Mesure une phase de la requête en cours (sans effet hors mesure)"""
+    record = getattr(_local, "record", None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if record is not None:
+            record.phases[name] = record.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def annotate(**fields):
+    """Ajoute des informations (query_id, bytes, cache...) à la requête en cours"""
+    record = getattr(_local, "record", None)
+    if record is not None:
+        record.fields.update(fields)
+
+
+def current_panel():
+    """Panneau de la requête en cours dans ce thread (None hors mesure)"""
+    record = getattr(_local, "record", None)
+    return record.panel if record is not None else None
+
+
+class QueryRecord:
+    """Mesures d'une requête"""
+
+    def __init__(self, panel, sql):
+        self.panel = panel
+        self.sql = sql
+        self.phases = {}
+        self.fields = {}
+        self.rows = None
+        self.wall = None
+
+    def result(self, df):
+        """Enregistre la taille du résultat"""
+        self.rows = len(df)
+        self.fields.setdefault("bytes", int(df.memory_usage(index=False).sum()))
+
+    @property
+    def cache(self):
+        # Rien d'exécuté en dessous du cache Streamlit : résultat en mémoire
+        return self.fields.get("cache") or ("warehouse" if "sql" in self.phases else "memory")
+
+    def to_dict(self):
+        sql = " ".join(self.sql.split())
+        return dict(
+            kind="query",
+            panel=self.panel,
+            wall_s=round(self.wall, 4),
+            phases={name: round(value, 4) for name, value in self.phases.items()},
+            cache=self.cache,
+            rows=self.rows,
+            bytes=self.fields.get("bytes"),
+            query_id=self.fields.get("query_id"),
+            rollup=self.fields.get("rollup"),
+            sql_hash=hashlib.sha1(sql.encode("utf-8")).hexdigest()[:12],
+            sql=sql[:300]
+        )
+
+
+class QueryLog:
+    """Journal JSON lines partagé par toutes les sessions (thread-safe)"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def run(self, dashboard):
+        """Ouvre les mesures d'une exécution du script"""
+        return RunTimer(self, dashboard)
+
+    def write(self, entry):
+        if not self.path:
+            return
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock, self.path.open("a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+
+class RunTimer:
+    """Mesures d'une exécution du script, panneau par panneau"""
+
+    def __init__(self, log, dashboard):
+        self.log = log
+        self.dashboard = dashboard
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.queries = []
+        self.renders = {}
+        self._lock = threading.Lock()
+        self._panel = None
+        self._panel_start = None
+        self._inline = 0.0
+        self._thread = threading.get_ident()
+        self.first_paint = None
+
+    def _write(self, entry):
+        entry.update(
+            ts=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            dashboard=self.dashboard,
+            run_id=self.run_id
+        )
+        self.log.write(entry)
+
+    # ------------------------------------------------------------------------
+    # Panneaux (thread du script)
+
+    @property
+    def current_panel(self):
+        return self._panel
+
+    def panel(self, name):
+        """Début d'une section ; clôt la mesure de rendu de la précédente"""
+        self._close_panel()
+        self._panel = name
+        self._panel_start = time.perf_counter()
+        self._inline = 0.0
+
+    def _close_panel(self):
+        if self._panel is None:
+            return
+        elapsed = time.perf_counter() - self._panel_start
+        render = max(elapsed - self._inline, 0.0)
+        self.renders[self._panel] = self.renders.get(self._panel, 0.0) + render
+        self._write(dict(kind="render", panel=self._panel, wall_s=round(render, 4)))
+        self._panel = None
+
+    def wait(self, future):
+        """Résultat d'une requête lancée en parallèle ; l'attente n'est pas du rendu"""
+        start = time.perf_counter()
+        try:
+            return future.result()
+        finally:
+            self._inline += time.perf_counter() - start
+
+    def finish(self):
+        """Clôt la dernière section"""
+        self._close_panel()
+
+    def painted(self):
+        """Note le premier panneau affiché (temps depuis le début du script)"""
+        if self.first_paint is None:
+            self.first_paint = self.elapsed
+            self._write(dict(kind="paint", wall_s=round(self.first_paint, 4)))
+
+    # ------------------------------------------------------------------------
+    # Requêtes (n'importe quel thread)
+
+    @contextmanager
+    def query(self, sql, panel=None):
+        """Mesure une requête ; les phases sont remplies par le backend"""
+        record = QueryRecord(panel or self._panel or "(hors panneau)", sql)
+        previous = getattr(_local, "record", None)
+        _local.record = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall = time.perf_counter() - start
+            _local.record = previous
+            if threading.get_ident() == self._thread:
+                # Requête exécutée dans la section : ce n'est pas du rendu
+                self._inline += record.wall
+            with self._lock:
+                self.queries.append(record)
+            self._write(record.to_dict())
+
+    # ------------------------------------------------------------------------
+
+    def summary(self):
+        """Temps par panneau et par phase (secondes)"""
+        rows = {}
+        for record in list(self.queries):
+            row = rows.setdefault(record.panel, dict(requetes=0, caches=0))
+            row["requetes"] += 1
+            row["caches"] += record.cache != "warehouse"
+            for name in ("sql", "fetch", "build"):
+                row[name] = row.get(name, 0.0) + record.phases.get(name, 0.0)
+            row["requete_totale"] = row.get("requete_totale", 0.0) + record.wall
+        for panel, seconds in self.renders.items():
+            rows.setdefault(panel, dict(requetes=0, caches=0))["render"] = seconds
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame.from_dict(rows, orient="index").fillna(0.0)
+        for name in ("sql", "fetch", "build", "render", "requete_totale"):
+            if name not in df:
+                df[name] = 0.0
+        df = df[["requetes", "caches", "sql", "fetch", "build", "requete_totale", "render"]]
+        return df.sort_values("requete_totale", ascending=False)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def create_query_log(secrets):
+    """Journal configuré.
+
+    Section [instrumentation] de secrets.toml :
+        log_path = "logs/query_timings.jsonl"
+
+    La variable ANYCOMPANY_QUERY_LOG est prioritaire (vide : pas de fichier,
+    mesures visibles uniquement dans la sidebar).
+    """
+    from .backends import _section
+    settings = _section(secrets, "instrumentation")
+    path = os.environ.get("ANYCOMPANY_QUERY_LOG", settings.get("log_path", "logs/query_timings.jsonl"))
+    return QueryLog(path or None)
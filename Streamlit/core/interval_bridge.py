@@ -0,0 +1,120 @@
+"""
+Tables de correspondance transaction -> promotion / campagne
+
+Les dashboards rattachent une transaction à une promotion (ou une campagne)
+quand `transaction_date BETWEEN start_date AND end_date` dans la même région.
+Cette jointure par intervalle est calculée une seule fois par exécution du
+pipeline et stockée dans BRIDGE_TRANSACTION_PROMOTION et
+BRIDGE_TRANSACTION_CAMPAIGN : les requêtes deviennent des équi-jointures sur
+les identifiants.
+
+Algorithme (balayage trié, par région) : les transactions de la région sont
+triées par date, puis chaque intervalle [start_date, end_date] est converti en
+plage d'indices par deux recherches dichotomiques. Coût O((n + m) log n + k)
+pour n transactions, m intervalles et k couples produits.
+
+Utilisation en ligne de commande (backend DuckDB local) :
+    python -m core.interval_bridge data/parquet
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BRIDGES = {
+    # table bridge : (table des intervalles, colonne identifiant)
+    "BRIDGE_TRANSACTION_PROMOTION": ("PROMOTIONS_CLEAN", "PROMOTION_ID"),
+    "BRIDGE_TRANSACTION_CAMPAIGN": ("MARKETING_CAMPAIGNS_CLEAN", "CAMPAIGN_ID"),
+}
+
+
+def build_bridge(transactions, intervals, id_column):
+    """Associe chaque transaction aux intervalles qui la contiennent.
+
+    transactions : colonnes TRANSACTION_ID, TRANSACTION_DATE, REGION
+    intervals    : colonnes `id_column`, START_DATE, END_DATE, REGION
+    Retourne un DataFrame (TRANSACTION_ID, `id_column`).
+    """
+    # Dates nulles : BETWEEN est faux en SQL, alors que NaT se trie en dernier
+    # (une fin NaT couvrirait toutes les transactions postérieures au début)
+    transactions = transactions[transactions["TRANSACTION_DATE"].notna()].reset_index(drop=True)
+    intervals = intervals[
+        intervals["START_DATE"].notna() & intervals["END_DATE"].notna()
+    ].reset_index(drop=True)
+
+    tx_ids, interval_ids = [], []
+    tx_dates = pd.to_datetime(transactions["TRANSACTION_DATE"]).to_numpy("datetime64[D]")
+    starts = pd.to_datetime(intervals["START_DATE"]).to_numpy("datetime64[D]")
+    ends = pd.to_datetime(intervals["END_DATE"]).to_numpy("datetime64[D]")
+
+    tx_by_region = transactions.groupby("REGION", sort=False).indices
+    for region, interval_rows in intervals.groupby("REGION", sort=False).indices.items():
+        tx_rows = tx_by_region.get(region)
+        if tx_rows is None:
+            continue
+        order = np.argsort(tx_dates[tx_rows], kind="stable")
+        sorted_rows = tx_rows[order]
+        sorted_dates = tx_dates[sorted_rows]
+
+        # Bornes incluses des deux côtés, comme BETWEEN
+        lo = np.searchsorted(sorted_dates, starts[interval_rows], side="left")
+        hi = np.searchsorted(sorted_dates, ends[interval_rows], side="right")
+        counts = np.maximum(hi - lo, 0)
+        if counts.sum() == 0:
+            continue
+
+        # Une ligne par couple (transaction, intervalle) sans boucle Python
+        offsets = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        positions = np.arange(counts.sum()) + offsets
+        tx_ids.append(sorted_rows[positions])
+        interval_ids.append(np.repeat(interval_rows, counts))
+
+    if not tx_ids:
+        return pd.DataFrame({"TRANSACTION_ID": [], id_column: []})
+    tx_index = np.concatenate(tx_ids)
+    interval_index = np.concatenate(interval_ids)
+    return pd.DataFrame({
+        "TRANSACTION_ID": transactions["TRANSACTION_ID"].to_numpy()[tx_index],
+        id_column: intervals[id_column].to_numpy()[interval_index],
+    })
+
+
+def build_bridges(transactions, tables):
+    """Construit toutes les tables bridge à partir des tables SILVER.
+
+    `tables` associe un nom de table d'intervalles à son DataFrame.
+    """
+    return {
+        bridge: build_bridge(transactions, tables[source], id_column)
+        for bridge, (source, id_column) in BRIDGES.items()
+        if source in tables
+    }
+
+
+def _upper_columns(df):
+    df.columns = [str(col).upper() for col in df.columns]
+    return df
+
+
+def write_parquet_bridges(parquet_dir):
+    """Construit les bridges à partir des Parquet SILVER et les écrit à côté"""
+    silver = Path(parquet_dir) / "SILVER"
+    transactions = _upper_columns(
+        pd.read_parquet(silver / "FINANCIAL_TRANSACTIONS_CLEAN.parquet")
+    )[["TRANSACTION_ID", "TRANSACTION_DATE", "REGION"]]
+    tables = {
+        source: _upper_columns(pd.read_parquet(silver / f"{source}.parquet"))
+        for source, _ in BRIDGES.values()
+        if (silver / f"{source}.parquet").exists()
+    }
+    bridges = build_bridges(transactions, tables)
+    for name, bridge in bridges.items():
+        bridge.to_parquet(silver / f"{name}.parquet", index=False)
+    return {name: len(bridge) for name, bridge in bridges.items()}
+
+
+if __name__ == "__main__":
+    for name, rows in write_parquet_bridges(sys.argv[1]).items():
+        print(f"{name}: {rows:,} lignes")
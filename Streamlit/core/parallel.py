@@ -0,0 +1,61 @@
+"""
+Exécution concurrente des requêtes de panneaux
+
+Un dashboard déclare toutes ses requêtes en tête de page, les soumet ensemble
+à un pool de threads, puis chaque section attend uniquement son propre
+résultat. La latence de la page tend vers celle de la requête la plus lente
+au lieu de la somme de toutes les requêtes.
+
+Exemple :
+    results = submit_queries(run_query, {
+        "kpis": (kpi_query, filters.params),
+        "top": (top_query, filters.params),
+    }, initializer=script_context_initializer())
+    ...
+    kpis = results["kpis"].result()
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Requêtes simultanées par page (et donc connexions utilisées au plus)
+MAX_WORKERS = 8
+
+
+def script_context_initializer():
+    """Initialiseur de threads qui leur transmet le contexte du script Streamlit.
+
+    Sans ce contexte, les appels st.cache_data faits depuis un thread du pool
+    fonctionnent mais déclenchent des avertissements « missing ScriptRunContext ».
+    Renvoie None hors de Streamlit.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    return lambda: add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def submit_queries(run_query, queries, max_workers=MAX_WORKERS, initializer=None):
+    """Soumet les requêtes {nom: (sql, params[, panneau])} en parallèle ; renvoie {nom: Future}
+
+    Le panneau éventuel est transmis à run_query pour l'instrumentation.
+
+    Le pool est libéré dès la soumission (shutdown sans attente) : ses threads
+    se terminent d'eux-mêmes une fois la dernière requête exécutée.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(queries))),
+        thread_name_prefix="panel-query",
+        initializer=initializer
+    )
+    try:
+        return {
+            name: executor.submit(run_query, *args)
+            for name, args in queries.items()
+        }
+    finally:
+        executor.shutdown(wait=False)
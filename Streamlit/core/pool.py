@@ -0,0 +1,184 @@
+"""
+Pool de connexions partagé par les sessions Streamlit
+
+Le backend est un singleton (@st.cache_resource) utilisé en même temps par
+toutes les sessions et, depuis l'exécution parallèle des panneaux, par
+plusieurs threads d'une même page. Le pool :
+
+- borne le nombre de connexions ouvertes (max_size)
+- réutilise les connexions au lieu d'un login Snowflake par requête
+- vérifie qu'une connexion est vivante avant de la prêter
+- ferme les connexions inactives depuis plus de max_idle secondes
+- limite l'attente d'une connexion libre (timeout -> PoolTimeout)
+- réessaie l'ouverture avec un délai exponentiel (retries, backoff)
+- expose ses compteurs via metrics()
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(TimeoutError):
+    """Aucune connexion libérée avant la fin du délai d'attente"""
+
+
+class ConnectionPool:
+    """Pool borné et thread-safe de connexions (ou curseurs)"""
+
+    def __init__(self, connect, close=None, is_alive=None, max_size=8, timeout=30.0,
+                 max_idle=300.0, retries=3, backoff=0.5, retry_on=(OSError,)):
+        self._connect = connect
+        self._close = close or (lambda conn: conn.close())
+        self._is_alive = is_alive or (lambda conn: True)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_on = retry_on
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._closed = False
+        self._stats = dict(size=0, in_use=0, waiting=0, created=0, closed=0,
+                           evicted=0, timeouts=0, reconnects=0)
+
+    # ------------------------------------------------------------------------
+
+    def _open(self):
+        """Ouvre une connexion, avec reprise exponentielle sur les erreurs réseau"""
+        for attempt in range(self.retries + 1):
+            try:
+                return self._connect()
+            except self.retry_on:
+                if attempt == self.retries:
+                    raise
+                with self._cond:
+                    self._stats["reconnects"] += 1
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _discard(self, conn):
+        """Ferme une connexion sortie du pool (hors verrou)"""
+        try:
+            self._close(conn)
+        except Exception:
+            # Connexion déjà cassée : rien de plus à libérer
+            pass
+
+    def _expired(self, now):
+        """Retire du pool les connexions inactives depuis plus de max_idle (sous verrou)"""
+        expired = []
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            expired.append(self._idle.popleft()[0])
+        self._stats["size"] -= len(expired)
+        self._stats["closed"] += len(expired)
+        self._stats["evicted"] += len(expired)
+        return expired
+
+    def acquire(self):
+        """Emprunte une connexion (à rendre avec release)"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn, create = None, False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Pool de connexions fermé")
+                expired = self._expired(time.monotonic())
+                self._stats["waiting"] += 1
+                try:
+                    while not self._idle and self._stats["size"] >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout(
+                                f"Aucune connexion libre après {self.timeout:g} s "
+                                f"({self.max_size} connexions utilisées)"
+                            )
+                        self._cond.wait(remaining)
+                finally:
+                    self._stats["waiting"] -= 1
+                if self._idle:
+                    # Dernière connexion rendue en premier : la plus chaude
+                    conn = self._idle.pop()[0]
+                else:
+                    self._stats["size"] += 1
+                    create = True
+                self._stats["in_use"] += 1
+
+            for stale in expired:
+                self._discard(stale)
+
+            if create:
+                try:
+                    conn = self._open()
+                except BaseException:
+                    self._forget()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+                return conn
+
+            if self._is_alive(conn):
+                return conn
+            # Connexion morte : fermée, puis nouvel essai
+            self._discard(conn)
+            self._forget()
+
+    def _forget(self):
+        """Libère la place d'une connexion empruntée qui n'existe plus"""
+        with self._cond:
+            self._stats["size"] -= 1
+            self._stats["in_use"] -= 1
+            self._stats["closed"] += 1
+            self._cond.notify()
+
+    def release(self, conn, broken=False):
+        """Rend une connexion ; `broken` la ferme au lieu de la remettre en pool"""
+        with self._cond:
+            if not (broken or self._closed):
+                self._idle.append((conn, time.monotonic()))
+                self._stats["in_use"] -= 1
+                self._cond.notify()
+                return
+        self._discard(conn)
+        self._forget()
+
+    @contextmanager
+    def connection(self):
+        """Connexion empruntée le temps du bloc `with`"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except self.retry_on:
+            # Erreur de connexion : on ne la remet pas dans le pool
+            self.release(conn, broken=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    # ------------------------------------------------------------------------
+
+    def metrics(self):
+        """Compteurs du pool (en cours d'utilisation, en attente, créées...)"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["max_size"] = self.max_size
+        return stats
+
+    def close(self):
+        """Ferme les connexions inactives ; les autres le seront à leur retour"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._stats["size"] -= len(idle)
+            self._stats["closed"] += len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
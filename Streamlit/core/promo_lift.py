@@ -0,0 +1,104 @@
+"""
+Lift promotionnel par catégorie (GOLD.PROMO_LIFT_CATEGORIE)
+
+Table construite par le pipeline (sql/Phase 3.1d Lift promotionnel GOLD par
+catégorie.sql) et lue par les panneaux « Sensibilité » et « Recommandations »
+du dashboard promotions : une ligne par catégorie, avec nombre et valeur
+moyenne des transactions sans / avec promotion, réduction moyenne, lift et
+niveau de sensibilité.
+
+Un seul passage sur BRIDGE_TRANSACTION_PROMOTION : les valeurs « sans
+promotion » sont les totaux de toutes les transactions moins ceux des
+transactions promues dans la catégorie (plus de CROSS JOIN transactions x
+inventaire).
+
+Côté DuckDB, la table est construite en mémoire si le dossier Parquet ne la
+fournit pas.
+"""
+
+PROMO_LIFT_SCHEMA = "GOLD"
+PROMO_LIFT_TABLE = "PROMO_LIFT_CATEGORIE"
+
+# Tables lues : la version de la table construite en mémoire en dépend
+SOURCES = (
+    "FINANCIAL_TRANSACTIONS_CLEAN",
+    "BRIDGE_TRANSACTION_PROMOTION",
+    "PROMOTIONS_CLEAN",
+    "INVENTORY_CLEAN",
+)
+
+# Même définition que sql/Phase 3.1d (tables SILVER non qualifiées)
+PROMO_LIFT_QUERY = """
+WITH transactions_promo AS (
+    SELECT
+        b.transaction_id,
+        p.product_category,
+        COUNT(*) AS nb_promotions,
+        SUM(p.discount_percentage) AS sum_discount
+    FROM BRIDGE_TRANSACTION_PROMOTION b
+    INNER JOIN PROMOTIONS_CLEAN p
+        ON p.promotion_id = b.promotion_id
+    GROUP BY b.transaction_id, p.product_category
+),
+category_with_promo AS (
+    SELECT
+        tp.product_category,
+        COUNT(*) AS transactions_with_promo,
+        SUM(ft.amount) AS amount_with_promo,
+        SUM(tp.nb_promotions) AS nb_couples,
+        SUM(ft.amount * tp.nb_promotions) AS amount_couples,
+        SUM(tp.sum_discount) AS sum_discount
+    FROM transactions_promo tp
+    INNER JOIN FINANCIAL_TRANSACTIONS_CLEAN ft
+        ON ft.transaction_id = tp.transaction_id
+    GROUP BY tp.product_category
+),
+totals AS (
+    SELECT COUNT(*) AS nb_transactions, SUM(amount) AS amount
+    FROM FINANCIAL_TRANSACTIONS_CLEAN
+),
+category_baseline AS (
+    SELECT
+        i.product_category,
+        t.nb_transactions - COALESCE(cp.transactions_with_promo, 0) AS transactions_no_promo,
+        ROUND(
+            (t.amount - COALESCE(cp.amount_with_promo, 0))
+            / NULLIF(t.nb_transactions - COALESCE(cp.transactions_with_promo, 0), 0),
+            2
+        ) AS avg_value_no_promo
+    FROM (SELECT DISTINCT product_category FROM INVENTORY_CLEAN) i
+    CROSS JOIN totals t
+    LEFT JOIN category_with_promo cp
+        ON cp.product_category = i.product_category
+),
+lift AS (
+    SELECT
+        COALESCE(cb.product_category, cp.product_category) AS category,
+        COALESCE(cb.transactions_no_promo, 0) AS transactions_no_promo,
+        COALESCE(cb.avg_value_no_promo, 0) AS avg_value_no_promo,
+        COALESCE(cp.transactions_with_promo, 0) AS transactions_with_promo,
+        COALESCE(ROUND(cp.amount_couples / cp.nb_couples, 2), 0) AS avg_value_with_promo,
+        COALESCE(ROUND(cp.sum_discount / cp.nb_couples * 100, 2), 0) AS avg_discount,
+        (COALESCE(ROUND(cp.amount_couples / cp.nb_couples, 2), 0) - COALESCE(cb.avg_value_no_promo, 0))
+            / NULLIF(cb.avg_value_no_promo, 1) * 100 AS lift
+    FROM category_baseline cb
+    FULL OUTER JOIN category_with_promo cp
+        ON cb.product_category = cp.product_category
+    WHERE COALESCE(cb.product_category, cp.product_category) IS NOT NULL
+)
+SELECT
+    category,
+    transactions_no_promo,
+    avg_value_no_promo,
+    transactions_with_promo,
+    avg_value_with_promo,
+    avg_discount,
+    ROUND(lift, 2) AS lift_percentage,
+    CASE
+        WHEN lift > 20 THEN 'Très sensible'
+        WHEN lift BETWEEN 5 AND 20 THEN 'Sensible'
+        WHEN lift BETWEEN -5 AND 5 THEN 'Neutre'
+        ELSE 'Peu sensible'
+    END AS sensitivity_level
+FROM lift
+"""
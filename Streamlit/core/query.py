@@ -0,0 +1,103 @@
+"""
+Requêtes paramétrées des dashboards
+
+Les filtres ne sont plus concaténés dans le SQL (f"region = '{...}'") : ils
+deviennent des paramètres nommés (`:region`). Le texte SQL ne dépend donc que
+des filtres actifs, pas de leurs valeurs, ce qui permet :
+
+- la réutilisation du cache de résultats Snowflake et des plans compilés
+  (même texte de requête, valeurs liées côté serveur)
+- le partage des clés st.cache_data entre valeurs de filtres identiques
+- la fin des injections SQL via les valeurs de la sidebar
+
+Exemple :
+    filters = Filters().equals("region", selected_region)
+    sql = f"SELECT ... FROM MARKETING_CAMPAIGNS_CLEAN mc {filters.where('mc')}"
+    df = run_query(sql, filters.params)
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from .sql_translate import skip_literal
+
+# Valeurs de sidebar signifiant "pas de filtre"
+ALL_VALUES = ("Toutes", "Tous")
+
+BoundQuery = namedtuple("BoundQuery", ["sql", "params"])
+
+_PARAM = re.compile(r":([A-Za-z_][A-Za-z0-9_]*)")
+
+
+class Filters:
+    """Filtres d'égalité composables, rendus en paramètres nommés"""
+
+    def __init__(self, all_values=ALL_VALUES):
+        self.all_values = all_values
+        self.conditions = []
+        self.params = {}
+
+    def equals(self, column, value, name=None):
+        """Ajoute `column = :name`, sauf si la valeur vaut "Toutes" / "Tous" / None"""
+        if value is None or value in self.all_values:
+            return self
+        name = name or column
+        self.conditions.append((column, name))
+        self.params[name] = value
+        return self
+
+    def clauses(self, alias=None):
+        """Liste des conditions, colonnes préfixées par l'alias de table"""
+        prefix = f"{alias}." if alias else ""
+        return [f"{prefix}{column} = :{name}" for column, name in self.conditions]
+
+    def where(self, alias=None):
+        """Clause WHERE complète (chaîne vide si aucun filtre actif)"""
+        clauses = self.clauses(alias)
+        return "WHERE " + " AND ".join(clauses) if clauses else ""
+
+    def and_(self, alias=None):
+        """Conditions à ajouter derrière un WHERE existant"""
+        return "".join(f" AND {clause}" for clause in self.clauses(alias))
+
+    def __bool__(self):
+        return bool(self.conditions)
+
+
+@lru_cache(maxsize=512)
+def _compile(sql):
+    """Remplace les `:nom` par `?` ; renvoie le texte et l'ordre des noms.
+
+    Mis en cache par processus : une requête de panneau n'est analysée qu'une
+    fois, et le texte produit est identique d'un appel à l'autre.
+    """
+    parts, names, pos, last = [], [], 0, 0
+    while pos < len(sql):
+        skipped = skip_literal(sql, pos)
+        if skipped != pos:
+            pos = skipped
+            continue
+        match = _PARAM.match(sql, pos)
+        # `::TYPE` est un cast et `v:champ` un accès VARIANT, pas des paramètres
+        previous = sql[pos - 1:pos]
+        if (match and previous != ":" and not (previous.isalnum() or previous == "_")
+                and sql[match.end():match.end() + 1] != ":"):
+            parts.append(sql[last:pos])
+            parts.append("?")
+            names.append(match.group(1))
+            pos = last = match.end()
+            continue
+        pos += 1
+    parts.append(sql[last:])
+    return "".join(parts), tuple(names)
+
+
+def bind(sql, params=None):
+    """Compile une requête à paramètres nommés en (SQL `?`, tuple de valeurs)"""
+    text, names = _compile(sql)
+    params = params or {}
+    missing = [name for name in names if name not in params]
+    if missing:
+        raise ValueError(f"Paramètres manquants pour la requête : {', '.join(missing)}")
+    return BoundQuery(text, tuple(params[name] for name in names))
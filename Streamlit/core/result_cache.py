@@ -0,0 +1,181 @@
+"""
+Cache de résultats persistant sur disque
+
+Les résultats de requêtes sont stockés en Parquet compressé, sous une clé
+calculée à partir :
+
+- du texte SQL normalisé (commentaires retirés, blancs compactés hors chaînes)
+- des valeurs des paramètres
+- des versions des tables lues par la requête
+
+Les versions sont écrites par le pipeline (SILVER.TABLE_VERSIONS côté
+Snowflake, horodatage des fichiers Parquet côté DuckDB) : un résultat reste
+valide tant que les tables sous-jacentes n'ont pas changé, y compris d'un
+redémarrage à l'autre de Streamlit. Une nouvelle version produit une nouvelle
+clé ; les fichiers devenus inutiles sont purgés au-delà de `max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from .backends import QueryBackend
+from .instrumentation import annotate, phase
+from .sql_translate import skip_literal
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Retire les commentaires et compacte les blancs hors chaînes / identifiants quotés"""
+    parts, pos, last = [], 0, 0
+
+    def add_code(text):
+        text = _SPACES.sub(" ", text)
+        if text.startswith(" ") and parts and parts[-1].endswith(" "):
+            text = text[1:]
+        if text:
+            parts.append(text)
+
+    while pos < len(sql):
+        skipped = skip_literal(sql, pos)
+        if skipped == pos:
+            pos += 1
+            continue
+        add_code(sql[last:pos])
+        if sql[pos] in ("'", '"'):
+            parts.append(sql[pos:skipped])
+        else:
+            # Commentaire : remplacé par un blanc
+            add_code(" ")
+        pos = last = skipped
+    add_code(sql[last:])
+    return "".join(parts).strip()
+
+
+class ResultCache:
+    """Stockage Parquet des DataFrames, un fichier par clé"""
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, compression="zstd"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.compression = compression
+
+    @staticmethod
+    def key(sql, params=None, versions=None):
+        """Clé de cache : SQL normalisé + paramètres + versions des tables"""
+        payload = json.dumps(
+            [normalize_sql(sql), params or {}, versions or {}],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.parquet"
+
+    def get(self, key):
+        """DataFrame en cache, ou None"""
+        path = self._path(key)
+        try:
+            df = pd.read_parquet(path)
+            # Horodatage d'accès pour la purge (fichier le moins récemment lu en premier)
+            os.utime(path)
+            return df
+        except (OSError, ImportError, ValueError):
+            return None
+
+    def put(self, key, df):
+        """Écrit le DataFrame ; une erreur d'écriture ne fait jamais échouer la requête"""
+        tmp = None
+        try:
+            handle, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            os.close(handle)
+            df.to_parquet(tmp, compression=self.compression, index=False)
+            # Écriture atomique : un autre processus ne lit jamais un fichier partiel
+            os.replace(tmp, self._path(key))
+        except (OSError, ImportError, ValueError):
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.prune()
+
+    def prune(self):
+        """Supprime les fichiers les moins récemment utilisés au-delà de max_bytes"""
+        files = []
+        for path in self.directory.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Vide le cache"""
+        for path in self.directory.glob("*.parquet"):
+            path.unlink(missing_ok=True)
+
+
+class CachedBackend(QueryBackend):
+    """Backend enveloppant un autre backend avec le cache Parquet"""
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+        self.name = backend.name
+
+    def table_versions(self):
+        return self.backend.table_versions()
+
+    def versions_for(self, query):
+        return self.backend.versions_for(query)
+
+    def version_token(self, query):
+        return self.backend.version_token(query)
+
+    def run_query(self, query, params=None):
+        versions = self.backend.versions_for(query)
+        key = self.cache.key(query, params, versions)
+        with phase("cache_read"):
+            df = self.cache.get(key)
+        if df is not None:
+            annotate(cache="disk")
+            return df
+        df = self.backend.run_query(query, params)
+        with phase("cache_write"):
+            self.cache.put(key, df)
+        return df
+
+    def fetch_arrow(self, query, params=None):
+        return self.backend.fetch_arrow(query, params)
+
+    def pool_metrics(self):
+        return self.backend.pool_metrics()
+
+    def iter_batches(self, query, params=None, batch_rows=100_000):
+        # Flux non mis en cache : destiné aux exports volumineux
+        return self.backend.iter_batches(query, params, batch_rows)
+
+    def record_batches(self, query, params=None, batch_rows=100_000):
+        return self.backend.record_batches(query, params, batch_rows)
+
+    def close(self):
+        self.backend.close()
+
+    def __getattr__(self, name):
+        # Attributs propres au backend enveloppé (tables, cursor, ...)
+        return getattr(self.backend, name)
@@ -0,0 +1,260 @@
+"""
+Routage des requêtes d'agrégat vers les rollups GOLD jour x région
+
+Le pipeline (sql/Phase 3.1c Rollups GOLD jour x région.sql) maintient deux
+agrégats de FINANCIAL_TRANSACTIONS_CLEAN, au grain jour x région et jour x
+région x moyen de paiement, avec nombre de transactions, somme, somme des
+carrés, minimum et maximum des montants.
+
+Une requête est réécrite pour lire le plus petit rollup qui la couvre si :
+- elle ne lit que FINANCIAL_TRANSACTIONS_CLEAN (pas de jointure, de
+  sous-requête, d'UNION ni de DISTINCT) ;
+- elle agrège (GROUP BY ou agrégat sur toute la table) ;
+- ses seuls agrégats sont COUNT(*) et COUNT / SUM / AVG / MIN / MAX /
+  STDDEV / VARIANCE(amount) : tout autre agrégat (COUNT(1), COUNT(region),
+  SUM(1), MEDIAN...) compterait les lignes du rollup, la requête n'est pas
+  routée ;
+- les autres colonnes lues (dans SELECT, WHERE, GROUP BY, ORDER BY...) sont
+  des dimensions du rollup : transaction_date (et toute expression dessus :
+  mois, trimestre, jour de semaine), region, payment_method.
+
+Le résultat est celui de la requête d'origine (mêmes valeurs et types, aux
+arrondis flottants près ; vérifié par tools/benchmark.py). Les autres
+requêtes passent telles quelles. Un rollup n'est utilisé que s'il a une
+version connue (SILVER.TABLE_VERSIONS côté Snowflake, construit en mémoire
+côté DuckDB) : sans rollup, rien ne change.
+"""
+
+import re
+from functools import lru_cache
+
+from .backends import QueryBackend
+from .instrumentation import annotate
+from .sql_translate import _rewrite_calls, skip_literal
+
+SOURCE_TABLE = "FINANCIAL_TRANSACTIONS_CLEAN"
+ROLLUP_SCHEMA = "GOLD"
+
+# Du moins fin au plus fin : le premier rollup qui couvre les dimensions lues est retenu
+ROLLUPS = (
+    ("ROLLUP_VENTES_JOUR_REGION", ("TRANSACTION_DATE", "REGION")),
+    ("ROLLUP_VENTES_JOUR_REGION_PAIEMENT", ("TRANSACTION_DATE", "REGION", "PAYMENT_METHOD")),
+)
+
+# Colonnes de la source qui ne sont des dimensions d'aucun rollup
+NON_DIMENSIONS = ("TRANSACTION_ID", "TRANSACTION_TYPE", "AMOUNT", "ENTITY", "ACCOUNT_CODE")
+DIMENSIONS = ("TRANSACTION_DATE", "REGION", "PAYMENT_METHOD")
+
+MEASURE = "AMOUNT"
+
+_SOURCE = re.compile(
+    rf"\bFROM\s+((?:ANYCOMPANY_LAB\.)?(?:SILVER\.)?{SOURCE_TABLE})\b", re.IGNORECASE
+)
+_REJECTED = re.compile(r"\b(JOIN|DISTINCT|UNION|INTERSECT|EXCEPT|SAMPLE|TABLESAMPLE)\b", re.IGNORECASE)
+_SELECT = re.compile(r"\bSELECT\b", re.IGNORECASE)
+_FROM = re.compile(r"\bFROM\b", re.IGNORECASE)
+_GROUP_BY = re.compile(r"\bGROUP\s+BY\b", re.IGNORECASE)
+_OVER = re.compile(r"\bOVER\b", re.IGNORECASE)
+_SELECT_STAR = re.compile(r"\bSELECT\s+\*", re.IGNORECASE)
+# Agrégats sans équivalent sur le rollup : leur présence empêche le routage
+_OTHER_AGGREGATES = re.compile(
+    r"\b(VAR_POP|STDDEV_POP|MEDIAN|MODE"
+    r"|COUNT_IF|SUM_IF|ANY_VALUE|ARBITRARY|FIRST|LAST|LISTAGG|STRING_AGG|ARRAY_AGG|PERCENTILE_CONT"
+    r"|PERCENTILE_DISC|QUANTILE|APPROX_COUNT_DISTINCT|APPROX_PERCENTILE|HLL|BOOL_AND|BOOL_OR"
+    r"|BOOLAND_AGG|BOOLOR_AGG|KURTOSIS|SKEW|CORR|COVAR_SAMP|COVAR_POP|REGR_\w+)\s*\(",
+    re.IGNORECASE
+)
+_MEASURE_ARG = re.compile(rf"^(?:[A-Za-z_]\w*\.)?{MEASURE}$", re.IGNORECASE)
+
+
+def rollup_source_query(name, source=f"SILVER.{SOURCE_TABLE}"):
+    """Requête de construction d'un rollup (même définition que sql/Phase 3.1c)"""
+    dimensions = ", ".join(dict(ROLLUPS)[name]).lower()
+    return f"""
+SELECT
+    {dimensions},
+    COUNT(*) AS nb_transactions,
+    SUM(amount) AS sum_amount,
+    SUM(amount * amount) AS sum_amount_sq,
+    MIN(amount) AS min_amount,
+    MAX(amount) AS max_amount
+FROM {source}
+GROUP BY {dimensions}
+"""
+
+
+# ============================================================================
+# RÉÉCRITURE
+# ============================================================================
+
+def _mask(sql):
+    """Texte SQL dont chaînes et commentaires sont remplacés par des blancs"""
+    parts, pos, last = [], 0, 0
+    while pos < len(sql):
+        skipped = skip_literal(sql, pos)
+        if skipped == pos:
+            pos += 1
+            continue
+        parts.append(sql[last:pos])
+        parts.append(" " * (skipped - pos))
+        pos = last = skipped
+    parts.append(sql[last:])
+    return "".join(parts)
+
+
+def _variance(args):
+    # Variance d'échantillon à partir des sommes (n, somme, somme des carrés)
+    return (
+        "((SUM(sum_amount_sq) - SUM(sum_amount) * SUM(sum_amount) / SUM(nb_transactions))"
+        " / NULLIF(SUM(nb_transactions) - 1, 0))"
+    )
+
+
+_AGGREGATES = {
+    # Entier comme COUNT(*) (SUM d'un entier est un HUGEINT / NUMBER élargi)
+    "COUNT": lambda args: "CAST(SUM(nb_transactions) AS BIGINT)",
+    "SUM": lambda args: "SUM(sum_amount)",
+    "AVG": lambda args: "(SUM(sum_amount) / NULLIF(SUM(nb_transactions), 0))",
+    "MIN": lambda args: "MIN(min_amount)",
+    "MAX": lambda args: "MAX(max_amount)",
+    "VARIANCE": _variance,
+    "VAR_SAMP": _variance,
+    "STDDEV": lambda args: f"SQRT({_variance(args)})",
+    "STDDEV_SAMP": lambda args: f"SQRT({_variance(args)})",
+}
+
+
+def _rewritable(name, args):
+    # amount est NOT NULL en SILVER : COUNT(amount) = COUNT(*)
+    return len(args) == 1 and (_MEASURE_ARG.match(args[0]) or (name == "COUNT" and args[0] == "*"))
+
+
+def _kept_aggregates(sql):
+    """Nombre d'appels COUNT / SUM / AVG... qui ne portent ni sur amount ni sur *"""
+    kept = 0
+
+    for name in _AGGREGATES:
+        def count(args, name=name):
+            nonlocal kept
+            kept += not _rewritable(name, args)
+            return f"{name}({', '.join(args)})"
+
+        _rewrite_calls(sql, name, count)
+    return kept
+
+
+def _rewrite_aggregates(sql):
+    """Remplace les agrégats du montant par leur équivalent sur le rollup ;
+    renvoie (sql, nombre d'agrégats réécrits)"""
+    rewritten = 0
+
+    for name, rewrite in _AGGREGATES.items():
+        def replace(args, name=name, rewrite=rewrite):
+            nonlocal rewritten
+            if _rewritable(name, args):
+                rewritten += 1
+                return rewrite(args)
+            return f"{name}({', '.join(args)})"
+
+        sql = _rewrite_calls(sql, name, replace)
+    return sql, rewritten
+
+
+@lru_cache(maxsize=512)
+def route(query, available=tuple(name for name, _ in ROLLUPS)):
+    """Requête réécrite sur un rollup de `available` ; (sql, nom du rollup) ou (query, None)"""
+    masked = _mask(query)
+    source = _SOURCE.search(masked)
+    if (
+        source is None
+        or len(_SELECT.findall(masked)) != 1
+        or len(_FROM.findall(masked)) != 1
+        or _REJECTED.search(masked)
+        or _SELECT_STAR.search(masked)
+    ):
+        return query, None
+
+    # Agrégats hors de ceux réécrits (COUNT(1), SUM(1), MEDIAN(amount)...) : pas de routage
+    if _OTHER_AGGREGATES.search(masked) or _kept_aggregates(query):
+        return query, None
+
+    sql, rewritten = _rewrite_aggregates(query)
+    masked = _mask(sql)
+    grouped = _GROUP_BY.search(masked) is not None
+    # Sans GROUP BY, une fenêtre ou l'absence d'agrégat signifie une ligne par transaction
+    if not grouped and (not rewritten or _OVER.search(masked)):
+        return query, None
+
+    columns = {
+        column.upper() for column in re.findall(
+            rf"\b({'|'.join(NON_DIMENSIONS + DIMENSIONS)})\b", masked, re.IGNORECASE
+        )
+    }
+    if columns & set(NON_DIMENSIONS):
+        return query, None
+    for name, dimensions in ROLLUPS:
+        if name in available and columns <= set(dimensions):
+            start, end = _SOURCE.search(masked).span(1)
+            return f"{sql[:start]}{ROLLUP_SCHEMA}.{name}{sql[end:]}", name
+    return query, None
+
+
+# ============================================================================
+# BACKEND
+# ============================================================================
+
+class RoutedBackend(QueryBackend):
+    """Backend enveloppant un autre backend avec le routage vers les rollups"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+
+    def routed(self, query):
+        """(requête effectivement exécutée, rollup ou None)"""
+        versions = self.backend.current_versions()
+        available = tuple(name for name, _ in ROLLUPS if name in versions)
+        if not available:
+            return query, None
+        return route(query, available)
+
+    def _route(self, query):
+        sql, rollup = self.routed(query)
+        if rollup is not None:
+            annotate(rollup=rollup)
+        return sql
+
+    def table_versions(self):
+        return self.backend.table_versions()
+
+    def current_versions(self):
+        return self.backend.current_versions()
+
+    def versions_for(self, query):
+        # Versions des tables réellement lues : celles du rollup après routage
+        return self.backend.versions_for(self.routed(query)[0])
+
+    def version_token(self, query):
+        return self.backend.version_token(self.routed(query)[0])
+
+    def run_query(self, query, params=None):
+        return self.backend.run_query(self._route(query), params)
+
+    def fetch_arrow(self, query, params=None):
+        return self.backend.fetch_arrow(self._route(query), params)
+
+    def iter_batches(self, query, params=None, batch_rows=100_000):
+        return self.backend.iter_batches(self._route(query), params, batch_rows)
+
+    def record_batches(self, query, params=None, batch_rows=100_000):
+        return self.backend.record_batches(self._route(query), params, batch_rows)
+
+    def pool_metrics(self):
+        return self.backend.pool_metrics()
+
+    def close(self):
+        self.backend.close()
+
+    def __getattr__(self, name):
+        # Attributs propres au backend enveloppé (tables, cursor, ...)
+        return getattr(self.backend, name)
@@ -0,0 +1,164 @@
+"""
+Cube de ventes jour x région pour le Sales Dashboard
+
+Un seul agrégat (une ligne par jour et par région : nombre de transactions et
+montant total) est lu depuis FINANCIAL_TRANSACTIONS_CLEAN. Tous les panneaux
+(KPIs, séries quotidiennes / mensuelles / trimestrielles / annuelles, croissance MoM,
+saisonnalité, régions) en sont dérivés en pandas : changer de période ou de
+région ne coûte plus aucune requête warehouse. Le cube est lu sur le rollup GOLD
+jour x région quand il existe (routage automatique, core/rollups.py).
+
+Seul le nombre de clients uniques n'est pas additif : il est lu une fois par
+région (plus le total) avec CUSTOMERS_BY_REGION_QUERY. La ligne de total est
+repérée par IS_TOTAL = GROUPING(region), pas par une région NULL : des
+transactions sans région forment leur propre groupe.
+"""
+
+import numpy as np
+import pandas as pd
+
+ALL_REGIONS = "Toutes"
+
+SALES_CUBE_QUERY = """
+SELECT
+    transaction_date AS day,
+    region,
+    COUNT(*) AS nb_transactions,
+    SUM(amount) AS total_amount
+FROM FINANCIAL_TRANSACTIONS_CLEAN
+GROUP BY transaction_date, region
+"""
+
+CUSTOMERS_BY_REGION_QUERY = """
+SELECT
+    region,
+    GROUPING(region) AS is_total,
+    COUNT(DISTINCT entity) AS unique_customers
+FROM FINANCIAL_TRANSACTIONS_CLEAN
+GROUP BY GROUPING SETS ((region), ())
+"""
+
+# Mêmes libellés que DAYNAME / MONTHNAME de Snowflake
+WEEKDAY_NAMES = np.array(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"])
+MONTH_NAMES = np.array(["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                        "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])
+
+PERIODS = {
+    "Quotidienne": "day",
+    "Mensuelle": "month",
+    "Trimestrielle": "quarter",
+    "Annuelle": "year",
+}
+
+
+def prepare_cube(df):
+    """Normalise les types du cube (dates, entiers, flottants)"""
+    cube = df.copy()
+    cube["DAY"] = pd.to_datetime(cube["DAY"])
+    cube["NB_TRANSACTIONS"] = cube["NB_TRANSACTIONS"].astype("int64")
+    cube["TOTAL_AMOUNT"] = cube["TOTAL_AMOUNT"].astype("float64")
+    return cube
+
+
+def regions(cube):
+    """Liste triée des régions présentes dans le cube"""
+    return sorted(cube["REGION"].dropna().unique().tolist())
+
+
+def filter_region(cube, region):
+    """Restreint le cube à une région ("Toutes" = pas de filtre)"""
+    if region == ALL_REGIONS:
+        return cube
+    return cube[cube["REGION"] == region]
+
+
+def _aggregate(cube, keys):
+    """Agrège le cube par clés : nombre, revenu et panier moyen"""
+    grouped = cube.groupby(keys, sort=True)[["NB_TRANSACTIONS", "TOTAL_AMOUNT"]].sum()
+    grouped["AVG_TRANSACTION_VALUE"] = (
+        grouped["TOTAL_AMOUNT"] / grouped["NB_TRANSACTIONS"]
+    ).round(2)
+    grouped["TOTAL_AMOUNT"] = grouped["TOTAL_AMOUNT"].round(2)
+    return grouped
+
+
+def kpis(cube, customers, region=ALL_REGIONS):
+    """KPIs globaux (équivalent de kpi_query)"""
+    sliced = filter_region(cube, region)
+    nb_transactions = int(sliced["NB_TRANSACTIONS"].sum())
+    total_amount = float(sliced["TOTAL_AMOUNT"].sum())
+    if region == ALL_REGIONS:
+        customer_rows = customers[customers["IS_TOTAL"] == 1]
+    else:
+        customer_rows = customers[customers["REGION"] == region]
+    return pd.DataFrame({
+        "TOTAL_TRANSACTIONS": [nb_transactions],
+        "TOTAL_REVENUE": [round(total_amount, 2)],
+        "AVG_TRANSACTION_VALUE": [round(total_amount / nb_transactions, 2) if nb_transactions else np.nan],
+        "UNIQUE_CUSTOMERS": [int(customer_rows["UNIQUE_CUSTOMERS"].sum())],
+    })
+
+
+def time_series(cube, period_option, region=ALL_REGIONS):
+    """Évolution par période (équivalent de time_query)"""
+    sliced = filter_region(cube, region)
+    granularity = PERIODS[period_option]
+    if granularity == "day":
+        period = sliced["DAY"].rename("PERIOD")
+    elif granularity == "year":
+        period = sliced["DAY"].dt.year.rename("PERIOD")
+    else:
+        freq = "M" if granularity == "month" else "Q"
+        period = sliced["DAY"].dt.to_period(freq).dt.start_time.rename("PERIOD")
+    series = _aggregate(sliced.assign(PERIOD=period), "PERIOD").reset_index()
+    return series.rename(columns={"TOTAL_AMOUNT": "TOTAL_REVENUE"})[
+        ["PERIOD", "NB_TRANSACTIONS", "TOTAL_REVENUE", "AVG_TRANSACTION_VALUE"]
+    ]
+
+
+def monthly_growth(cube, region=ALL_REGIONS):
+    """Croissance Month-over-Month (équivalent LAG de growth_query)"""
+    monthly = time_series(cube, "Mensuelle", region)
+    revenue = monthly["TOTAL_REVENUE"]
+    previous = revenue.shift(1)
+    return pd.DataFrame({
+        "MONTH": monthly["PERIOD"],
+        "REVENUE": revenue,
+        "PREVIOUS_MONTH_REVENUE": previous,
+        "GROWTH_PERCENTAGE": ((revenue - previous) / previous * 100).round(2),
+    })
+
+
+def by_weekday(cube, region=ALL_REGIONS):
+    """Revenu par jour de la semaine, du lundi au dimanche"""
+    sliced = filter_region(cube, region)
+    weekday = sliced["DAY"].dt.dayofweek.rename("WEEKDAY_NUM")
+    grouped = _aggregate(sliced.assign(WEEKDAY_NUM=weekday), "WEEKDAY_NUM").reset_index()
+    return pd.DataFrame({
+        "DAY_OF_WEEK": WEEKDAY_NAMES[grouped["WEEKDAY_NUM"].to_numpy()],
+        "NB_TRANSACTIONS": grouped["NB_TRANSACTIONS"],
+        "TOTAL_REVENUE": grouped["TOTAL_AMOUNT"],
+    })
+
+
+def by_month_of_year(cube, region=ALL_REGIONS):
+    """Revenu par mois de l'année (toutes années confondues)"""
+    sliced = filter_region(cube, region)
+    month = sliced["DAY"].dt.month.rename("MONTH_NUM")
+    grouped = _aggregate(sliced.assign(MONTH_NUM=month), "MONTH_NUM").reset_index()
+    return pd.DataFrame({
+        "MONTH_NAME": MONTH_NAMES[grouped["MONTH_NUM"].to_numpy() - 1],
+        "MONTH_NUM": grouped["MONTH_NUM"],
+        "TOTAL_REVENUE": grouped["TOTAL_AMOUNT"],
+    })
+
+
+def by_region(cube):
+    """Performance par région, tous filtres confondus (équivalent de region_query)"""
+    grouped = _aggregate(cube, "REGION").reset_index()
+    grouped = grouped.rename(columns={
+        "NB_TRANSACTIONS": "TRANSACTION_COUNT",
+        "AVG_TRANSACTION_VALUE": "AVG_AMOUNT",
+    })
+    grouped = grouped.sort_values("TOTAL_AMOUNT", ascending=False, ignore_index=True)
+    return grouped[["REGION", "TRANSACTION_COUNT", "TOTAL_AMOUNT", "AVG_AMOUNT"]]
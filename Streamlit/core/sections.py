@@ -0,0 +1,126 @@
+"""
+Sections paresseuses des dashboards
+
+Sous les KPIs, la page est découpée en onglets qui suivent l'onglet ouvert
+(st.tabs avec on_change="rerun") : seules les sections de l'onglet affiché
+exécutent leurs requêtes, les autres ne coûtent rien tant qu'on ne les ouvre
+pas. Chaque section est un fragment (st.fragment) : un widget propre à la
+section ne relance que la section, pas le reste de la page. Les filtres de
+la sidebar, communs à toutes les sections, relancent toujours la page.
+
+Rendu progressif : les requêtes des KPIs et des sections ouvertes partent
+ensemble en arrière-plan ; chaque section affiche d'abord un emplacement
+« chargement », rempli dès que ses propres requêtes sont terminées, dans
+l'ordre d'arrivée. Les KPIs (requête légère) s'affichent aussitôt, sans
+attendre la jointure la plus lente.
+
+Section [dashboard] de secrets.toml :
+
+    [dashboard]
+    lazy_sections = false   # toutes les sections à chaque passage, comme avant
+    progressive = false     # sections rendues dans l'ordre de la page
+
+Variables ANYCOMPANY_LAZY_SECTIONS / ANYCOMPANY_PROGRESSIVE prioritaires
+(ANYCOMPANY_LAZY_SECTIONS=0 est utilisé par le benchmark pour relever les
+requêtes de toutes les sections).
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import streamlit as st
+
+from .data import current_run, start_fragment_run
+
+
+def _enabled(secrets, key, variable):
+    """Option booléenne de [dashboard] (par défaut : oui), variable prioritaire"""
+    from .backends import _section
+    settings = _section(secrets, "dashboard")
+    value = os.environ.get(variable, settings.get(key, True))
+    return str(value).strip().lower() not in ("0", "false", "no", "non")
+
+
+def lazy_sections_enabled(secrets):
+    """Sections paresseuses activées (par défaut : oui)"""
+    return _enabled(secrets, "lazy_sections", "ANYCOMPANY_LAZY_SECTIONS")
+
+
+def progressive_enabled(secrets):
+    """Rendu progressif activé (par défaut : oui)"""
+    return _enabled(secrets, "progressive", "ANYCOMPANY_PROGRESSIVE")
+
+
+def section_tabs(labels, lazy=True, key="section"):
+    """Onglets des sections ; avec `lazy`, seul l'onglet ouvert a .open vrai"""
+    return st.tabs(labels, key=key, on_change="rerun" if lazy else "ignore")
+
+
+def is_open(tab):
+    """Onglet affiché (toujours vrai hors mode paresseux, où .open vaut None,
+    et pour un simple conteneur)"""
+    return getattr(tab, "open", None) is not False
+
+
+def _fragment_rerun():
+    """Vrai si seul un fragment est relancé (widget de la section)"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+def _run_fragment(timer, section):
+    @st.fragment
+    def fragment():
+        # La fonction est celle de l'exécution qui a créé le fragment : les
+        # mesures d'une relance vont à l'exécution courante, pas à `timer`
+        if _fragment_rerun():
+            start_fragment_run()
+        section()
+        # Clôt le temps de rendu de la section (aussi lors d'une relance du fragment)
+        current_run().finish()
+
+    fragment()
+    timer.painted()
+
+
+def render_section(tab, timer, section):
+    """Exécute `section` dans son onglet, en fragment, si l'onglet est ouvert"""
+    with tab:
+        if not is_open(tab):
+            return
+        _run_fragment(timer, section)
+
+
+def render_sections(timer, slots, progressive=True):
+    """Rend les sections [(conteneur, section, [Future attendus])].
+
+    Sans rendu progressif : dans l'ordre de la liste. Avec : un emplacement
+    « chargement » par section, puis chaque section dès que ses requêtes
+    sont terminées.
+    """
+    slots = [slot for slot in slots if is_open(slot[0])]
+    if not progressive:
+        for container, section, _ in slots:
+            render_section(container, timer, section)
+        return
+
+    placeholders = []
+    for container, _, _ in slots:
+        with container:
+            placeholder = st.empty()
+            placeholder.info("⏳ Chargement…")
+        placeholders.append(placeholder)
+
+    pending = list(range(len(slots)))
+    while pending:
+        ready = [i for i in pending if all(future.done() for future in slots[i][2])]
+        if not ready:
+            # Attente hors de toute section : ni rendu ni requête du panneau
+            wait([future for i in pending for future in slots[i][2] if not future.done()],
+                 return_when=FIRST_COMPLETED)
+            continue
+        for i in ready:
+            pending.remove(i)
+            with placeholders[i].container():
+                _run_fragment(timer, slots[i][1])
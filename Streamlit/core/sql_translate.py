@@ -0,0 +1,152 @@
+"""
+Traduction SQL Snowflake -> DuckDB
+
+Réécrit les quelques fonctions propres à Snowflake utilisées par les dashboards
+et les scripts SQL pour qu'elles s'exécutent sur le moteur DuckDB local.
+Les constructions déjà comprises par DuckDB (DATE_TRUNC, YEAR, MONTH,
+DAYOFWEEK, QUALIFY, NULLS LAST, ::FLOAT) sont laissées telles quelles.
+"""
+
+import re
+
+# ============================================================================
+# PARCOURS DU TEXTE SQL
+# ============================================================================
+
+_IDENT_CHARS = re.compile(r"[A-Za-z0-9_$]")
+
+
+def skip_literal(sql, pos):
+    """Renvoie la position qui suit la chaîne, le commentaire ou l'identifiant
+    quoté commençant en `pos`, ou `pos` s'il n'y en a pas"""
+    char = sql[pos]
+    if char in ("'", '"'):
+        end = pos + 1
+        while end < len(sql):
+            if sql[end] == char:
+                # Quote doublée = quote échappée
+                if end + 1 < len(sql) and sql[end + 1] == char:
+                    end += 2
+                    continue
+                return end + 1
+            end += 1
+        return len(sql)
+    if sql.startswith("--", pos):
+        end = sql.find("\n", pos)
+        return len(sql) if end == -1 else end
+    if sql.startswith("/*", pos):
+        end = sql.find("*/", pos + 2)
+        return len(sql) if end == -1 else end + 2
+    return pos
+
+
+def _find_calls(sql, name):
+    """Itère sur les appels `name(` hors chaînes et commentaires.
+
+    Renvoie des tuples (début, fin, arguments) où `fin` est la position qui
+    suit la parenthèse fermante.
+    """
+    pattern = re.compile(rf"{name}\s*\(", re.IGNORECASE)
+    pos = 0
+    while pos < len(sql):
+        skipped = skip_literal(sql, pos)
+        if skipped != pos:
+            pos = skipped
+            continue
+        match = pattern.match(sql, pos)
+        preceded_by_ident = pos > 0 and (_IDENT_CHARS.match(sql[pos - 1]) or sql[pos - 1] == ".")
+        if match and not preceded_by_ident:
+            args, end = _split_args(sql, match.end())
+            yield pos, end, args
+            pos = end
+            continue
+        pos += 1
+
+
+def _split_args(sql, pos):
+    """Découpe les arguments d'un appel à partir de la position suivant `(`"""
+    args, depth, start = [], 0, pos
+    while pos < len(sql):
+        skipped = skip_literal(sql, pos)
+        if skipped != pos:
+            pos = skipped
+            continue
+        char = sql[pos]
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            if depth == 0:
+                args.append(sql[start:pos].strip())
+                return [a for a in args if a], pos + 1
+            depth -= 1
+        elif char == "," and depth == 0:
+            args.append(sql[start:pos].strip())
+            start = pos + 1
+        pos += 1
+    raise ValueError(f"Parenthèse non fermée dans la requête : {sql[:80]!r}")
+
+
+def _rewrite_calls(sql, name, rewrite):
+    """Remplace chaque appel `name(...)` par `rewrite(arguments)`"""
+    parts, last = [], 0
+    for start, end, args in _find_calls(sql, name):
+        # Les arguments peuvent eux-mêmes contenir des appels à traduire
+        args = [_rewrite_calls(arg, name, rewrite) for arg in args]
+        parts.append(sql[last:start])
+        parts.append(rewrite(args))
+        last = end
+    parts.append(sql[last:])
+    return "".join(parts)
+
+
+# ============================================================================
+# RÈGLES DE TRADUCTION
+# ============================================================================
+
+def _date_part(arg):
+    """Normalise une unité de date (`day`, 'day') en littéral DuckDB"""
+    return "'" + arg.strip("'\"").lower() + "'"
+
+
+def _datediff(args):
+    unit, start, end = args
+    return f"date_diff({_date_part(unit)}, {start}, {end})"
+
+
+def _dateadd(args):
+    unit, amount, value = args
+    unit = unit.strip("'\"").upper()
+    return f"({value} + ({amount}) * INTERVAL 1 {unit})"
+
+
+def _dayname(args):
+    # Snowflake renvoie l'abréviation anglaise ('Mon', 'Tue', ...)
+    return f"strftime({args[0]}, '%a')"
+
+
+def _monthname(args):
+    # Snowflake renvoie l'abréviation anglaise ('Jan', 'Feb', ...)
+    return f"strftime({args[0]}, '%b')"
+
+
+def _iff(args):
+    condition, when_true, when_false = args
+    return f"CASE WHEN {condition} THEN {when_true} ELSE {when_false} END"
+
+
+_FUNCTION_RULES = [
+    ("DATEDIFF", _datediff),
+    ("DATEADD", _dateadd),
+    ("DAYNAME", _dayname),
+    ("MONTHNAME", _monthname),
+    ("IFF", _iff),
+]
+
+_CURRENT_DATE = re.compile(r"\bCURRENT_DATE\s*\(\s*\)", re.IGNORECASE)
+
+
+def to_duckdb(sql):
+    """Traduit une requête écrite pour Snowflake en SQL DuckDB"""
+    for name, rewrite in _FUNCTION_RULES:
+        sql = _rewrite_calls(sql, name, rewrite)
+    return _CURRENT_DATE.sub("CURRENT_DATE", sql)
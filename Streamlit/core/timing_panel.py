@@ -0,0 +1,36 @@
+"""
+Panneau de temps de la sidebar (optionnel)
+
+Affiche, pour l'exécution courante du script, le temps par panneau et par
+phase (SQL, lecture, DataFrame, rendu) ainsi que l'état du pool de connexions.
+"""
+
+import streamlit as st
+
+
+def timing_panel(timer, backend):
+    """Case à cocher de la sidebar ; détail des temps si cochée"""
+    timer.finish()
+    if not st.sidebar.checkbox("⏱️ Afficher les temps par panneau", value=False, key="timing_panel"):
+        return
+    summary = timer.summary()
+    with st.sidebar.expander(f"Exécution {timer.run_id}", expanded=True):
+        if timer.first_paint is not None:
+            st.caption(f"Premier panneau affiché en {timer.first_paint:.2f} s")
+        st.caption(f"Page rendue en {timer.elapsed:.2f} s")
+        if summary.empty:
+            st.write("Aucune mesure")
+        else:
+            st.dataframe(
+                summary.style.format({
+                    name: "{:.3f}" for name in ("sql", "fetch", "build", "requete_totale", "render")
+                }),
+                use_container_width=True
+            )
+            st.caption("caches : requêtes servies par le cache mémoire ou disque")
+        metrics = backend.pool_metrics()
+        if metrics:
+            st.caption(
+                f"Pool : {metrics['in_use']}/{metrics['max_size']} connexions utilisées, "
+                f"{metrics['waiting']} en attente, {metrics['timeouts']} délais dépassés"
+            )
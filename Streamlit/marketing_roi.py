@@ -10,7 +10,17 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import snowflake.connector
+from core.approx import distinct_counts_checkbox
+from core.catalog import catalog_query, count_label, dimension_counts
+from core.data import init_backend, query_runner, start_run
+from core.downsample import MAX_POINTS, density_grid
+from core.export import download_export, export_format_radio
+from core.parallel import script_context_initializer, submit_queries
+from core.sections import (
+    is_open, lazy_sections_enabled, progressive_enabled, render_sections, section_tabs
+)
+from core.query import Filters
+from core.timing_panel import timing_panel
 import numpy as np
 
 # Configuration de la page
@@ -26,88 +36,71 @@ st.markdown("**AnyCompany Food & Beverage** - Analyse du retour sur investisseme
 st.markdown("---")
 
 # ============================================================================
-# CONNEXION SNOWFLAKE
+# ACCÈS AUX DONNÉES (BACKEND, POOL ET CACHES COMMUNS À TOUTES LES PAGES)
 # ============================================================================
 
-@st.cache_resource
-def init_connection():
-    """Initialise la connexion à Snowflake"""
-    return snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database="ANYCOMPANY_LAB",
-        schema="SILVER"
-    )
-
-@st.cache_data(ttl=600)
-def run_query(query):
-    """Exécute une requête et retourne un DataFrame"""
-    with init_connection() as conn:
-        return pd.read_sql(query, conn)
+# Mesures de cette exécution du script (temps par panneau et par phase)
+timer = start_run("marketing_roi")
+run_query = query_runner(timer)
 
 # ============================================================================
 # SIDEBAR - FILTRES
 # ============================================================================
 
+timer.panel("Filtres")
 st.sidebar.header("🎯 Filtres")
 
+# Valeurs des filtres : catalogue des dimensions écrit par le pipeline (sql/3e),
+# lu une fois par version au lieu d'un SELECT DISTINCT par filtre
+catalog = run_query(catalog_query(init_backend()))
+
 # Sélection du type de campagne
-campaign_types_query = """
-SELECT DISTINCT campaign_type 
-FROM MARKETING_CAMPAIGNS_CLEAN 
-ORDER BY campaign_type
-"""
-campaign_types_df = run_query(campaign_types_query)
+campaign_types = dimension_counts(catalog, "MARKETING_CAMPAIGNS_CLEAN", "CAMPAIGN_TYPE")
 selected_campaign_type = st.sidebar.selectbox(
     "Type de Campagne",
-    options=["Tous"] + campaign_types_df['CAMPAIGN_TYPE'].tolist()
+    options=["Tous"] + campaign_types.index.tolist(),
+    format_func=count_label(campaign_types, "campagnes")
 )
 
-# Sélection de l'audience cible
-audiences_query = """
-SELECT DISTINCT target_audience 
-FROM MARKETING_CAMPAIGNS_CLEAN 
-ORDER BY target_audience
-"""
-audiences_df = run_query(audiences_query)
+# Sélection de l'audience cible : audiences présentes pour le type choisi
+audiences = dimension_counts(
+    catalog, "MARKETING_CAMPAIGNS_CLEAN", "TARGET_AUDIENCE",
+    CAMPAIGN_TYPE=selected_campaign_type
+)
 selected_audience = st.sidebar.selectbox(
     "Audience Cible",
-    options=["Toutes"] + audiences_df['TARGET_AUDIENCE'].tolist()
+    options=["Toutes"] + audiences.index.tolist(),
+    format_func=count_label(audiences, "campagnes")
 )
 
-# Sélection de région
-regions_query = """
-SELECT DISTINCT region 
-FROM MARKETING_CAMPAIGNS_CLEAN 
-ORDER BY region
-"""
-regions_df = run_query(regions_query)
+# Sélection de région : régions ayant des campagnes du type et de l'audience choisis
+regions = dimension_counts(
+    catalog, "MARKETING_CAMPAIGNS_CLEAN", "REGION",
+    CAMPAIGN_TYPE=selected_campaign_type, TARGET_AUDIENCE=selected_audience
+)
 selected_region = st.sidebar.selectbox(
     "Région",
-    options=["Toutes"] + regions_df['REGION'].tolist()
+    options=["Toutes"] + regions.index.tolist(),
+    format_func=count_label(regions, "campagnes")
 )
 
+# Transactions distinctes derrière les jointures campagne : HyperLogLog par défaut sur Snowflake
+distinct_counts = distinct_counts_checkbox(st.secrets, init_backend().name)
+
 st.sidebar.markdown("---")
 st.sidebar.info("💡 **Astuce**: Analysez le ROI pour optimiser les budgets futurs")
 
 # ============================================================================
-# KPIs MARKETING GLOBAUX
+# REQUÊTES DES PANNEAUX (EXÉCUTÉES EN PARALLÈLE)
 # ============================================================================
 
-st.header("📊 Vue d'Ensemble Marketing")
-
-# Construction de la clause WHERE
-where_clauses = []
-if selected_campaign_type != "Tous":
-    where_clauses.append(f"campaign_type = '{selected_campaign_type}'")
-if selected_audience != "Toutes":
-    where_clauses.append(f"target_audience = '{selected_audience}'")
-if selected_region != "Toutes":
-    where_clauses.append(f"region = '{selected_region}'")
-
-where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
+# Filtres de la sidebar, liés en paramètres nommés (texte SQL stable)
+campaign_filters = (
+    Filters()
+    .equals("campaign_type", selected_campaign_type)
+    .equals("target_audience", selected_audience)
+    .equals("region", selected_region)
+)
 
 kpi_query = f"""
 SELECT 
@@ -116,46 +109,11 @@ SELECT
     SUM(reach) AS total_reach,
     ROUND(AVG(conversion_rate) * 100, 2) AS avg_conversion_rate
 FROM MARKETING_CAMPAIGNS_CLEAN
-WHERE {where_clause}
+{campaign_filters.where()}
 """
 
-kpis = run_query(kpi_query)
-
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    st.metric(
-        label="📢 Campagnes Totales",
-        value=f"{kpis['TOTAL_CAMPAIGNS'].iloc[0]:,.0f}"
-    )
-
-with col2:
-    st.metric(
-        label="💰 Budget Total",
-        value=f"{kpis['TOTAL_BUDGET'].iloc[0]:,.0f} €"
-    )
-
-with col3:
-    st.metric(
-        label="👥 Reach Total",
-        value=f"{kpis['TOTAL_REACH'].iloc[0]:,.0f}"
-    )
-
-with col4:
-    st.metric(
-        label="📈 Taux de Conversion Moyen",
-        value=f"{kpis['AVG_CONVERSION_RATE'].iloc[0]:.2f}%"
-    )
-
-st.markdown("---")
-
-# ============================================================================
-# LIEN ENTRE CAMPAGNES ET VENTES
-# ============================================================================
-
-st.header("🔗 Impact des Campagnes sur les Ventes")
-
-campaign_sales_query = f"""
+# Performance de toutes les campagnes filtrées (Top 20 du panneau, export complet)
+campaign_performance_query = f"""
 WITH campaign_performance AS (
     SELECT 
         mc.campaign_id,
@@ -170,10 +128,11 @@ WITH campaign_performance AS (
         COUNT(DISTINCT ft.transaction_id) AS transactions_during_campaign,
         ROUND(SUM(ft.amount), 2) AS revenue_during_campaign
     FROM MARKETING_CAMPAIGNS_CLEAN mc
+    LEFT JOIN BRIDGE_TRANSACTION_CAMPAIGN b 
+        ON b.campaign_id = mc.campaign_id
     LEFT JOIN FINANCIAL_TRANSACTIONS_CLEAN ft 
-        ON ft.transaction_date BETWEEN mc.start_date AND mc.end_date
-        AND ft.region = mc.region
-    WHERE {where_clause}
+        ON ft.transaction_id = b.transaction_id
+    {campaign_filters.where('mc')}
     GROUP BY mc.campaign_id, mc.campaign_name, mc.campaign_type, mc.region, 
              mc.budget, mc.reach, mc.conversion_rate, mc.start_date, mc.end_date
 )
@@ -191,34 +150,31 @@ SELECT
     ROUND(revenue_during_campaign / NULLIF(reach, 0), 4) AS revenue_per_reach
 FROM campaign_performance
 ORDER BY roi DESC NULLS LAST
-LIMIT 20
 """
 
-campaign_sales_df = run_query(campaign_sales_query)
-
-# Graphique ROI par campagne
-fig_roi = px.bar(
-    campaign_sales_df.head(15),
-    x='CAMPAIGN_NAME',
-    y='ROI',
-    title="Top 15 Campagnes par ROI (Revenu / Budget)",
-    labels={'CAMPAIGN_NAME': 'Campagne', 'ROI': 'ROI (€ revenus par € dépensé)'},
-    color='ROI',
-    color_continuous_scale='RdYlGn',
-    text='ROI'
-)
-
-fig_roi.update_traces(texttemplate='%{text:.2f}x', textposition='outside')
-fig_roi.update_xaxes(tickangle=45)
-fig_roi.update_layout(height=500)
+campaign_sales_query = campaign_performance_query + "LIMIT 20\n"
 
-st.plotly_chart(fig_roi, use_container_width=True)
-
-# ============================================================================
-# PERFORMANCE PAR TYPE DE CAMPAGNE
-# ============================================================================
-
-st.header("📊 Performance par Type de Campagne")
+# Transactions des fenêtres de campagne (export complet, lu par lots)
+campaign_transactions_query = f"""
+SELECT 
+    mc.campaign_id,
+    mc.campaign_name,
+    mc.campaign_type,
+    mc.target_audience,
+    mc.region,
+    ft.transaction_id,
+    ft.transaction_date,
+    ft.transaction_type,
+    ft.amount,
+    ft.payment_method,
+    ft.entity
+FROM MARKETING_CAMPAIGNS_CLEAN mc
+INNER JOIN BRIDGE_TRANSACTION_CAMPAIGN b 
+    ON b.campaign_id = mc.campaign_id
+INNER JOIN FINANCIAL_TRANSACTIONS_CLEAN ft 
+    ON ft.transaction_id = b.transaction_id
+{campaign_filters.where('mc')}
+"""
 
 campaign_type_query = f"""
 SELECT 
@@ -229,49 +185,11 @@ SELECT
     ROUND(AVG(reach), 0) AS avg_reach,
     ROUND(AVG(budget), 2) AS avg_budget
 FROM MARKETING_CAMPAIGNS_CLEAN
-WHERE {where_clause}
+{campaign_filters.where()}
 GROUP BY campaign_type
 ORDER BY total_budget DESC
 """
 
-campaign_type_df = run_query(campaign_type_query)
-
-col1, col2 = st.columns(2)
-
-with col1:
-    # Budget par type
-    fig_budget = px.pie(
-        campaign_type_df,
-        values='TOTAL_BUDGET',
-        names='CAMPAIGN_TYPE',
-        title="Répartition du Budget par Type de Campagne",
-        hole=0.4
-    )
-    fig_budget.update_traces(textposition='inside', textinfo='percent+label')
-    st.plotly_chart(fig_budget, use_container_width=True)
-
-with col2:
-    # Conversion par type
-    fig_conversion = px.bar(
-        campaign_type_df,
-        x='CAMPAIGN_TYPE',
-        y='AVG_CONVERSION_RATE',
-        title="Taux de Conversion Moyen par Type",
-        labels={'CAMPAIGN_TYPE': 'Type de Campagne', 'AVG_CONVERSION_RATE': 'Conversion (%)'},
-        color='AVG_CONVERSION_RATE',
-        color_continuous_scale='Viridis',
-        text='AVG_CONVERSION_RATE'
-    )
-    fig_conversion.update_traces(texttemplate='%{text:.2f}%', textposition='outside')
-    fig_conversion.update_xaxes(tickangle=45)
-    st.plotly_chart(fig_conversion, use_container_width=True)
-
-# ============================================================================
-# REACH VS CONVERSION
-# ============================================================================
-
-st.header("🎯 Reach vs Conversion Rate")
-
 reach_conversion_query = f"""
 SELECT 
     campaign_name,
@@ -281,37 +199,10 @@ SELECT
     budget,
     region
 FROM MARKETING_CAMPAIGNS_CLEAN
-WHERE {where_clause}
+{campaign_filters.where()}
 ORDER BY reach DESC
-LIMIT 50
 """
 
-reach_conversion_df = run_query(reach_conversion_query)
-
-fig_scatter = px.scatter(
-    reach_conversion_df,
-    x='REACH',
-    y='CONVERSION_RATE_PCT',
-    size='BUDGET',
-    color='CAMPAIGN_TYPE',
-    hover_name='CAMPAIGN_NAME',
-    title="Reach vs Taux de Conversion (taille = budget)",
-    labels={
-        'REACH': 'Reach (nombre de personnes)',
-        'CONVERSION_RATE_PCT': 'Taux de Conversion (%)',
-        'CAMPAIGN_TYPE': 'Type de Campagne'
-    }
-)
-
-fig_scatter.update_layout(height=500)
-st.plotly_chart(fig_scatter, use_container_width=True)
-
-# ============================================================================
-# PERFORMANCE PAR AUDIENCE CIBLE
-# ============================================================================
-
-st.header("👥 Performance par Audience Cible")
-
 audience_query = f"""
 SELECT 
     target_audience,
@@ -320,51 +211,11 @@ SELECT
     ROUND(SUM(budget), 2) AS total_budget,
     SUM(reach) AS total_reach
 FROM MARKETING_CAMPAIGNS_CLEAN
-WHERE {where_clause}
+{campaign_filters.where()}
 GROUP BY target_audience
 ORDER BY avg_conversion_rate DESC
 """
 
-audience_df = run_query(audience_query)
-
-col1, col2 = st.columns(2)
-
-with col1:
-    fig_audience_conv = px.bar(
-        audience_df,
-        x='TARGET_AUDIENCE',
-        y='AVG_CONVERSION_RATE',
-        title="Taux de Conversion par Audience",
-        labels={'TARGET_AUDIENCE': 'Audience', 'AVG_CONVERSION_RATE': 'Conversion (%)'},
-        color='AVG_CONVERSION_RATE',
-        color_continuous_scale='Blues',
-        text='AVG_CONVERSION_RATE'
-    )
-    fig_audience_conv.update_traces(texttemplate='%{text:.2f}%', textposition='outside')
-    fig_audience_conv.update_xaxes(tickangle=45)
-    st.plotly_chart(fig_audience_conv, use_container_width=True)
-
-with col2:
-    fig_audience_budget = px.bar(
-        audience_df,
-        x='TARGET_AUDIENCE',
-        y='TOTAL_BUDGET',
-        title="Budget Total par Audience",
-        labels={'TARGET_AUDIENCE': 'Audience', 'TOTAL_BUDGET': 'Budget (€)'},
-        color='CAMPAIGN_COUNT',
-        color_continuous_scale='Oranges',
-        text='TOTAL_BUDGET'
-    )
-    fig_audience_budget.update_traces(texttemplate='%{text:,.0f}€', textposition='outside')
-    fig_audience_budget.update_xaxes(tickangle=45)
-    st.plotly_chart(fig_audience_budget, use_container_width=True)
-
-# ============================================================================
-# PERFORMANCE PAR RÉGION
-# ============================================================================
-
-st.header("🌍 Performance par Région")
-
 region_performance_query = f"""
 SELECT 
     mc.region,
@@ -375,43 +226,15 @@ SELECT
     COUNT(DISTINCT ft.transaction_id) AS total_transactions,
     ROUND(SUM(ft.amount), 2) AS total_revenue
 FROM MARKETING_CAMPAIGNS_CLEAN mc
+LEFT JOIN BRIDGE_TRANSACTION_CAMPAIGN b 
+    ON b.campaign_id = mc.campaign_id
 LEFT JOIN FINANCIAL_TRANSACTIONS_CLEAN ft 
-    ON ft.transaction_date BETWEEN mc.start_date AND mc.end_date
-    AND ft.region = mc.region
-WHERE {where_clause}
+    ON ft.transaction_id = b.transaction_id
+{campaign_filters.where('mc')}
 GROUP BY mc.region
 ORDER BY total_revenue DESC
 """
 
-region_perf_df = run_query(region_performance_query)
-
-# Calcul du ROI régional
-region_perf_df['ROI'] = region_perf_df['TOTAL_REVENUE'] / region_perf_df['TOTAL_BUDGET']
-
-fig_region = px.bar(
-    region_perf_df,
-    x='REGION',
-    y='ROI',
-    title="ROI Marketing par Région",
-    labels={'REGION': 'Région', 'ROI': 'ROI (€ revenus / € budget)'},
-    color='ROI',
-    color_continuous_scale='RdYlGn',
-    text='ROI',
-    hover_data=['TOTAL_BUDGET', 'TOTAL_REVENUE', 'CAMPAIGN_COUNT']
-)
-
-fig_region.update_traces(texttemplate='%{text:.2f}x', textposition='outside')
-fig_region.update_xaxes(tickangle=45)
-fig_region.update_layout(height=500)
-
-st.plotly_chart(fig_region, use_container_width=True)
-
-# ============================================================================
-# TOP CAMPAGNES
-# ============================================================================
-
-st.header("🏆 Top 10 Campagnes les Plus Performantes")
-
 top_campaigns_query = f"""
 WITH campaign_performance AS (
     SELECT 
@@ -424,10 +247,11 @@ WITH campaign_performance AS (
         COUNT(DISTINCT ft.transaction_id) AS transactions,
         ROUND(SUM(ft.amount), 2) AS revenue
     FROM MARKETING_CAMPAIGNS_CLEAN mc
+    LEFT JOIN BRIDGE_TRANSACTION_CAMPAIGN b 
+        ON b.campaign_id = mc.campaign_id
     LEFT JOIN FINANCIAL_TRANSACTIONS_CLEAN ft 
-        ON ft.transaction_date BETWEEN mc.start_date AND mc.end_date
-        AND ft.region = mc.region
-    WHERE {where_clause}
+        ON ft.transaction_id = b.transaction_id
+    {campaign_filters.where('mc')}
     GROUP BY mc.campaign_id, mc.campaign_name, mc.campaign_type, 
              mc.budget, mc.reach, mc.conversion_rate
 )
@@ -445,25 +269,6 @@ ORDER BY roi DESC NULLS LAST
 LIMIT 10
 """
 
-top_campaigns_df = run_query(top_campaigns_query)
-
-st.dataframe(
-    top_campaigns_df.style.format({
-        'BUDGET': '{:,.2f}€',
-        'REACH': '{:,.0f}',
-        'CONVERSION_RATE_PCT': '{:.2f}%',
-        'REVENUE': '{:,.2f}€',
-        'ROI': '{:.2f}x'
-    }),
-    use_container_width=True
-)
-
-# ============================================================================
-# ANALYSE TEMPORELLE
-# ============================================================================
-
-st.header("📅 Évolution Temporelle des Campagnes")
-
 temporal_query = f"""
 SELECT 
     DATE_TRUNC('month', start_date) AS month,
@@ -471,93 +276,438 @@ SELECT
     ROUND(SUM(budget), 2) AS monthly_budget,
     ROUND(AVG(conversion_rate) * 100, 2) AS avg_conversion_rate
 FROM MARKETING_CAMPAIGNS_CLEAN
-WHERE {where_clause}
+{campaign_filters.where()}
 GROUP BY month
 ORDER BY month
 """
 
-temporal_df = run_query(temporal_query)
+# COUNT(DISTINCT ft.transaction_id) sur les jointures campagne : approché
+# (APPROX_COUNT_DISTINCT) sauf si les comptages exacts sont demandés
+campaign_sales_query = distinct_counts.query(campaign_sales_query, ["ft.transaction_id"])
+region_performance_query = distinct_counts.query(region_performance_query, ["ft.transaction_id"])
+top_campaigns_query = distinct_counts.query(top_campaigns_query, ["ft.transaction_id"])
+
+panel_queries = {
+    "kpis": (kpi_query, campaign_filters.params, "Vue d'Ensemble Marketing"),
+    "campaign_sales": (campaign_sales_query, campaign_filters.params, "Impact des Campagnes sur les Ventes"),
+    "campaign_type": (campaign_type_query, campaign_filters.params, "Performance par Type de Campagne"),
+    "reach_conversion": (reach_conversion_query, campaign_filters.params, "Reach vs Conversion Rate"),
+    "audience": (audience_query, campaign_filters.params, "Performance par Audience Cible"),
+    "region_performance": (region_performance_query, campaign_filters.params, "Performance par Région"),
+    "top_campaigns": (top_campaigns_query, campaign_filters.params, "Top 10 Campagnes les Plus Performantes"),
+    "temporal": (temporal_query, campaign_filters.params, "Évolution Temporelle des Campagnes"),
+}
+
+# Onglet -> requêtes dont ses sections ont besoin
+section_queries = {
+    "🔗 Impact sur les Ventes": ["campaign_sales"],
+    "📊 Types": ["campaign_type"],
+    "🎯 Reach / Conversion": ["reach_conversion"],
+    "👥 Audiences": ["audience"],
+    "🌍 Régions": ["region_performance"],
+    "🏆 Top 10": ["top_campaigns"],
+    "📅 Temporel": ["temporal"],
+    "💡 Recommandations": ["campaign_type", "audience", "campaign_sales"],
+    "📥 Export": [],
+}
+
+# Les KPIs s'affichent au-dessus des onglets, créés dès maintenant pour
+# savoir lequel est ouvert : seules ses requêtes partent (avec les KPIs)
+kpi_area = st.container()
+tabs = dict(zip(section_queries, section_tabs(
+    list(section_queries), lazy=lazy_sections_enabled(st.secrets))))
+
+needed = ["kpis"] + [
+    name
+    for label, names in section_queries.items() if is_open(tabs[label])
+    for name in names
+]
+
+# Les requêtes retenues partent ensemble ; chaque section attend son résultat
+panel_results = submit_queries(
+    run_query, {name: panel_queries[name] for name in dict.fromkeys(needed)},
+    initializer=script_context_initializer())
 
-fig_temporal = make_subplots(specs=[[{"secondary_y": True}]])
+# ============================================================================
+# KPIs MARKETING GLOBAUX
+# ============================================================================
 
-fig_temporal.add_trace(
-    go.Bar(
-        x=temporal_df['MONTH'],
-        y=temporal_df['MONTHLY_BUDGET'],
-        name="Budget Mensuel",
-        marker_color='#3498db'
-    ),
-    secondary_y=False,
-)
+def kpi_section():
+    timer.panel("Vue d'Ensemble Marketing")
+    st.header("📊 Vue d'Ensemble Marketing")
 
-fig_temporal.add_trace(
-    go.Scatter(
-        x=temporal_df['MONTH'],
-        y=temporal_df['AVG_CONVERSION_RATE'],
-        name="Taux de Conversion",
-        mode='lines+markers',
-        marker=dict(size=10, color='#e74c3c'),
-        line=dict(width=3)
-    ),
-    secondary_y=True,
-)
+    kpis = timer.wait(panel_results["kpis"])
 
-fig_temporal.update_xaxes(title_text="Mois")
-fig_temporal.update_yaxes(title_text="<b>Budget (€)</b>", secondary_y=False)
-fig_temporal.update_yaxes(title_text="<b>Taux de Conversion (%)</b>", secondary_y=True)
-fig_temporal.update_layout(
-    title="Évolution du Budget et de la Conversion dans le Temps",
-    hovermode="x unified",
-    height=500
-)
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric(
+            label="📢 Campagnes Totales",
+            value=f"{kpis['TOTAL_CAMPAIGNS'].iloc[0]:,.0f}"
+        )
+
+    with col2:
+        st.metric(
+            label="💰 Budget Total",
+            value=f"{kpis['TOTAL_BUDGET'].iloc[0]:,.0f} €"
+        )
+
+    with col3:
+        st.metric(
+            label="👥 Reach Total",
+            value=f"{kpis['TOTAL_REACH'].iloc[0]:,.0f}"
+        )
+
+    with col4:
+        st.metric(
+            label="📈 Taux de Conversion Moyen",
+            value=f"{kpis['AVG_CONVERSION_RATE'].iloc[0]:.2f}%"
+        )
 
-st.plotly_chart(fig_temporal, use_container_width=True)
+    st.markdown("---")
 
 # ============================================================================
-# RECOMMANDATIONS STRATÉGIQUES
+# LIEN ENTRE CAMPAGNES ET VENTES
 # ============================================================================
 
-st.header("💡 Recommandations Stratégiques")
+def campaign_sales_section():
+    timer.panel("Impact des Campagnes sur les Ventes")
+    st.header("🔗 Impact des Campagnes sur les Ventes")
+
+    campaign_sales_df = timer.wait(panel_results["campaign_sales"])
+
+    # Graphique ROI par campagne
+    fig_roi = px.bar(
+        campaign_sales_df.head(15),
+        x='CAMPAIGN_NAME',
+        y='ROI',
+        title="Top 15 Campagnes par ROI (Revenu / Budget)",
+        labels={'CAMPAIGN_NAME': 'Campagne', 'ROI': 'ROI (€ revenus par € dépensé)'},
+        color='ROI',
+        color_continuous_scale='RdYlGn',
+        text='ROI'
+    )
 
-col1, col2, col3 = st.columns(3)
+    fig_roi.update_traces(texttemplate='%{text:.2f}x', textposition='outside')
+    fig_roi.update_xaxes(tickangle=45)
+    fig_roi.update_layout(height=500)
 
-with col1:
-    st.success("**✅ Types de Campagnes Efficaces**")
-    top_types = campaign_type_df.nlargest(3, 'AVG_CONVERSION_RATE')
-    for idx, row in top_types.iterrows():
-        st.write(f"• **{row['CAMPAIGN_TYPE']}** : {row['AVG_CONVERSION_RATE']:.2f}% conversion")
+    st.plotly_chart(fig_roi, use_container_width=True)
 
-with col2:
-    st.info("**🎯 Audiences les Plus Réceptives**")
-    top_audiences = audience_df.nlargest(3, 'AVG_CONVERSION_RATE')
-    for idx, row in top_audiences.iterrows():
-        st.write(f"• **{row['TARGET_AUDIENCE']}** : {row['AVG_CONVERSION_RATE']:.2f}% conversion")
+# ============================================================================
+# PERFORMANCE PAR TYPE DE CAMPAGNE
+# ============================================================================
 
-with col3:
-    st.warning("**💰 Optimisation Budget**")
-    # Identifier les campagnes à faible ROI
-    low_roi = campaign_sales_df.nsmallest(3, 'ROI')
-    if len(low_roi) > 0:
-        st.write("**Types à optimiser :**")
-        for idx, row in low_roi.iterrows():
-            if pd.notna(row['ROI']):
-                st.write(f"• {row['CAMPAIGN_TYPE']}: ROI {row['ROI']:.2f}x")
+def campaign_type_section():
+    timer.panel("Performance par Type de Campagne")
+    st.header("📊 Performance par Type de Campagne")
+
+    campaign_type_df = timer.wait(panel_results["campaign_type"])
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Budget par type
+        fig_budget = px.pie(
+            campaign_type_df,
+            values='TOTAL_BUDGET',
+            names='CAMPAIGN_TYPE',
+            title="Répartition du Budget par Type de Campagne",
+            hole=0.4
+        )
+        fig_budget.update_traces(textposition='inside', textinfo='percent+label')
+        st.plotly_chart(fig_budget, use_container_width=True)
+
+    with col2:
+        # Conversion par type
+        fig_conversion = px.bar(
+            campaign_type_df,
+            x='CAMPAIGN_TYPE',
+            y='AVG_CONVERSION_RATE',
+            title="Taux de Conversion Moyen par Type",
+            labels={'CAMPAIGN_TYPE': 'Type de Campagne', 'AVG_CONVERSION_RATE': 'Conversion (%)'},
+            color='AVG_CONVERSION_RATE',
+            color_continuous_scale='Viridis',
+            text='AVG_CONVERSION_RATE'
+        )
+        fig_conversion.update_traces(texttemplate='%{text:.2f}%', textposition='outside')
+        fig_conversion.update_xaxes(tickangle=45)
+        st.plotly_chart(fig_conversion, use_container_width=True)
 
 # ============================================================================
-# EXPORT DE DONNÉES
+# REACH VS CONVERSION
+# ============================================================================
+
+def reach_conversion_section():
+    timer.panel("Reach vs Conversion Rate")
+    st.header("🎯 Reach vs Conversion Rate")
+
+    reach_conversion_df = timer.wait(panel_results["reach_conversion"])
+
+    if len(reach_conversion_df) <= MAX_POINTS:
+        # Toutes les campagnes, rendu WebGL
+        fig_scatter = px.scatter(
+            reach_conversion_df,
+            x='REACH',
+            y='CONVERSION_RATE_PCT',
+            size='BUDGET',
+            color='CAMPAIGN_TYPE',
+            hover_name='CAMPAIGN_NAME',
+            title="Reach vs Taux de Conversion (taille = budget)",
+            labels={
+                'REACH': 'Reach (nombre de personnes)',
+                'CONVERSION_RATE_PCT': 'Taux de Conversion (%)',
+                'CAMPAIGN_TYPE': 'Type de Campagne'
+            },
+            render_mode='webgl'
+        )
+    else:
+        # Trop de campagnes pour un point chacune : densité calculée côté serveur
+        density_df = density_grid(reach_conversion_df, 'REACH', 'CONVERSION_RATE_PCT')
+        fig_scatter = go.Figure(go.Scattergl(
+            x=density_df['REACH'],
+            y=density_df['CONVERSION_RATE_PCT'],
+            mode='markers',
+            marker=dict(
+                size=8,
+                symbol='square',
+                color=density_df['COUNT'],
+                colorscale='Viridis',
+                colorbar=dict(title="Campagnes")
+            ),
+            hovertemplate="Reach ≈ %{x:,.0f}<br>Conversion ≈ %{y:.2f}%<br>%{marker.color} campagnes<extra></extra>"
+        ))
+        fig_scatter.update_layout(
+            title=f"Reach vs Taux de Conversion ({len(reach_conversion_df):,} campagnes, densité)",
+            xaxis_title='Reach (nombre de personnes)',
+            yaxis_title='Taux de Conversion (%)'
+        )
+
+    fig_scatter.update_layout(height=500)
+    st.plotly_chart(fig_scatter, use_container_width=True)
+
+# ============================================================================
+# PERFORMANCE PAR AUDIENCE CIBLE
+# ============================================================================
+
+def audience_section():
+    timer.panel("Performance par Audience Cible")
+    st.header("👥 Performance par Audience Cible")
+
+    audience_df = timer.wait(panel_results["audience"])
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig_audience_conv = px.bar(
+            audience_df,
+            x='TARGET_AUDIENCE',
+            y='AVG_CONVERSION_RATE',
+            title="Taux de Conversion par Audience",
+            labels={'TARGET_AUDIENCE': 'Audience', 'AVG_CONVERSION_RATE': 'Conversion (%)'},
+            color='AVG_CONVERSION_RATE',
+            color_continuous_scale='Blues',
+            text='AVG_CONVERSION_RATE'
+        )
+        fig_audience_conv.update_traces(texttemplate='%{text:.2f}%', textposition='outside')
+        fig_audience_conv.update_xaxes(tickangle=45)
+        st.plotly_chart(fig_audience_conv, use_container_width=True)
+
+    with col2:
+        fig_audience_budget = px.bar(
+            audience_df,
+            x='TARGET_AUDIENCE',
+            y='TOTAL_BUDGET',
+            title="Budget Total par Audience",
+            labels={'TARGET_AUDIENCE': 'Audience', 'TOTAL_BUDGET': 'Budget (€)'},
+            color='CAMPAIGN_COUNT',
+            color_continuous_scale='Oranges',
+            text='TOTAL_BUDGET'
+        )
+        fig_audience_budget.update_traces(texttemplate='%{text:,.0f}€', textposition='outside')
+        fig_audience_budget.update_xaxes(tickangle=45)
+        st.plotly_chart(fig_audience_budget, use_container_width=True)
+
+# ============================================================================
+# PERFORMANCE PAR RÉGION
+# ============================================================================
+
+def region_section():
+    timer.panel("Performance par Région")
+    st.header("🌍 Performance par Région")
+
+    region_perf_df = timer.wait(panel_results["region_performance"])
+
+    # Calcul du ROI régional
+    region_perf_df['ROI'] = region_perf_df['TOTAL_REVENUE'] / region_perf_df['TOTAL_BUDGET']
+
+    fig_region = px.bar(
+        region_perf_df,
+        x='REGION',
+        y='ROI',
+        title="ROI Marketing par Région",
+        labels={'REGION': 'Région', 'ROI': 'ROI (€ revenus / € budget)'},
+        color='ROI',
+        color_continuous_scale='RdYlGn',
+        text='ROI',
+        hover_data=['TOTAL_BUDGET', 'TOTAL_REVENUE', 'CAMPAIGN_COUNT']
+    )
+
+    fig_region.update_traces(texttemplate='%{text:.2f}x', textposition='outside')
+    fig_region.update_xaxes(tickangle=45)
+    fig_region.update_layout(height=500)
+
+    st.plotly_chart(fig_region, use_container_width=True)
+
+# ============================================================================
+# TOP CAMPAGNES
 # ============================================================================
 
-st.header("📥 Export de Données")
+def top_campaigns_section():
+    timer.panel("Top 10 Campagnes les Plus Performantes")
+    st.header("🏆 Top 10 Campagnes les Plus Performantes")
+
+    top_campaigns_df = timer.wait(panel_results["top_campaigns"])
+
+    st.dataframe(
+        top_campaigns_df.style.format({
+            'BUDGET': '{:,.2f}€',
+            'REACH': '{:,.0f}',
+            'CONVERSION_RATE_PCT': '{:.2f}%',
+            'REVENUE': '{:,.2f}€',
+            'ROI': '{:.2f}x'
+        }),
+        use_container_width=True
+    )
+    distinct_counts.caption("Les nombres de transactions")
+
+# ============================================================================
+# ANALYSE TEMPORELLE
+# ============================================================================
+
+def temporal_section():
+    timer.panel("Évolution Temporelle des Campagnes")
+    st.header("📅 Évolution Temporelle des Campagnes")
+
+    temporal_df = timer.wait(panel_results["temporal"])
+
+    fig_temporal = make_subplots(specs=[[{"secondary_y": True}]])
+
+    fig_temporal.add_trace(
+        go.Bar(
+            x=temporal_df['MONTH'],
+            y=temporal_df['MONTHLY_BUDGET'],
+            name="Budget Mensuel",
+            marker_color='#3498db'
+        ),
+        secondary_y=False,
+    )
+
+    fig_temporal.add_trace(
+        go.Scatter(
+            x=temporal_df['MONTH'],
+            y=temporal_df['AVG_CONVERSION_RATE'],
+            name="Taux de Conversion",
+            mode='lines+markers',
+            marker=dict(size=10, color='#e74c3c'),
+            line=dict(width=3)
+        ),
+        secondary_y=True,
+    )
 
-with st.expander("Télécharger les données complètes"):
-    csv = campaign_sales_df.to_csv(index=False)
-    st.download_button(
-        label="📄 Télécharger CSV (Top Campagnes)",
-        data=csv,
-        file_name="marketing_campaigns_performance.csv",
-        mime="text/csv"
+    fig_temporal.update_xaxes(title_text="Mois")
+    fig_temporal.update_yaxes(title_text="<b>Budget (€)</b>", secondary_y=False)
+    fig_temporal.update_yaxes(title_text="<b>Taux de Conversion (%)</b>", secondary_y=True)
+    fig_temporal.update_layout(
+        title="Évolution du Budget et de la Conversion dans le Temps",
+        hovermode="x unified",
+        height=500
     )
 
+    st.plotly_chart(fig_temporal, use_container_width=True)
+
+# ============================================================================
+# RECOMMANDATIONS STRATÉGIQUES
+# ============================================================================
+
+def recommendations_section():
+    timer.panel("Recommandations Stratégiques")
+    st.header("💡 Recommandations Stratégiques")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.success("**✅ Types de Campagnes Efficaces**")
+        top_types = timer.wait(panel_results["campaign_type"]).nlargest(3, 'AVG_CONVERSION_RATE')
+        for idx, row in top_types.iterrows():
+            st.write(f"• **{row['CAMPAIGN_TYPE']}** : {row['AVG_CONVERSION_RATE']:.2f}% conversion")
+
+    with col2:
+        st.info("**🎯 Audiences les Plus Réceptives**")
+        top_audiences = timer.wait(panel_results["audience"]).nlargest(3, 'AVG_CONVERSION_RATE')
+        for idx, row in top_audiences.iterrows():
+            st.write(f"• **{row['TARGET_AUDIENCE']}** : {row['AVG_CONVERSION_RATE']:.2f}% conversion")
+
+    with col3:
+        st.warning("**💰 Optimisation Budget**")
+        # Identifier les campagnes à faible ROI
+        low_roi = timer.wait(panel_results["campaign_sales"]).nsmallest(3, 'ROI')
+        if len(low_roi) > 0:
+            st.write("**Types à optimiser :**")
+            for idx, row in low_roi.iterrows():
+                if pd.notna(row['ROI']):
+                    st.write(f"• {row['CAMPAIGN_TYPE']}: ROI {row['ROI']:.2f}x")
+
+# ============================================================================
+# EXPORT DE DONNÉES
+# ============================================================================
+
+def export_section():
+    timer.panel("Export de Données")
+    st.header("📥 Export de Données")
+
+    with st.expander("Télécharger les données complètes"):
+        # Fichiers générés au clic, lot par lot, avec les filtres de la sidebar
+        export_format = export_format_radio()
+        col1, col2 = st.columns(2)
+        with col1:
+            download_export(
+                "📄 Performance de toutes les campagnes",
+                init_backend(), campaign_performance_query, campaign_filters.params,
+                export_format, "marketing_campaigns_performance"
+            )
+        with col2:
+            download_export(
+                "🧾 Transactions des fenêtres de campagne",
+                init_backend(), campaign_transactions_query, campaign_filters.params,
+                export_format, "marketing_campaign_transactions"
+            )
+        st.caption("Jeux complets (comptages exacts), filtrés comme la page ; "
+                   "le fichier est préparé au clic, ce qui peut prendre quelques secondes.")
+
+# ============================================================================
+# RENDU PROGRESSIF (KPIs, PUIS LA SECTION OUVERTE)
+# ============================================================================
+
+sections = [
+    campaign_sales_section,
+    campaign_type_section,
+    reach_conversion_section,
+    audience_section,
+    region_section,
+    top_campaigns_section,
+    temporal_section,
+    recommendations_section,
+    export_section,
+]
+
+# KPIs puis sections ouvertes, chacune dès que ses requêtes sont terminées
+slots = [(kpi_area, kpi_section, [panel_results["kpis"]])] + [
+    (tabs[label], section, [panel_results[name] for name in section_queries[label]])
+    for label, section in zip(section_queries, sections) if is_open(tabs[label])
+]
+render_sections(timer, slots, progressive=progressive_enabled(st.secrets))
+
 # ============================================================================
 # FOOTER
 # ============================================================================
@@ -568,3 +718,9 @@ st.markdown("""
     <p style='color: gray;'>Marketing ROI Dashboard | AnyCompany Marketing Analytics</p>
 </div>
 """, unsafe_allow_html=True)
+
+# ============================================================================
+# TEMPS D'EXÉCUTION (SIDEBAR, OPTIONNEL)
+# ============================================================================
+
+timing_panel(timer, init_backend())
@@ -10,7 +10,15 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import snowflake.connector
+from core.approx import distinct_counts_checkbox
+from core.catalog import catalog_query, count_label, dimension_counts
+from core.data import init_backend, query_runner, start_run
+from core.parallel import script_context_initializer, submit_queries
+from core.query import Filters
+from core.sections import (
+    is_open, lazy_sections_enabled, progressive_enabled, render_sections, section_tabs
+)
+from core.timing_panel import timing_panel
 
 # Configuration de la page
 st.set_page_config(
@@ -25,69 +33,61 @@ st.markdown("**AnyCompany Food & Beverage** - Analyse de l'efficacité des promo
 st.markdown("---")
 
 # ============================================================================
-# CONNEXION SNOWFLAKE
+# ACCÈS AUX DONNÉES (BACKEND, POOL ET CACHES COMMUNS À TOUTES LES PAGES)
 # ============================================================================
 
-@st.cache_resource
-def init_connection():
-    """Initialise la connexion à Snowflake"""
-    return snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database="ANYCOMPANY_LAB",
-        schema="SILVER"
-    )
-
-@st.cache_data(ttl=600)
-def run_query(query):
-    """Exécute une requête et retourne un DataFrame"""
-    with init_connection() as conn:
-        return pd.read_sql(query, conn)
+# Mesures de cette exécution du script (temps par panneau et par phase)
+timer = start_run("promotion_analysis")
+run_query = query_runner(timer)
 
 # ============================================================================
 # SIDEBAR - FILTRES
 # ============================================================================
 
+timer.panel("Filtres")
 st.sidebar.header("🎯 Filtres")
 
+# Valeurs des filtres : catalogue des dimensions écrit par le pipeline (sql/3e),
+# lu une fois par version au lieu d'un SELECT DISTINCT par filtre
+catalog = run_query(catalog_query(init_backend()))
+
 # Sélection de catégorie
-categories_query = """
-SELECT DISTINCT product_category 
-FROM PROMOTIONS_CLEAN 
-ORDER BY product_category
-"""
-categories_df = run_query(categories_query)
+categories = dimension_counts(catalog, "PROMOTIONS_CLEAN", "PRODUCT_CATEGORY")
 selected_category = st.sidebar.selectbox(
     "Catégorie de Produit",
-    options=["Toutes"] + categories_df['PRODUCT_CATEGORY'].tolist()
+    options=["Toutes"] + categories.index.tolist(),
+    format_func=count_label(categories, "promotions")
 )
 
-# Sélection de région
-regions_query = """
-SELECT DISTINCT region 
-FROM PROMOTIONS_CLEAN 
-ORDER BY region
-"""
-regions_df = run_query(regions_query)
+# Sélection de région : seules les régions ayant des promotions dans la catégorie choisie
+regions = dimension_counts(
+    catalog, "PROMOTIONS_CLEAN", "REGION", PRODUCT_CATEGORY=selected_category
+)
 selected_region = st.sidebar.selectbox(
     "Région",
-    options=["Toutes"] + regions_df['REGION'].tolist()
+    options=["Toutes"] + regions.index.tolist(),
+    format_func=count_label(regions, "promotions")
 )
 
+# Transactions distinctes derrière les jointures promotion : HyperLogLog par défaut sur Snowflake
+distinct_counts = distinct_counts_checkbox(st.secrets, init_backend().name)
+
 st.sidebar.markdown("---")
 st.sidebar.info("💡 **Astuce**: Comparez les ventes avec et sans promotion")
 
+# Filtres de la sidebar, liés en paramètres nommés (texte SQL stable)
+category_filter = Filters().equals("product_category", selected_category)
+region_filter = Filters().equals("region", selected_region)
+promo_filters = (
+    Filters()
+    .equals("product_category", selected_category)
+    .equals("region", selected_region)
+)
+
 # ============================================================================
-# KPIs PROMOTIONS
+# REQUÊTES DES PANNEAUX (EXÉCUTÉES EN PARALLÈLE)
 # ============================================================================
 
-st.header("📊 Vue d'Ensemble des Promotions")
-
-col1, col2, col3, col4 = st.columns(4)
-
-# KPIs Promotions
 promo_kpi_query = """
 SELECT 
     COUNT(DISTINCT promotion_id) AS total_promos,
@@ -98,44 +98,7 @@ FROM PROMOTIONS_CLEAN
 WHERE 1=1
 """
 
-if selected_category != "Toutes":
-    promo_kpi_query += f" AND product_category = '{selected_category}'"
-if selected_region != "Toutes":
-    promo_kpi_query += f" AND region = '{selected_region}'"
-
-promo_kpis = run_query(promo_kpi_query)
-
-with col1:
-    st.metric(
-        label="🎁 Promotions Totales",
-        value=f"{promo_kpis['TOTAL_PROMOS'].iloc[0]:,.0f}"
-    )
-
-with col2:
-    st.metric(
-        label="💸 Réduction Moyenne",
-        value=f"{promo_kpis['AVG_DISCOUNT'].iloc[0]:.1f}%"
-    )
-
-with col3:
-    st.metric(
-        label="📦 Catégories Concernées",
-        value=f"{promo_kpis['CATEGORIES_WITH_PROMOS'].iloc[0]:,.0f}"
-    )
-
-with col4:
-    st.metric(
-        label="🌍 Régions Actives",
-        value=f"{promo_kpis['REGIONS_WITH_PROMOS'].iloc[0]:,.0f}"
-    )
-
-st.markdown("---")
-
-# ============================================================================
-# COMPARAISON AVEC / SANS PROMOTION
-# ============================================================================
-
-st.header("🔍 Impact des Promotions sur les Ventes")
+promo_kpi_query += promo_filters.and_()
 
 comparison_query = """
 WITH sales_with_promo_flag AS (
@@ -151,13 +114,14 @@ WITH sales_with_promo_flag AS (
         p.product_category,
         p.discount_percentage
     FROM FINANCIAL_TRANSACTIONS_CLEAN ft
+    LEFT JOIN BRIDGE_TRANSACTION_PROMOTION b 
+        ON b.transaction_id = ft.transaction_id
     LEFT JOIN PROMOTIONS_CLEAN p 
-        ON ft.transaction_date BETWEEN p.start_date AND p.end_date
-        AND ft.region = p.region
+        ON p.promotion_id = b.promotion_id
 """
 
-if selected_category != "Toutes":
-    comparison_query += f" WHERE p.product_category = '{selected_category}' OR p.product_category IS NULL"
+if category_filter:
+    comparison_query += " WHERE p.product_category = :product_category OR p.product_category IS NULL"
 
 comparison_query += """
 )
@@ -173,59 +137,6 @@ GROUP BY promo_status
 ORDER BY total_revenue DESC
 """
 
-comparison_df = run_query(comparison_query)
-
-col1, col2 = st.columns(2)
-
-with col1:
-    fig_revenue = px.bar(
-        comparison_df,
-        x='PROMO_STATUS',
-        y='TOTAL_REVENUE',
-        title="Revenu Total : Avec vs Sans Promotion",
-        labels={'PROMO_STATUS': 'Statut', 'TOTAL_REVENUE': 'Revenu (€)'},
-        color='PROMO_STATUS',
-        color_discrete_map={
-            'Avec promotion': '#2ecc71',
-            'Sans promotion': '#e74c3c'
-        },
-        text='TOTAL_REVENUE'
-    )
-    fig_revenue.update_traces(texttemplate='%{text:,.0f}€', textposition='outside')
-    st.plotly_chart(fig_revenue, use_container_width=True)
-
-with col2:
-    fig_avg = px.bar(
-        comparison_df,
-        x='PROMO_STATUS',
-        y='AVG_TRANSACTION_VALUE',
-        title="Panier Moyen : Avec vs Sans Promotion",
-        labels={'PROMO_STATUS': 'Statut', 'AVG_TRANSACTION_VALUE': 'Panier Moyen (€)'},
-        color='PROMO_STATUS',
-        color_discrete_map={
-            'Avec promotion': '#2ecc71',
-            'Sans promotion': '#e74c3c'
-        },
-        text='AVG_TRANSACTION_VALUE'
-    )
-    fig_avg.update_traces(texttemplate='%{text:,.2f}€', textposition='outside')
-    st.plotly_chart(fig_avg, use_container_width=True)
-
-# Affichage du tableau comparatif
-st.subheader("📊 Tableau Comparatif")
-st.dataframe(comparison_df.style.format({
-    'TOTAL_REVENUE': '{:,.2f}€',
-    'AVG_TRANSACTION_VALUE': '{:,.2f}€',
-    'PERCENTAGE_OF_TRANSACTIONS': '{:.1f}%',
-    'PERCENTAGE_OF_REVENUE': '{:.1f}%'
-}), use_container_width=True)
-
-# ============================================================================
-# IMPACT PAR NIVEAU DE RÉDUCTION
-# ============================================================================
-
-st.header("💰 Impact par Niveau de Réduction")
-
 discount_query = """
 WITH promo_sales AS (
     SELECT 
@@ -241,13 +152,13 @@ WITH promo_sales AS (
             ELSE '> 50%'
         END AS discount_range
     FROM FINANCIAL_TRANSACTIONS_CLEAN ft
+    INNER JOIN BRIDGE_TRANSACTION_PROMOTION b 
+        ON b.transaction_id = ft.transaction_id
     INNER JOIN PROMOTIONS_CLEAN p 
-        ON ft.transaction_date BETWEEN p.start_date AND p.end_date
-        AND ft.region = p.region
+        ON p.promotion_id = b.promotion_id
 """
 
-if selected_category != "Toutes":
-    discount_query += f" WHERE p.product_category = '{selected_category}'"
+discount_query += category_filter.where("p")
 
 discount_query += """
 )
@@ -269,128 +180,23 @@ ORDER BY
     END
 """
 
-discount_df = run_query(discount_query)
-
-fig_discount = make_subplots(specs=[[{"secondary_y": True}]])
-
-fig_discount.add_trace(
-    go.Bar(
-        x=discount_df['DISCOUNT_RANGE'],
-        y=discount_df['TOTAL_REVENUE'],
-        name="Revenu",
-        marker_color='#3498db'
-    ),
-    secondary_y=False,
-)
-
-fig_discount.add_trace(
-    go.Scatter(
-        x=discount_df['DISCOUNT_RANGE'],
-        y=discount_df['NB_TRANSACTIONS'],
-        name="Nb Transactions",
-        mode='lines+markers',
-        marker=dict(size=10, color='#e74c3c'),
-        line=dict(width=3)
-    ),
-    secondary_y=True,
-)
-
-fig_discount.update_xaxes(title_text="Tranche de Réduction")
-fig_discount.update_yaxes(title_text="<b>Revenu (€)</b>", secondary_y=False)
-fig_discount.update_yaxes(title_text="<b>Nombre de Transactions</b>", secondary_y=True)
-fig_discount.update_layout(
-    title="Performance par Niveau de Réduction",
-    hovermode="x unified",
-    height=500
-)
-
-st.plotly_chart(fig_discount, use_container_width=True)
-
-# ============================================================================
-# SENSIBILITÉ DES CATÉGORIES AUX PROMOTIONS
-# ============================================================================
-
-st.header("📦 Sensibilité des Catégories aux Promotions")
-
+# Lift par catégorie précalculé par le pipeline (sql/Phase 3.1d, core/promo_lift.py) :
+# une ligne par catégorie, plus de CROSS JOIN transactions x inventaire
 sensitivity_query = """
-WITH category_baseline AS (
-    SELECT 
-        i.product_category,
-        COUNT(DISTINCT ft.transaction_id) AS transactions_no_promo,
-        ROUND(AVG(ft.amount), 2) AS avg_value_no_promo
-    FROM FINANCIAL_TRANSACTIONS_CLEAN ft
-    CROSS JOIN INVENTORY_CLEAN i
-    LEFT JOIN PROMOTIONS_CLEAN p 
-        ON ft.transaction_date BETWEEN p.start_date AND p.end_date
-        AND ft.region = p.region
-        AND i.product_category = p.product_category
-    WHERE p.promotion_id IS NULL
-    GROUP BY i.product_category
-),
-category_with_promo AS (
-    SELECT 
-        p.product_category,
-        COUNT(DISTINCT ft.transaction_id) AS transactions_with_promo,
-        ROUND(AVG(ft.amount), 2) AS avg_value_with_promo,
-        ROUND(AVG(p.discount_percentage) * 100, 2) AS avg_discount
-    FROM FINANCIAL_TRANSACTIONS_CLEAN ft
-    INNER JOIN PROMOTIONS_CLEAN p 
-        ON ft.transaction_date BETWEEN p.start_date AND p.end_date
-        AND ft.region = p.region
-    GROUP BY p.product_category
-)
 SELECT 
-    COALESCE(cb.product_category, cp.product_category) AS category,
-    COALESCE(cb.transactions_no_promo, 0) AS transactions_no_promo,
-    COALESCE(cb.avg_value_no_promo, 0) AS avg_value_no_promo,
-    COALESCE(cp.transactions_with_promo, 0) AS transactions_with_promo,
-    COALESCE(cp.avg_value_with_promo, 0) AS avg_value_with_promo,
-    COALESCE(cp.avg_discount, 0) AS avg_discount,
-    ROUND((COALESCE(cp.avg_value_with_promo, 0) - COALESCE(cb.avg_value_no_promo, 0)) / NULLIF(cb.avg_value_no_promo, 1) * 100, 2) AS lift_percentage,
-    CASE 
-        WHEN (COALESCE(cp.avg_value_with_promo, 0) - COALESCE(cb.avg_value_no_promo, 0)) / NULLIF(cb.avg_value_no_promo, 1) * 100 > 20 THEN 'Très sensible'
-        WHEN (COALESCE(cp.avg_value_with_promo, 0) - COALESCE(cb.avg_value_no_promo, 0)) / NULLIF(cb.avg_value_no_promo, 1) * 100 BETWEEN 5 AND 20 THEN 'Sensible'
-        WHEN (COALESCE(cp.avg_value_with_promo, 0) - COALESCE(cb.avg_value_no_promo, 0)) / NULLIF(cb.avg_value_no_promo, 1) * 100 BETWEEN -5 AND 5 THEN 'Neutre'
-        ELSE 'Peu sensible'
-    END AS sensitivity_level
-FROM category_baseline cb
-FULL OUTER JOIN category_with_promo cp ON cb.product_category = cp.product_category
-WHERE COALESCE(cb.product_category, cp.product_category) IS NOT NULL
+    category,
+    transactions_no_promo,
+    avg_value_no_promo,
+    transactions_with_promo,
+    avg_value_with_promo,
+    avg_discount,
+    lift_percentage,
+    sensitivity_level
+FROM GOLD.PROMO_LIFT_CATEGORIE
 ORDER BY lift_percentage DESC NULLS LAST
 LIMIT 15
 """
 
-sensitivity_df = run_query(sensitivity_query)
-
-# Graphique de sensibilité
-fig_sensitivity = px.bar(
-    sensitivity_df,
-    x='CATEGORY',
-    y='LIFT_PERCENTAGE',
-    title="Lift des Ventes par Catégorie (% d'augmentation avec promotion)",
-    labels={'CATEGORY': 'Catégorie', 'LIFT_PERCENTAGE': 'Lift (%)'},
-    color='SENSITIVITY_LEVEL',
-    color_discrete_map={
-        'Très sensible': '#27ae60',
-        'Sensible': '#f39c12',
-        'Neutre': '#95a5a6',
-        'Peu sensible': '#e74c3c'
-    },
-    text='LIFT_PERCENTAGE'
-)
-
-fig_sensitivity.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-fig_sensitivity.update_xaxes(tickangle=45)
-fig_sensitivity.update_layout(height=500)
-
-st.plotly_chart(fig_sensitivity, use_container_width=True)
-
-# ============================================================================
-# ROI DES PROMOTIONS PAR CATÉGORIE
-# ============================================================================
-
-st.header("💎 ROI des Promotions par Catégorie")
-
 roi_query = """
 SELECT 
     p.product_category,
@@ -400,13 +206,13 @@ SELECT
     ROUND(SUM(ft.amount), 2) AS revenue_during_promo,
     ROUND(AVG(ft.amount), 2) AS avg_transaction_value
 FROM PROMOTIONS_CLEAN p
+LEFT JOIN BRIDGE_TRANSACTION_PROMOTION b 
+    ON b.promotion_id = p.promotion_id
 LEFT JOIN FINANCIAL_TRANSACTIONS_CLEAN ft 
-    ON ft.transaction_date BETWEEN p.start_date AND p.end_date
-    AND ft.region = p.region
+    ON ft.transaction_id = b.transaction_id
 """
 
-if selected_region != "Toutes":
-    roi_query += f" WHERE p.region = '{selected_region}'"
+roi_query += region_filter.where("p")
 
 roi_query += """
 GROUP BY p.product_category
@@ -414,32 +220,6 @@ ORDER BY revenue_during_promo DESC
 LIMIT 10
 """
 
-roi_df = run_query(roi_query)
-
-fig_roi = px.scatter(
-    roi_df,
-    x='AVG_DISCOUNT',
-    y='REVENUE_DURING_PROMO',
-    size='TRANSACTIONS_DURING_PROMO',
-    color='PRODUCT_CATEGORY',
-    title="ROI : Réduction Moyenne vs Revenu Généré",
-    labels={
-        'AVG_DISCOUNT': 'Réduction Moyenne (%)',
-        'REVENUE_DURING_PROMO': 'Revenu Pendant Promo (€)',
-        'PRODUCT_CATEGORY': 'Catégorie'
-    },
-    hover_data=['PROMO_COUNT', 'TRANSACTIONS_DURING_PROMO']
-)
-
-fig_roi.update_layout(height=500)
-st.plotly_chart(fig_roi, use_container_width=True)
-
-# ============================================================================
-# DURÉE OPTIMALE DES PROMOTIONS
-# ============================================================================
-
-st.header("⏱️ Durée Optimale des Promotions")
-
 duration_query = """
 SELECT 
     DATEDIFF(day, start_date, end_date) AS promo_duration_days,
@@ -452,41 +232,313 @@ HAVING promo_count >= 5
 ORDER BY promo_duration_days
 """
 
-duration_df = run_query(duration_query)
-
-fig_duration = px.bar(
-    duration_df,
-    x='PROMO_DURATION_DAYS',
-    y='PROMO_COUNT',
-    title="Distribution des Promotions par Durée",
-    labels={'PROMO_DURATION_DAYS': 'Durée (jours)', 'PROMO_COUNT': 'Nombre de Promotions'},
-    color='AVG_DISCOUNT',
-    color_continuous_scale='RdYlGn_r',
-    text='PROMO_COUNT'
-)
+# COUNT(DISTINCT ft.transaction_id) sur les jointures promotion : approché
+# (APPROX_COUNT_DISTINCT) sauf si les comptages exacts sont demandés
+roi_query = distinct_counts.query(roi_query, ["ft.transaction_id"])
+
+panel_queries = {
+    "kpis": (promo_kpi_query, promo_filters.params, "Vue d'Ensemble des Promotions"),
+    "comparison": (comparison_query, category_filter.params, "Impact des Promotions sur les Ventes"),
+    "discount": (discount_query, category_filter.params, "Impact par Niveau de Réduction"),
+    "sensitivity": (sensitivity_query, None, "Sensibilité des Catégories aux Promotions"),
+    "roi": (roi_query, region_filter.params, "ROI des Promotions par Catégorie"),
+    "duration": (duration_query, None, "Durée Optimale des Promotions"),
+}
+
+# Onglet -> requêtes dont ses sections ont besoin
+section_queries = {
+    "🔍 Avec / Sans Promotion": ["comparison"],
+    "💰 Niveaux de Réduction": ["discount"],
+    "📦 Sensibilité": ["sensitivity"],
+    "💎 ROI": ["roi"],
+    "⏱️ Durée": ["duration"],
+    "💡 Recommandations": ["sensitivity"],
+}
+
+# Les KPIs s'affichent au-dessus des onglets, créés dès maintenant pour
+# savoir lequel est ouvert : seules ses requêtes partent (avec les KPIs)
+kpi_area = st.container()
+tabs = dict(zip(section_queries, section_tabs(
+    list(section_queries), lazy=lazy_sections_enabled(st.secrets))))
+
+needed = ["kpis"] + [
+    name
+    for label, names in section_queries.items() if is_open(tabs[label])
+    for name in names
+]
+
+# Les requêtes retenues partent ensemble ; chaque section attend son résultat
+panel_results = submit_queries(
+    run_query, {name: panel_queries[name] for name in dict.fromkeys(needed)},
+    initializer=script_context_initializer())
+
+# ============================================================================
+# KPIs PROMOTIONS
+# ============================================================================
+
+def kpi_section():
+    timer.panel("Vue d'Ensemble des Promotions")
+    st.header("📊 Vue d'Ensemble des Promotions")
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    promo_kpis = timer.wait(panel_results["kpis"])
+
+    with col1:
+        st.metric(
+            label="🎁 Promotions Totales",
+            value=f"{promo_kpis['TOTAL_PROMOS'].iloc[0]:,.0f}"
+        )
+
+    with col2:
+        st.metric(
+            label="💸 Réduction Moyenne",
+            value=f"{promo_kpis['AVG_DISCOUNT'].iloc[0]:.1f}%"
+        )
+
+    with col3:
+        st.metric(
+            label="📦 Catégories Concernées",
+            value=f"{promo_kpis['CATEGORIES_WITH_PROMOS'].iloc[0]:,.0f}"
+        )
+
+    with col4:
+        st.metric(
+            label="🌍 Régions Actives",
+            value=f"{promo_kpis['REGIONS_WITH_PROMOS'].iloc[0]:,.0f}"
+        )
+
+    st.markdown("---")
+
+# ============================================================================
+# COMPARAISON AVEC / SANS PROMOTION
+# ============================================================================
+
+def comparison_section():
+    timer.panel("Impact des Promotions sur les Ventes")
+    st.header("🔍 Impact des Promotions sur les Ventes")
+
+    comparison_df = timer.wait(panel_results["comparison"])
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig_revenue = px.bar(
+            comparison_df,
+            x='PROMO_STATUS',
+            y='TOTAL_REVENUE',
+            title="Revenu Total : Avec vs Sans Promotion",
+            labels={'PROMO_STATUS': 'Statut', 'TOTAL_REVENUE': 'Revenu (€)'},
+            color='PROMO_STATUS',
+            color_discrete_map={
+                'Avec promotion': '#2ecc71',
+                'Sans promotion': '#e74c3c'
+            },
+            text='TOTAL_REVENUE'
+        )
+        fig_revenue.update_traces(texttemplate='%{text:,.0f}€', textposition='outside')
+        st.plotly_chart(fig_revenue, use_container_width=True)
+
+    with col2:
+        fig_avg = px.bar(
+            comparison_df,
+            x='PROMO_STATUS',
+            y='AVG_TRANSACTION_VALUE',
+            title="Panier Moyen : Avec vs Sans Promotion",
+            labels={'PROMO_STATUS': 'Statut', 'AVG_TRANSACTION_VALUE': 'Panier Moyen (€)'},
+            color='PROMO_STATUS',
+            color_discrete_map={
+                'Avec promotion': '#2ecc71',
+                'Sans promotion': '#e74c3c'
+            },
+            text='AVG_TRANSACTION_VALUE'
+        )
+        fig_avg.update_traces(texttemplate='%{text:,.2f}€', textposition='outside')
+        st.plotly_chart(fig_avg, use_container_width=True)
+
+    # Affichage du tableau comparatif
+    st.subheader("📊 Tableau Comparatif")
+    st.dataframe(comparison_df.style.format({
+        'TOTAL_REVENUE': '{:,.2f}€',
+        'AVG_TRANSACTION_VALUE': '{:,.2f}€',
+        'PERCENTAGE_OF_TRANSACTIONS': '{:.1f}%',
+        'PERCENTAGE_OF_REVENUE': '{:.1f}%'
+    }), use_container_width=True)
+
+# ============================================================================
+# IMPACT PAR NIVEAU DE RÉDUCTION
+# ============================================================================
+
+def discount_section():
+    timer.panel("Impact par Niveau de Réduction")
+    st.header("💰 Impact par Niveau de Réduction")
+
+    discount_df = timer.wait(panel_results["discount"])
+
+    fig_discount = make_subplots(specs=[[{"secondary_y": True}]])
+
+    fig_discount.add_trace(
+        go.Bar(
+            x=discount_df['DISCOUNT_RANGE'],
+            y=discount_df['TOTAL_REVENUE'],
+            name="Revenu",
+            marker_color='#3498db'
+        ),
+        secondary_y=False,
+    )
+
+    fig_discount.add_trace(
+        go.Scatter(
+            x=discount_df['DISCOUNT_RANGE'],
+            y=discount_df['NB_TRANSACTIONS'],
+            name="Nb Transactions",
+            mode='lines+markers',
+            marker=dict(size=10, color='#e74c3c'),
+            line=dict(width=3)
+        ),
+        secondary_y=True,
+    )
+
+    fig_discount.update_xaxes(title_text="Tranche de Réduction")
+    fig_discount.update_yaxes(title_text="<b>Revenu (€)</b>", secondary_y=False)
+    fig_discount.update_yaxes(title_text="<b>Nombre de Transactions</b>", secondary_y=True)
+    fig_discount.update_layout(
+        title="Performance par Niveau de Réduction",
+        hovermode="x unified",
+        height=500
+    )
 
-fig_duration.update_traces(textposition='outside')
-st.plotly_chart(fig_duration, use_container_width=True)
+    st.plotly_chart(fig_discount, use_container_width=True)
+
+# ============================================================================
+# SENSIBILITÉ DES CATÉGORIES AUX PROMOTIONS
+# ============================================================================
+
+def sensitivity_section():
+    timer.panel("Sensibilité des Catégories aux Promotions")
+    st.header("📦 Sensibilité des Catégories aux Promotions")
+
+    sensitivity_df = timer.wait(panel_results["sensitivity"])
+
+    # Graphique de sensibilité
+    fig_sensitivity = px.bar(
+        sensitivity_df,
+        x='CATEGORY',
+        y='LIFT_PERCENTAGE',
+        title="Lift des Ventes par Catégorie (% d'augmentation avec promotion)",
+        labels={'CATEGORY': 'Catégorie', 'LIFT_PERCENTAGE': 'Lift (%)'},
+        color='SENSITIVITY_LEVEL',
+        color_discrete_map={
+            'Très sensible': '#27ae60',
+            'Sensible': '#f39c12',
+            'Neutre': '#95a5a6',
+            'Peu sensible': '#e74c3c'
+        },
+        text='LIFT_PERCENTAGE'
+    )
+
+    fig_sensitivity.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig_sensitivity.update_xaxes(tickangle=45)
+    fig_sensitivity.update_layout(height=500)
+
+    st.plotly_chart(fig_sensitivity, use_container_width=True)
+
+# ============================================================================
+# ROI DES PROMOTIONS PAR CATÉGORIE
+# ============================================================================
+
+def roi_section():
+    timer.panel("ROI des Promotions par Catégorie")
+    st.header("💎 ROI des Promotions par Catégorie")
+
+    roi_df = timer.wait(panel_results["roi"])
+
+    fig_roi = px.scatter(
+        roi_df,
+        x='AVG_DISCOUNT',
+        y='REVENUE_DURING_PROMO',
+        size='TRANSACTIONS_DURING_PROMO',
+        color='PRODUCT_CATEGORY',
+        title="ROI : Réduction Moyenne vs Revenu Généré",
+        labels={
+            'AVG_DISCOUNT': 'Réduction Moyenne (%)',
+            'REVENUE_DURING_PROMO': 'Revenu Pendant Promo (€)',
+            'PRODUCT_CATEGORY': 'Catégorie'
+        },
+        hover_data=['PROMO_COUNT', 'TRANSACTIONS_DURING_PROMO']
+    )
+
+    fig_roi.update_layout(height=500)
+    st.plotly_chart(fig_roi, use_container_width=True)
+    distinct_counts.caption("Les nombres de transactions (taille des bulles)")
+
+# ============================================================================
+# DURÉE OPTIMALE DES PROMOTIONS
+# ============================================================================
+
+def duration_section():
+    timer.panel("Durée Optimale des Promotions")
+    st.header("⏱️ Durée Optimale des Promotions")
+
+    duration_df = timer.wait(panel_results["duration"])
+
+    fig_duration = px.bar(
+        duration_df,
+        x='PROMO_DURATION_DAYS',
+        y='PROMO_COUNT',
+        title="Distribution des Promotions par Durée",
+        labels={'PROMO_DURATION_DAYS': 'Durée (jours)', 'PROMO_COUNT': 'Nombre de Promotions'},
+        color='AVG_DISCOUNT',
+        color_continuous_scale='RdYlGn_r',
+        text='PROMO_COUNT'
+    )
+
+    fig_duration.update_traces(textposition='outside')
+    st.plotly_chart(fig_duration, use_container_width=True)
 
 # ============================================================================
 # RECOMMANDATIONS
 # ============================================================================
 
-st.header("💡 Recommandations Stratégiques")
+def recommendations_section():
+    timer.panel("Recommandations Stratégiques")
+    st.header("💡 Recommandations Stratégiques")
 
-col1, col2 = st.columns(2)
+    sensitivity_df = timer.wait(panel_results["sensitivity"])
 
-with col1:
-    st.success("**✅ Catégories à Promouvoir**")
-    top_categories = sensitivity_df.nlargest(3, 'LIFT_PERCENTAGE')
-    for idx, row in top_categories.iterrows():
-        st.write(f"• **{row['CATEGORY']}** : +{row['LIFT_PERCENTAGE']:.1f}% de lift")
+    col1, col2 = st.columns(2)
 
-with col2:
-    st.warning("**⚠️ Optimisations Possibles**")
-    low_categories = sensitivity_df.nsmallest(3, 'LIFT_PERCENTAGE')
-    for idx, row in low_categories.iterrows():
-        st.write(f"• **{row['CATEGORY']}** : Revoir stratégie promo")
+    with col1:
+        st.success("**✅ Catégories à Promouvoir**")
+        top_categories = sensitivity_df.nlargest(3, 'LIFT_PERCENTAGE')
+        for idx, row in top_categories.iterrows():
+            st.write(f"• **{row['CATEGORY']}** : +{row['LIFT_PERCENTAGE']:.1f}% de lift")
+
+    with col2:
+        st.warning("**⚠️ Optimisations Possibles**")
+        low_categories = sensitivity_df.nsmallest(3, 'LIFT_PERCENTAGE')
+        for idx, row in low_categories.iterrows():
+            st.write(f"• **{row['CATEGORY']}** : Revoir stratégie promo")
+
+# ============================================================================
+# RENDU PROGRESSIF (KPIs, PUIS LA SECTION OUVERTE)
+# ============================================================================
+
+sections = [
+    comparison_section,
+    discount_section,
+    sensitivity_section,
+    roi_section,
+    duration_section,
+    recommendations_section,
+]
+
+# KPIs puis sections ouvertes, chacune dès que ses requêtes sont terminées
+slots = [(kpi_area, kpi_section, [panel_results["kpis"]])] + [
+    (tabs[label], section, [panel_results[name] for name in section_queries[label]])
+    for label, section in zip(section_queries, sections) if is_open(tabs[label])
+]
+render_sections(timer, slots, progressive=progressive_enabled(st.secrets))
 
 # ============================================================================
 # FOOTER
@@ -498,3 +550,9 @@ st.markdown("""
     <p style='color: gray;'>Promotion Analysis Dashboard | AnyCompany Marketing Analytics</p>
 </div>
 """, unsafe_allow_html=True)
+
+# ============================================================================
+# TEMPS D'EXÉCUTION (SIDEBAR, OPTIONNEL)
+# ============================================================================
+
+timing_panel(timer, init_backend())
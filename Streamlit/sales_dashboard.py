@@ -10,7 +10,12 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import snowflake.connector
+from core.approx import distinct_counts_checkbox
+from core.data import init_backend, query_runner, start_run
+from core import sales_cube
+from core.downsample import lttb
+from core.sections import lazy_sections_enabled, render_section, section_tabs
+from core.timing_panel import timing_panel
 from datetime import datetime
 
 # Configuration de la page
@@ -26,56 +31,46 @@ st.markdown("**AnyCompany Food & Beverage** - Analyse des ventes et tendances")
 st.markdown("---")
 
 # ============================================================================
-# CONNEXION SNOWFLAKE
+# ACCÈS AUX DONNÉES (BACKEND, POOL ET CACHES COMMUNS À TOUTES LES PAGES)
 # ============================================================================
 
-@st.cache_resource
-def init_connection():
-    """Initialise la connexion à Snowflake"""
-    return snowflake.connector.connect(
-        user=st.secrets["snowflake"]["user"],
-        password=st.secrets["snowflake"]["password"],
-        account=st.secrets["snowflake"]["account"],
-        warehouse=st.secrets["snowflake"]["warehouse"],
-        database="ANYCOMPANY_LAB",
-        schema="SILVER"
-    )
+# Mesures de cette exécution du script (temps par panneau et par phase)
+timer = start_run("sales_dashboard")
+run_query = query_runner(timer)
+
+# ============================================================================
+# CHARGEMENT DU CUBE DE VENTES (UNE SEULE LECTURE)
+# ============================================================================
 
-@st.cache_data(ttl=600)
-def run_query(query):
-    """Exécute une requête et retourne un DataFrame"""
-    with init_connection() as conn:
-        return pd.read_sql(query, conn)
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_sales_cube(version):
+    """Agrégat jour x région : tous les panneaux en sont dérivés localement"""
+    return sales_cube.prepare_cube(run_query(sales_cube.SALES_CUBE_QUERY))
+
+timer.panel("Cube de ventes")
+cube = load_sales_cube(init_backend().version_token(sales_cube.SALES_CUBE_QUERY))
 
 # ============================================================================
 # SIDEBAR - FILTRES
 # ============================================================================
 
+timer.panel("Filtres")
 st.sidebar.header("🎯 Filtres")
 
-# Sélection de la période
-period_option = st.sidebar.selectbox(
-    "Période d'analyse",
-    ["Mensuelle", "Trimestrielle", "Annuelle"]
-)
-
 # Sélection de la région (optionnel)
 show_region_filter = st.sidebar.checkbox("Filtrer par région", value=False)
 
 if show_region_filter:
-    regions_query = """
-    SELECT DISTINCT region 
-    FROM FINANCIAL_TRANSACTIONS_CLEAN 
-    ORDER BY region
-    """
-    regions_df = run_query(regions_query)
     selected_region = st.sidebar.selectbox(
         "Région",
-        options=["Toutes"] + regions_df['REGION'].tolist()
+        options=["Toutes"] + sales_cube.regions(cube)
     )
 else:
     selected_region = "Toutes"
 
+# Clients uniques : HyperLogLog par défaut sur Snowflake
+distinct_counts = distinct_counts_checkbox(st.secrets, init_backend().name)
+
 st.sidebar.markdown("---")
 st.sidebar.info("💡 **Astuce**: Survolez les graphiques pour plus de détails")
 
@@ -83,24 +78,18 @@ st.sidebar.info("💡 **Astuce**: Survolez les graphiques pour plus de détails"
 # KPIs PRINCIPAUX
 # ============================================================================
 
+timer.panel("KPIs Clés")
 st.header("📊 KPIs Clés")
 
 col1, col2, col3, col4 = st.columns(4)
 
-# Requête KPIs globaux
-kpi_query = """
-SELECT 
-    COUNT(*) AS total_transactions,
-    ROUND(SUM(amount), 2) AS total_revenue,
-    ROUND(AVG(amount), 2) AS avg_transaction_value,
-    COUNT(DISTINCT entity) AS unique_customers
-FROM FINANCIAL_TRANSACTIONS_CLEAN
-"""
-
-if selected_region != "Toutes":
-    kpi_query += f" WHERE region = '{selected_region}'"
+# Clients uniques (non additifs) : seule requête hors cube, approchée ou exacte
+customers_df = run_query(
+    distinct_counts.query(sales_cube.CUSTOMERS_BY_REGION_QUERY, ["entity"])
+)
 
-kpis = run_query(kpi_query)
+# KPIs globaux dérivés du cube
+kpis = sales_cube.kpis(cube, customers_df, selected_region)
 
 with col1:
     st.metric(
@@ -126,8 +115,9 @@ with col3:
 with col4:
     st.metric(
         label="👥 Clients Uniques",
-        value=f"{kpis['UNIQUE_CUSTOMERS'].iloc[0]:,.0f}",
-        delta=None
+        value=distinct_counts.format(kpis['UNIQUE_CUSTOMERS'].iloc[0]),
+        delta=distinct_counts.error_bound(),
+        delta_color="off"
     )
 
 st.markdown("---")
@@ -136,277 +126,199 @@ st.markdown("---")
 # ÉVOLUTION TEMPORELLE DES VENTES
 # ============================================================================
 
-st.header("📅 Évolution des Ventes dans le Temps")
-
-# Requête selon la période sélectionnée
-if period_option == "Mensuelle":
-    time_query = """
-    SELECT 
-        DATE_TRUNC('month', transaction_date) AS period,
-        COUNT(*) AS nb_transactions,
-        ROUND(SUM(amount), 2) AS total_revenue,
-        ROUND(AVG(amount), 2) AS avg_transaction_value
-    FROM FINANCIAL_TRANSACTIONS_CLEAN
-    """
-    if selected_region != "Toutes":
-        time_query += f" WHERE region = '{selected_region}'"
-    time_query += """
-    GROUP BY period
-    ORDER BY period
-    """
-    
-elif period_option == "Trimestrielle":
-    time_query = """
-    SELECT 
-        DATE_TRUNC('quarter', transaction_date) AS period,
-        COUNT(*) AS nb_transactions,
-        ROUND(SUM(amount), 2) AS total_revenue,
-        ROUND(AVG(amount), 2) AS avg_transaction_value
-    FROM FINANCIAL_TRANSACTIONS_CLEAN
-    """
-    if selected_region != "Toutes":
-        time_query += f" WHERE region = '{selected_region}'"
-    time_query += """
-    GROUP BY period
-    ORDER BY period
-    """
-    
-else:  # Annuelle
-    time_query = """
-    SELECT 
-        YEAR(transaction_date) AS period,
-        COUNT(*) AS nb_transactions,
-        ROUND(SUM(amount), 2) AS total_revenue,
-        ROUND(AVG(amount), 2) AS avg_transaction_value
-    FROM FINANCIAL_TRANSACTIONS_CLEAN
-    """
-    if selected_region != "Toutes":
-        time_query += f" WHERE region = '{selected_region}'"
-    time_query += """
-    GROUP BY period
-    ORDER BY period
-    """
-
-time_df = run_query(time_query)
-
-# Graphique double axe : Revenus et Transactions
-fig = make_subplots(specs=[[{"secondary_y": True}]])
-
-fig.add_trace(
-    go.Scatter(
-        x=time_df['PERIOD'],
-        y=time_df['TOTAL_REVENUE'],
-        name="Revenu",
-        line=dict(color='#1f77b4', width=3),
-        mode='lines+markers'
-    ),
-    secondary_y=False,
-)
+def evolution_section():
+    timer.panel("Évolution des Ventes dans le Temps")
+    st.header("📅 Évolution des Ventes dans le Temps")
 
-fig.add_trace(
-    go.Scatter(
-        x=time_df['PERIOD'],
-        y=time_df['NB_TRANSACTIONS'],
-        name="Nb Transactions",
-        line=dict(color='#ff7f0e', width=2, dash='dot'),
-        mode='lines+markers'
-    ),
-    secondary_y=True,
-)
+    # Période propre à la section : la changer ne relance que ce fragment
+    period_option = st.selectbox(
+        "Période d'analyse",
+        ["Mensuelle", "Trimestrielle", "Annuelle", "Quotidienne"],
+        key="period_option"
+    )
+
+    # Série temporelle selon la période sélectionnée
+    time_df = sales_cube.time_series(cube, period_option, selected_region)
+
+    # Graphique double axe : Revenus et Transactions (WebGL, séries longues
+    # sous-échantillonnées par LTTB côté serveur)
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    mode = 'lines+markers' if len(time_df) <= 100 else 'lines'
+
+    revenue_df = lttb(time_df, 'PERIOD', 'TOTAL_REVENUE')
+    fig.add_trace(
+        go.Scattergl(
+            x=revenue_df['PERIOD'],
+            y=revenue_df['TOTAL_REVENUE'],
+            name="Revenu",
+            line=dict(color='#1f77b4', width=3),
+            mode=mode
+        ),
+        secondary_y=False,
+    )
 
-fig.update_xaxes(title_text="Période")
-fig.update_yaxes(title_text="<b>Revenu (€)</b>", secondary_y=False)
-fig.update_yaxes(title_text="<b>Nombre de Transactions</b>", secondary_y=True)
+    transactions_df = lttb(time_df, 'PERIOD', 'NB_TRANSACTIONS')
+    fig.add_trace(
+        go.Scattergl(
+            x=transactions_df['PERIOD'],
+            y=transactions_df['NB_TRANSACTIONS'],
+            name="Nb Transactions",
+            line=dict(color='#ff7f0e', width=2, dash='dot'),
+            mode=mode
+        ),
+        secondary_y=True,
+    )
 
-fig.update_layout(
-    title=f"Évolution {period_option} des Ventes",
-    hovermode="x unified",
-    height=500
-)
+    fig.update_xaxes(title_text="Période")
+    fig.update_yaxes(title_text="<b>Revenu (€)</b>", secondary_y=False)
+    fig.update_yaxes(title_text="<b>Nombre de Transactions</b>", secondary_y=True)
 
-st.plotly_chart(fig, use_container_width=True)
+    fig.update_layout(
+        title=f"Évolution {period_option} des Ventes",
+        hovermode="x unified",
+        height=500
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+    if len(revenue_df) < len(time_df):
+        st.caption(f"{len(time_df):,} périodes, {len(revenue_df):,} points affichés (LTTB)")
 
 # ============================================================================
 # CROISSANCE MONTH-OVER-MONTH
 # ============================================================================
 
-st.header("📈 Taux de Croissance")
-
-growth_query = """
-WITH monthly_sales AS (
-    SELECT 
-        DATE_TRUNC('month', transaction_date) AS month,
-        ROUND(SUM(amount), 2) AS revenue
-    FROM FINANCIAL_TRANSACTIONS_CLEAN
-"""
-if selected_region != "Toutes":
-    growth_query += f" WHERE region = '{selected_region}'"
-
-growth_query += """
-    GROUP BY month
-)
-SELECT 
-    month,
-    revenue,
-    LAG(revenue) OVER (ORDER BY month) AS previous_month_revenue,
-    ROUND((revenue - LAG(revenue) OVER (ORDER BY month)) / LAG(revenue) OVER (ORDER BY month) * 100, 2) AS growth_percentage
-FROM monthly_sales
-ORDER BY month
-"""
-
-growth_df = run_query(growth_query)
-
-fig_growth = go.Figure()
-
-fig_growth.add_trace(go.Bar(
-    x=growth_df['MONTH'],
-    y=growth_df['GROWTH_PERCENTAGE'],
-    marker_color=['red' if val < 0 else 'green' for val in growth_df['GROWTH_PERCENTAGE']],
-    name='Croissance %',
-    text=growth_df['GROWTH_PERCENTAGE'],
-    texttemplate='%{text:.1f}%',
-    textposition='outside'
-))
-
-fig_growth.update_layout(
-    title="Croissance Mensuelle (Month-over-Month)",
-    xaxis_title="Mois",
-    yaxis_title="Croissance (%)",
-    hovermode="x",
-    height=400
-)
+def growth_section():
+    timer.panel("Taux de Croissance")
+    st.header("📈 Taux de Croissance")
+
+    # Croissance MoM (équivalent du LAG SQL) calculée sur le cube
+    growth_df = sales_cube.monthly_growth(cube, selected_region)
+
+    fig_growth = go.Figure()
+
+    fig_growth.add_trace(go.Bar(
+        x=growth_df['MONTH'],
+        y=growth_df['GROWTH_PERCENTAGE'],
+        marker_color=['red' if val < 0 else 'green' for val in growth_df['GROWTH_PERCENTAGE']],
+        name='Croissance %',
+        text=growth_df['GROWTH_PERCENTAGE'],
+        texttemplate='%{text:.1f}%',
+        textposition='outside'
+    ))
+
+    fig_growth.update_layout(
+        title="Croissance Mensuelle (Month-over-Month)",
+        xaxis_title="Mois",
+        yaxis_title="Croissance (%)",
+        hovermode="x",
+        height=400
+    )
 
-st.plotly_chart(fig_growth, use_container_width=True)
+    st.plotly_chart(fig_growth, use_container_width=True)
 
 # ============================================================================
 # SAISONNALITÉ
 # ============================================================================
 
-st.header("🌡️ Analyse de Saisonnalité")
+def seasonality_section():
+    timer.panel("Analyse de Saisonnalité")
+    st.header("🌡️ Analyse de Saisonnalité")
 
-col1, col2 = st.columns(2)
+    col1, col2 = st.columns(2)
 
-with col1:
-    # Jour de la semaine
-    weekday_query = """
-    SELECT 
-        DAYNAME(transaction_date) AS day_of_week,
-        COUNT(*) AS nb_transactions,
-        ROUND(SUM(amount), 2) AS total_revenue
-    FROM FINANCIAL_TRANSACTIONS_CLEAN
-    """
-    if selected_region != "Toutes":
-        weekday_query += f" WHERE region = '{selected_region}'"
-    
-    weekday_query += """
-    GROUP BY day_of_week
-    ORDER BY 
-        CASE day_of_week
-            WHEN 'Monday' THEN 1
-            WHEN 'Tuesday' THEN 2
-            WHEN 'Wednesday' THEN 3
-            WHEN 'Thursday' THEN 4
-            WHEN 'Friday' THEN 5
-            WHEN 'Saturday' THEN 6
-            WHEN 'Sunday' THEN 7
-        END
-    """
-    
-    weekday_df = run_query(weekday_query)
-    
-    fig_weekday = px.bar(
-        weekday_df,
-        x='DAY_OF_WEEK',
-        y='TOTAL_REVENUE',
-        title="Revenu par Jour de la Semaine",
-        labels={'DAY_OF_WEEK': 'Jour', 'TOTAL_REVENUE': 'Revenu (€)'},
-        color='TOTAL_REVENUE',
-        color_continuous_scale='Blues'
-    )
-    
-    st.plotly_chart(fig_weekday, use_container_width=True)
+    with col1:
+        # Jour de la semaine
+        weekday_df = sales_cube.by_weekday(cube, selected_region)
 
-with col2:
-    # Mois de l'année
-    month_query = """
-    SELECT 
-        MONTHNAME(transaction_date) AS month_name,
-        MONTH(transaction_date) AS month_num,
-        ROUND(SUM(amount), 2) AS total_revenue
-    FROM FINANCIAL_TRANSACTIONS_CLEAN
-    """
-    if selected_region != "Toutes":
-        month_query += f" WHERE region = '{selected_region}'"
-    
-    month_query += """
-    GROUP BY month_name, month_num
-    ORDER BY month_num
-    """
-    
-    month_df = run_query(month_query)
-    
-    fig_month = px.line(
-        month_df,
-        x='MONTH_NAME',
-        y='TOTAL_REVENUE',
-        title="Revenu par Mois de l'Année",
-        labels={'MONTH_NAME': 'Mois', 'TOTAL_REVENUE': 'Revenu (€)'},
-        markers=True
-    )
-    
-    st.plotly_chart(fig_month, use_container_width=True)
+        fig_weekday = px.bar(
+            weekday_df,
+            x='DAY_OF_WEEK',
+            y='TOTAL_REVENUE',
+            title="Revenu par Jour de la Semaine",
+            labels={'DAY_OF_WEEK': 'Jour', 'TOTAL_REVENUE': 'Revenu (€)'},
+            color='TOTAL_REVENUE',
+            color_continuous_scale='Blues'
+        )
+
+        st.plotly_chart(fig_weekday, use_container_width=True)
+
+    with col2:
+        # Mois de l'année
+        month_df = sales_cube.by_month_of_year(cube, selected_region)
+
+        fig_month = px.line(
+            month_df,
+            x='MONTH_NAME',
+            y='TOTAL_REVENUE',
+            title="Revenu par Mois de l'Année",
+            labels={'MONTH_NAME': 'Mois', 'TOTAL_REVENUE': 'Revenu (€)'},
+            markers=True
+        )
+
+        st.plotly_chart(fig_month, use_container_width=True)
 
 # ============================================================================
 # PERFORMANCE PAR RÉGION
 # ============================================================================
 
-st.header("🌍 Performance par Région")
-
-region_query = """
-SELECT 
-    region,
-    COUNT(*) AS transaction_count,
-    ROUND(SUM(amount), 2) AS total_amount,
-    ROUND(AVG(amount), 2) AS avg_amount
-FROM FINANCIAL_TRANSACTIONS_CLEAN
-GROUP BY region
-ORDER BY total_amount DESC
-"""
+def region_section():
+    timer.panel("Performance par Région")
+    st.header("🌍 Performance par Région")
+
+    region_df = sales_cube.by_region(cube)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig_region_pie = px.pie(
+            region_df,
+            values='TOTAL_AMOUNT',
+            names='REGION',
+            title="Répartition du Revenu par Région",
+            hole=0.4
+        )
+        st.plotly_chart(fig_region_pie, use_container_width=True)
+
+    with col2:
+        fig_region_bar = px.bar(
+            region_df,
+            x='REGION',
+            y='TRANSACTION_COUNT',
+            title="Nombre de Transactions par Région",
+            labels={'REGION': 'Région', 'TRANSACTION_COUNT': 'Transactions'},
+            color='TRANSACTION_COUNT',
+            color_continuous_scale='Viridis'
+        )
+        st.plotly_chart(fig_region_bar, use_container_width=True)
 
-region_df = run_query(region_query)
+# ============================================================================
+# TABLEAU DE DONNÉES
+# ============================================================================
 
-col1, col2 = st.columns(2)
+def data_section():
+    timer.panel("Données Détaillées")
+    st.header("📋 Données Détaillées")
 
-with col1:
-    fig_region_pie = px.pie(
-        region_df,
-        values='TOTAL_AMOUNT',
-        names='REGION',
-        title="Répartition du Revenu par Région",
-        hole=0.4
-    )
-    st.plotly_chart(fig_region_pie, use_container_width=True)
+    region_df = sales_cube.by_region(cube)
 
-with col2:
-    fig_region_bar = px.bar(
-        region_df,
-        x='REGION',
-        y='TRANSACTION_COUNT',
-        title="Nombre de Transactions par Région",
-        labels={'REGION': 'Région', 'TRANSACTION_COUNT': 'Transactions'},
-        color='TRANSACTION_COUNT',
-        color_continuous_scale='Viridis'
-    )
-    st.plotly_chart(fig_region_bar, use_container_width=True)
+    with st.expander("Voir les données brutes"):
+        st.dataframe(region_df, use_container_width=True)
 
 # ============================================================================
-# TABLEAU DE DONNÉES
+# ONGLETS (SEULE LA SECTION OUVERTE EST CALCULÉE)
 # ============================================================================
 
-st.header("📋 Données Détaillées")
+sections = {
+    "📅 Évolution": evolution_section,
+    "📈 Croissance": growth_section,
+    "🌡️ Saisonnalité": seasonality_section,
+    "🌍 Régions": region_section,
+    "📋 Données": data_section,
+}
 
-with st.expander("Voir les données brutes"):
-    st.dataframe(region_df, use_container_width=True)
+tabs = section_tabs(list(sections), lazy=lazy_sections_enabled(st.secrets))
+for tab, section in zip(tabs, sections.values()):
+    render_section(tab, timer, section)
 
 # ============================================================================
 # FOOTER
@@ -418,3 +330,9 @@ st.markdown("""
     <p style='color: gray;'>Dashboard créé avec Streamlit | Données : Snowflake | AnyCompany Marketing Analytics</p>
 </div>
 """, unsafe_allow_html=True)
+
+# ============================================================================
+# TEMPS D'EXÉCUTION (SIDEBAR, OPTIONNEL)
+# ============================================================================
+
+timing_panel(timer, init_backend())
@@ -6,6 +6,8 @@ USE SCHEMA SILVER;
 
 
 -- FINANCIAL_TRANSACTIONS_CLEAN
+-- Reconstruction complte (premier chargement). Pour les excutions quotidiennes,
+-- utiliser le MERGE incrmental : 3c Rafrachissement incrmental SILVER.sql
 
 CREATE OR REPLACE TABLE FINANCIAL_TRANSACTIONS_CLEAN AS
 SELECT 
@@ -0,0 +1,80 @@
+-- ============================================================================
+-- TABLES DE CORRESPONDANCE TRANSACTION -> PROMOTION / CAMPAGNE
+-- A exécuter après 3 Nettoyage SILVER.sql, avant la Phase 3.1
+-- ============================================================================
+--
+-- Les dashboards et VENTES_ENRICHIES rattachent une transaction à une
+-- promotion / campagne avec :
+--     ft.transaction_date BETWEEN p.start_date AND p.end_date
+--     AND ft.region = p.region
+-- Cette jointure par intervalle est exécutée comme une quasi boucle imbriquée.
+-- On la calcule ici UNE fois par exécution du pipeline : chaque intervalle est
+-- déplié en jours de transactions (calendrier x intervalles, petit), puis rattaché aux
+-- transactions par équi-jointure sur (region, date). Les requêtes en aval
+-- joignent ensuite sur les identifiants.
+--
+-- Même résultat que la construction locale (Streamlit/core/interval_bridge.py,
+-- balayage trié par région) utilisée par le backend DuckDB.
+
+USE SCHEMA ANYCOMPANY_LAB.SILVER;
+
+
+-- Calendrier : jours ayant au moins une transaction. Exact (une ligne de
+-- bridge suppose une transaction ce jour-là) et sans plafond arbitraire :
+-- une borne aberrante (début en 1900, fin en 9999) n'élargit pas le calendrier
+CREATE OR REPLACE TEMPORARY TABLE CALENDRIER_INTERVALLES AS
+SELECT DISTINCT transaction_date AS jour
+FROM FINANCIAL_TRANSACTIONS_CLEAN;
+
+
+-- BRIDGE_TRANSACTION_PROMOTION
+
+CREATE OR REPLACE TABLE BRIDGE_TRANSACTION_PROMOTION AS
+WITH promo_jours AS (
+    SELECT p.promotion_id, p.region, c.jour
+    FROM PROMOTIONS_CLEAN p
+    JOIN CALENDRIER_INTERVALLES c
+        ON c.jour BETWEEN p.start_date AND p.end_date
+)
+SELECT
+    ft.transaction_id,
+    pj.promotion_id
+FROM FINANCIAL_TRANSACTIONS_CLEAN ft
+JOIN promo_jours pj
+    ON ft.region = pj.region
+    AND ft.transaction_date = pj.jour;
+
+
+-- BRIDGE_TRANSACTION_CAMPAIGN
+
+CREATE OR REPLACE TABLE BRIDGE_TRANSACTION_CAMPAIGN AS
+WITH campagne_jours AS (
+    SELECT mc.campaign_id, mc.region, c.jour
+    FROM MARKETING_CAMPAIGNS_CLEAN mc
+    JOIN CALENDRIER_INTERVALLES c
+        ON c.jour BETWEEN mc.start_date AND mc.end_date
+)
+SELECT
+    ft.transaction_id,
+    cj.campaign_id
+FROM FINANCIAL_TRANSACTIONS_CLEAN ft
+JOIN campagne_jours cj
+    ON ft.region = cj.region
+    AND ft.transaction_date = cj.jour;
+
+
+-- VÉRIFICATIONS
+
+-- Volumes des bridges
+SELECT 'BRIDGE_TRANSACTION_PROMOTION' AS TABLE_NAME, COUNT(*) AS ROW_COUNT FROM BRIDGE_TRANSACTION_PROMOTION
+UNION ALL
+SELECT 'BRIDGE_TRANSACTION_CAMPAIGN', COUNT(*) FROM BRIDGE_TRANSACTION_CAMPAIGN;
+
+-- Contrôle : même nombre de couples que la jointure par intervalle d'origine
+SELECT
+    (SELECT COUNT(*) FROM BRIDGE_TRANSACTION_PROMOTION) AS couples_bridge,
+    (SELECT COUNT(*)
+     FROM FINANCIAL_TRANSACTIONS_CLEAN ft
+     JOIN PROMOTIONS_CLEAN p
+         ON ft.transaction_date BETWEEN p.start_date AND p.end_date
+         AND ft.region = p.region) AS couples_jointure_intervalle;
@@ -0,0 +1,237 @@
+-- ============================================================================
+-- RAFRAÎCHISSEMENT INCRÉMENTAL DE FINANCIAL_TRANSACTIONS_CLEAN
+-- Remplace, pour les exécutions quotidiennes, le CREATE OR REPLACE de
+-- 3 Nettoyage SILVER.sql (qui relit tout le bronze à chaque fois)
+-- ============================================================================
+--
+-- Principe :
+--   1. Un high-water mark (dernière TRANSACTION_DATE intégrée) est conservé
+--      dans PIPELINE_WATERMARKS.
+--   2. Seules les lignes bronze dont la date est >= high-water mark - N jours
+--      (fenêtre de rattrapage pour les arrivées tardives) sont relues.
+--   3. Elles passent par les MÊMES règles que le nettoyage complet
+--      (valeurs critiques non nulles, montant != 0, ABS(amount), dédoublonnage
+--      sur TRANSACTION_ID en gardant la date la plus ancienne) puis sont
+--      fusionnées par MERGE dans SILVER.
+--   4. Réconciliation sur la fenêtre seulement : le nombre de lignes SILVER
+--      datées de la fenêtre doit être égal au nombre de TRANSACTION_ID
+--      distincts valides du bronze dans la même fenêtre (lecture limitée aux
+--      micro-partitions de la fenêtre, pas de scan complet du bronze). En cas
+--      d'écart (suppression en bronze, doublon de part et d'autre du début de
+--      la fenêtre...), on bascule sur la reconstruction complète.
+--   5. Réconciliation complète (tout le bronze) : procédure séparée
+--      RECONCILE_FINANCIAL_TRANSACTIONS_CLEAN, à planifier (hebdomadaire) ou
+--      à lancer à la demande ; elle seule détecte les lignes arrivées avant
+--      la fenêtre.
+--
+-- Utilisation :
+--   CALL REFRESH_FINANCIAL_TRANSACTIONS_CLEAN(FALSE, 3);   -- incrémental
+--   CALL REFRESH_FINANCIAL_TRANSACTIONS_CLEAN(TRUE, 0);    -- reconstruction complète
+--   CALL RECONCILE_FINANCIAL_TRANSACTIONS_CLEAN();         -- contrôle complet (planifié)
+
+USE SCHEMA ANYCOMPANY_LAB.SILVER;
+
+
+-- Table de contrôle des high-water marks (une ligne par table SILVER)
+CREATE TABLE IF NOT EXISTS PIPELINE_WATERMARKS (
+    TABLE_NAME          VARCHAR,
+    HIGH_WATER_MARK     DATE,
+    LAST_MODE           VARCHAR,
+    LAST_ROWS_MERGED    NUMBER,
+    SILVER_ROW_COUNT    NUMBER,
+    BRONZE_ROW_COUNT    NUMBER,
+    UPDATED_AT          TIMESTAMP_LTZ
+);
+
+
+-- Reconstruction complète (identique à 3 Nettoyage SILVER.sql)
+CREATE OR REPLACE PROCEDURE REBUILD_FINANCIAL_TRANSACTIONS_CLEAN()
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+BEGIN
+    CREATE OR REPLACE TABLE FINANCIAL_TRANSACTIONS_CLEAN AS
+    SELECT
+        TRANSACTION_ID,
+        TRANSACTION_DATE,
+        TRANSACTION_TYPE,
+        -- Montants positifs uniquement
+        ABS(AMOUNT) AS AMOUNT,
+        PAYMENT_METHOD,
+        ENTITY,
+        REGION,
+        ACCOUNT_CODE
+    FROM BRONZE.FINANCIAL_TRANSACTIONS
+    WHERE
+        TRANSACTION_ID IS NOT NULL
+        AND TRANSACTION_DATE IS NOT NULL
+        AND AMOUNT IS NOT NULL
+        AND AMOUNT != 0
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY TRANSACTION_ID ORDER BY TRANSACTION_DATE) = 1;
+    RETURN 'FULL';
+END;
+$$;
+
+
+-- Rafraîchissement incrémental avec repli sur reconstruction complète
+CREATE OR REPLACE PROCEDURE REFRESH_FINANCIAL_TRANSACTIONS_CLEAN(FULL_REFRESH BOOLEAN, LOOKBACK_DAYS NUMBER)
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    hwm DATE;
+    window_start DATE;
+    refresh_mode VARCHAR DEFAULT 'INCREMENTAL';
+    rows_merged NUMBER DEFAULT 0;
+    silver_count NUMBER;
+    bronze_count NUMBER;
+    silver_window NUMBER;
+BEGIN
+    SELECT MAX(HIGH_WATER_MARK) INTO :hwm
+    FROM PIPELINE_WATERMARKS
+    WHERE TABLE_NAME = 'FINANCIAL_TRANSACTIONS_CLEAN';
+
+    -- Premier passage ou reconstruction demandée
+    IF (FULL_REFRESH OR hwm IS NULL) THEN
+        CALL REBUILD_FINANCIAL_TRANSACTIONS_CLEAN();
+        refresh_mode := 'FULL';
+    ELSE
+        window_start := DATEADD(day, -:LOOKBACK_DAYS, :hwm);
+        MERGE INTO FINANCIAL_TRANSACTIONS_CLEAN t
+        USING (
+            SELECT
+                TRANSACTION_ID,
+                TRANSACTION_DATE,
+                TRANSACTION_TYPE,
+                ABS(AMOUNT) AS AMOUNT,
+                PAYMENT_METHOD,
+                ENTITY,
+                REGION,
+                ACCOUNT_CODE
+            FROM BRONZE.FINANCIAL_TRANSACTIONS
+            WHERE
+                TRANSACTION_ID IS NOT NULL
+                AND TRANSACTION_DATE IS NOT NULL
+                AND AMOUNT IS NOT NULL
+                AND AMOUNT != 0
+                -- Delta uniquement : au-delà du high-water mark moins la fenêtre de rattrapage
+                AND TRANSACTION_DATE >= :window_start
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY TRANSACTION_ID ORDER BY TRANSACTION_DATE) = 1
+        ) s
+        ON t.TRANSACTION_ID = s.TRANSACTION_ID
+        -- Même règle que le QUALIFY global : on garde l'occurrence la plus ancienne
+        WHEN MATCHED AND s.TRANSACTION_DATE < t.TRANSACTION_DATE THEN UPDATE SET
+            TRANSACTION_DATE = s.TRANSACTION_DATE,
+            TRANSACTION_TYPE = s.TRANSACTION_TYPE,
+            AMOUNT = s.AMOUNT,
+            PAYMENT_METHOD = s.PAYMENT_METHOD,
+            ENTITY = s.ENTITY,
+            REGION = s.REGION,
+            ACCOUNT_CODE = s.ACCOUNT_CODE
+        WHEN NOT MATCHED THEN INSERT (
+            TRANSACTION_ID, TRANSACTION_DATE, TRANSACTION_TYPE, AMOUNT,
+            PAYMENT_METHOD, ENTITY, REGION, ACCOUNT_CODE
+        ) VALUES (
+            s.TRANSACTION_ID, s.TRANSACTION_DATE, s.TRANSACTION_TYPE, s.AMOUNT,
+            s.PAYMENT_METHOD, s.ENTITY, s.REGION, s.ACCOUNT_CODE
+        );
+        rows_merged := SQLROWCOUNT;
+    END IF;
+
+    -- Réconciliation des volumes SILVER / bronze sur la fenêtre uniquement
+    -- (contrôle complet : RECONCILE_FINANCIAL_TRANSACTIONS_CLEAN)
+    IF (refresh_mode = 'INCREMENTAL') THEN
+        SELECT COUNT(*) INTO :silver_window
+        FROM FINANCIAL_TRANSACTIONS_CLEAN
+        WHERE TRANSACTION_DATE >= :window_start;
+        SELECT COUNT(DISTINCT TRANSACTION_ID) INTO :bronze_count
+        FROM BRONZE.FINANCIAL_TRANSACTIONS
+        WHERE
+            TRANSACTION_ID IS NOT NULL
+            AND TRANSACTION_DATE IS NOT NULL
+            AND AMOUNT IS NOT NULL
+            AND AMOUNT != 0
+            AND TRANSACTION_DATE >= :window_start;
+
+        IF (silver_window <> bronze_count) THEN
+            CALL REBUILD_FINANCIAL_TRANSACTIONS_CLEAN();
+            refresh_mode := 'FULL (reconciliation)';
+        END IF;
+    END IF;
+
+    -- COUNT(*) sans filtre : lu dans les métadonnées de la table, sans scan
+    SELECT COUNT(*) INTO :silver_count FROM FINANCIAL_TRANSACTIONS_CLEAN;
+
+    -- Mise à jour du high-water mark
+    -- (BRONZE_ROW_COUNT = transactions bronze valides de la fenêtre, NULL en reconstruction demandée)
+    MERGE INTO PIPELINE_WATERMARKS w
+    USING (
+        SELECT
+            'FINANCIAL_TRANSACTIONS_CLEAN' AS TABLE_NAME,
+            MAX(TRANSACTION_DATE) AS HIGH_WATER_MARK
+        FROM FINANCIAL_TRANSACTIONS_CLEAN
+    ) s
+    ON w.TABLE_NAME = s.TABLE_NAME
+    WHEN MATCHED THEN UPDATE SET
+        HIGH_WATER_MARK = s.HIGH_WATER_MARK,
+        LAST_MODE = :refresh_mode,
+        LAST_ROWS_MERGED = :rows_merged,
+        SILVER_ROW_COUNT = :silver_count,
+        BRONZE_ROW_COUNT = :bronze_count,
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        TABLE_NAME, HIGH_WATER_MARK, LAST_MODE, LAST_ROWS_MERGED,
+        SILVER_ROW_COUNT, BRONZE_ROW_COUNT, UPDATED_AT
+    ) VALUES (
+        s.TABLE_NAME, s.HIGH_WATER_MARK, :refresh_mode, :rows_merged,
+        :silver_count, :bronze_count, CURRENT_TIMESTAMP()
+    );
+
+    RETURN refresh_mode || ' : ' || rows_merged || ' lignes fusionnées, '
+        || silver_count || ' lignes SILVER'
+        || IFF(silver_window IS NULL, '', ' (fenêtre : ' || silver_window || ' / ' || bronze_count || ' attendues)');
+END;
+$$;
+
+
+-- Réconciliation complète SILVER / bronze (scan de tout le bronze) :
+-- à planifier hors de l'exécution quotidienne, ou à lancer à la demande
+CREATE OR REPLACE PROCEDURE RECONCILE_FINANCIAL_TRANSACTIONS_CLEAN()
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    silver_count NUMBER;
+    bronze_count NUMBER;
+BEGIN
+    SELECT COUNT(*) INTO :silver_count FROM FINANCIAL_TRANSACTIONS_CLEAN;
+    SELECT COUNT(DISTINCT TRANSACTION_ID) INTO :bronze_count
+    FROM BRONZE.FINANCIAL_TRANSACTIONS
+    WHERE
+        TRANSACTION_ID IS NOT NULL
+        AND TRANSACTION_DATE IS NOT NULL
+        AND AMOUNT IS NOT NULL
+        AND AMOUNT != 0;
+
+    IF (silver_count = bronze_count) THEN
+        RETURN 'OK : ' || silver_count || ' lignes SILVER / ' || bronze_count || ' attendues';
+    END IF;
+    -- Écart : reconstruction complète (high-water mark et bilan mis à jour)
+    CALL REFRESH_FINANCIAL_TRANSACTIONS_CLEAN(TRUE, 0);
+    RETURN 'Écart ' || silver_count || ' / ' || bronze_count || ' : reconstruction complète';
+END;
+$$;
+
+
+-- EXÉCUTION QUOTIDIENNE
+
+CALL REFRESH_FINANCIAL_TRANSACTIONS_CLEAN(FALSE, 3);
+
+
+-- VÉRIFICATIONS
+
+-- Dernier passage : mode, volumes et high-water mark
+SELECT * FROM PIPELINE_WATERMARKS WHERE TABLE_NAME = 'FINANCIAL_TRANSACTIONS_CLEAN';
@@ -0,0 +1,73 @@
+-- ============================================================================
+-- VERSIONS DES TABLES POUR LE CACHE DES DASHBOARDS
+-- A exécuter en fin de pipeline (après 3c et à chaque reconstruction) ; les
+-- scripts des Phases 3.1b / 3.2b l'appellent après leur rafraîchissement
+-- ============================================================================
+--
+-- Les dashboards gardent leurs résultats en cache Parquet sur disque
+-- (Streamlit/core/result_cache.py) avec, dans la clé, la version des tables
+-- lues. Une version n'augmente que lorsque la table a réellement changé
+-- (LAST_ALTERED d'INFORMATION_SCHEMA, mis à jour par tout DML / DDL) :
+-- le cache reste valide entre deux exécutions du pipeline, même après un
+-- redémarrage de Streamlit, au lieu d'expirer toutes les 10 minutes.
+
+USE SCHEMA ANYCOMPANY_LAB.SILVER;
+
+
+CREATE TABLE IF NOT EXISTS TABLE_VERSIONS (
+    TABLE_SCHEMA        VARCHAR,
+    TABLE_NAME          VARCHAR,
+    VERSION             NUMBER,
+    LAST_ALTERED        TIMESTAMP_LTZ,
+    ROW_COUNT           NUMBER,
+    UPDATED_AT          TIMESTAMP_LTZ
+);
+
+
+CREATE OR REPLACE PROCEDURE STAMP_TABLE_VERSIONS()
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    nb_changes NUMBER DEFAULT 0;
+BEGIN
+    MERGE INTO ANYCOMPANY_LAB.SILVER.TABLE_VERSIONS v
+    USING (
+        SELECT table_schema, table_name, last_altered, row_count
+        FROM ANYCOMPANY_LAB.INFORMATION_SCHEMA.TABLES
+        WHERE table_schema IN ('SILVER', 'ANALYTICS', 'GOLD')
+            AND table_type = 'BASE TABLE'
+            AND table_name <> 'TABLE_VERSIONS'
+    ) t
+    ON v.table_schema = t.table_schema AND v.table_name = t.table_name
+    WHEN MATCHED AND v.last_altered <> t.last_altered THEN UPDATE SET
+        VERSION = v.version + 1,
+        LAST_ALTERED = t.last_altered,
+        ROW_COUNT = t.row_count,
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        TABLE_SCHEMA, TABLE_NAME, VERSION, LAST_ALTERED, ROW_COUNT, UPDATED_AT
+    ) VALUES (
+        t.table_schema, t.table_name, 1, t.last_altered, t.row_count, CURRENT_TIMESTAMP()
+    );
+    nb_changes := SQLROWCOUNT;
+
+    -- Tables supprimées : plus de version, les résultats en cache expirent
+    DELETE FROM ANYCOMPANY_LAB.SILVER.TABLE_VERSIONS v
+    WHERE NOT EXISTS (
+        SELECT 1 FROM ANYCOMPANY_LAB.INFORMATION_SCHEMA.TABLES t
+        WHERE t.table_schema = v.table_schema AND t.table_name = v.table_name
+    );
+
+    RETURN nb_changes || ' tables nouvelles ou modifiées';
+END;
+$$;
+
+
+CALL STAMP_TABLE_VERSIONS();
+
+
+-- VÉRIFICATIONS
+
+SELECT * FROM TABLE_VERSIONS ORDER BY UPDATED_AT DESC, TABLE_SCHEMA, TABLE_NAME;
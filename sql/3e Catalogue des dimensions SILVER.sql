@@ -0,0 +1,63 @@
+-- ============================================================================
+-- CATALOGUE DES VALEURS DE DIMENSIONS POUR LES FILTRES DES DASHBOARDS
+-- A exécuter après 3c Rafraîchissement incrémental SILVER.sql et 3d (versions)
+-- ============================================================================
+--
+-- Les sidebars des dashboards listaient leurs valeurs de filtres par des
+-- SELECT DISTINCT sur les tables SILVER à chaque cache froid. Le pipeline
+-- écrit ici, une fois par exécution, un catalogue compact : une ligne par
+-- combinaison de valeurs des dimensions filtrables d'une table, avec son
+-- nombre de lignes. Les dashboards le lisent une fois par processus
+-- (Streamlit/core/catalog.py) et en déduisent :
+--   - les valeurs de chaque filtre et leur nombre de lignes ;
+--   - les filtres dépendants (ex. régions ayant des promotions dans la
+--     catégorie choisie), par simple filtrage du catalogue.
+--
+-- Dimensions par table (colonnes NULL pour les dimensions absentes) :
+--   PROMOTIONS_CLEAN            product_category x region
+--   MARKETING_CAMPAIGNS_CLEAN   campaign_type x target_audience x region
+--
+-- Reconstruit en entier (quelques centaines de lignes au plus).
+
+USE SCHEMA ANYCOMPANY_LAB.SILVER;
+
+
+CREATE OR REPLACE TABLE DIMENSION_CATALOG AS
+SELECT
+    'PROMOTIONS_CLEAN' AS table_name,
+    product_category,
+    CAST(NULL AS VARCHAR) AS campaign_type,
+    CAST(NULL AS VARCHAR) AS target_audience,
+    region,
+    COUNT(*) AS row_count
+FROM PROMOTIONS_CLEAN
+GROUP BY product_category, region
+UNION ALL
+SELECT
+    'MARKETING_CAMPAIGNS_CLEAN' AS table_name,
+    CAST(NULL AS VARCHAR) AS product_category,
+    campaign_type,
+    target_audience,
+    region,
+    COUNT(*) AS row_count
+FROM MARKETING_CAMPAIGNS_CLEAN
+GROUP BY campaign_type, target_audience, region;
+
+
+-- Nouvelle version du catalogue pour le cache des dashboards (sql/3d)
+CALL STAMP_TABLE_VERSIONS();
+
+
+-- VÉRIFICATIONS
+
+-- Lignes et valeurs par table
+SELECT
+    table_name,
+    COUNT(*) AS combinaisons,
+    SUM(row_count) AS lignes_couvertes,
+    COUNT(DISTINCT product_category) AS categories,
+    COUNT(DISTINCT campaign_type) AS types_campagne,
+    COUNT(DISTINCT target_audience) AS audiences,
+    COUNT(DISTINCT region) AS regions
+FROM DIMENSION_CATALOG
+GROUP BY table_name;
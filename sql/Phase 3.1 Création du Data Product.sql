@@ -14,7 +14,11 @@ USE SCHEMA ANYCOMPANY_LAB.ANALYTICS;
 -- On met toutes les ventes avec les infos des promos et campagnes
 -- ============================================================================
 
-CREATE OR REPLACE TABLE VENTES_ENRICHIES AS
+-- La logique d'enrichissement est portée par une vue : la table est créée
+-- ici en une fois, puis maintenue par morceaux (nouvelles transactions,
+-- tranches date x région touchées par une promo / campagne modifiée) par
+-- sql/Phase 3.1b Rafraîchissement incrémental VENTES_ENRICHIES.sql
+CREATE OR REPLACE VIEW VENTES_ENRICHIES_SOURCE AS
 SELECT 
     -- Infos de base de la transaction
     ft.transaction_id,
@@ -58,13 +62,21 @@ SELECT
 
 FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN ft
 
+-- Rattachement promo / campagne via les bridges précalculés
+-- (sql/3b Bridges intervalles SILVER.sql) : équi-jointures sur les ids
+-- au lieu de ft.transaction_date BETWEEN start_date AND end_date
+LEFT JOIN ANYCOMPANY_LAB.SILVER.BRIDGE_TRANSACTION_PROMOTION bp
+    ON bp.transaction_id = ft.transaction_id
 LEFT JOIN ANYCOMPANY_LAB.SILVER.PROMOTIONS_CLEAN p 
-    ON ft.transaction_date BETWEEN p.start_date AND p.end_date
-    AND ft.region = p.region
+    ON p.promotion_id = bp.promotion_id
 
+LEFT JOIN ANYCOMPANY_LAB.SILVER.BRIDGE_TRANSACTION_CAMPAIGN bc
+    ON bc.transaction_id = ft.transaction_id
 LEFT JOIN ANYCOMPANY_LAB.SILVER.MARKETING_CAMPAIGNS_CLEAN mc 
-    ON ft.transaction_date BETWEEN mc.start_date AND mc.end_date
-    AND ft.region = mc.region;
+    ON mc.campaign_id = bc.campaign_id;
+
+CREATE OR REPLACE TABLE VENTES_ENRICHIES AS
+SELECT * FROM VENTES_ENRICHIES_SOURCE;
 
 
 -- ===== VERIFICATIONS TABLE 1 =====
@@ -0,0 +1,249 @@
+-- ============================================================================
+-- RAFRAÎCHISSEMENT INCRÉMENTAL DE VENTES_ENRICHIES
+-- A exécuter après 3c Rafraîchissement incrémental SILVER.sql, à la place de
+-- la reconstruction complète de la table 1 de la Phase 3.1
+-- ============================================================================
+--
+-- Principe :
+--   1. Transactions nouvelles : celles dont la date est >= high-water mark
+--      moins N jours (même fenêtre de rattrapage que 3c) sont ré-enrichies.
+--   2. Promotions / campagnes modifiées : une photo (id, région, bornes,
+--      hash de la ligne) de PROMOTIONS_CLEAN et MARKETING_CAMPAIGNS_CLEAN est
+--      conservée dans VENTES_ENRICHIES_REF_INTERVALLES. Toute ligne ajoutée,
+--      supprimée ou modifiée depuis le dernier passage désigne une tranche
+--      date x région (anciennes ET nouvelles bornes) à recalculer.
+--   3. Pour ces seules transactions : les lignes des bridges (3b) sont
+--      recalculées par jointure d'intervalle sur le delta, puis les lignes de
+--      VENTES_ENRICHIES sont supprimées et réinsérées depuis la vue
+--      VENTES_ENRICHIES_SOURCE (même logique que la Phase 3.1).
+--   4. Réconciliation : chaque transaction SILVER doit apparaître dans
+--      VENTES_ENRICHIES. Les écarts (transaction arrivée hors fenêtre,
+--      reconstruction complète de SILVER...) sont réparés par anti-jointure,
+--      avec repli sur la reconstruction complète s'il en reste.
+--
+-- Le coût d'un passage quotidien dépend donc du delta du jour et des
+-- tranches modifiées, plus de la profondeur d'historique.
+--
+-- Utilisation :
+--   CALL REFRESH_VENTES_ENRICHIES(FALSE, 3);   -- incrémental
+--   CALL REFRESH_VENTES_ENRICHIES(TRUE, 0);    -- reconstruction complète
+
+USE SCHEMA ANYCOMPANY_LAB.ANALYTICS;
+
+
+-- Photo des intervalles promo / campagne lors du dernier passage
+CREATE TABLE IF NOT EXISTS VENTES_ENRICHIES_REF_INTERVALLES (
+    SOURCE              VARCHAR,
+    ID                  VARCHAR,
+    REGION              VARCHAR,
+    START_DATE          DATE,
+    END_DATE            DATE,
+    ROW_HASH            NUMBER
+);
+
+-- Transactions recalculées au dernier passage (lue par phase 3.2b_FEATURES_CLIENTS_INCREMENTAL.sql) :
+-- ANCIEN_CLIENT est NULL pour une transaction enrichie pour la première fois
+CREATE TRANSIENT TABLE IF NOT EXISTS VENTES_ENRICHIES_DELTA (
+    TRANSACTION_ID      VARCHAR,
+    ANCIEN_CLIENT       VARCHAR
+);
+
+
+CREATE OR REPLACE PROCEDURE REFRESH_VENTES_ENRICHIES(FULL_REFRESH BOOLEAN, LOOKBACK_DAYS NUMBER)
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    hwm DATE;
+    refresh_mode VARCHAR DEFAULT 'INCREMENTAL';
+    nb_tranches NUMBER DEFAULT 0;
+    nb_transactions NUMBER DEFAULT 0;
+    enriched_count NUMBER;
+    source_count NUMBER;
+BEGIN
+    SELECT MAX(HIGH_WATER_MARK) INTO :hwm
+    FROM ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS
+    WHERE TABLE_NAME = 'VENTES_ENRICHIES';
+
+    -- Intervalles actuels, au même format que la photo
+    CREATE OR REPLACE TEMPORARY TABLE VE_INTERVALLES_ACTUELS AS
+    SELECT 'PROMOTION' AS SOURCE, promotion_id::VARCHAR AS ID, region, start_date, end_date, row_hash
+    FROM (SELECT *, HASH(*) AS row_hash FROM ANYCOMPANY_LAB.SILVER.PROMOTIONS_CLEAN)
+    UNION ALL
+    SELECT 'CAMPAGNE', campaign_id::VARCHAR, region, start_date, end_date, row_hash
+    FROM (SELECT *, HASH(*) AS row_hash FROM ANYCOMPANY_LAB.SILVER.MARKETING_CAMPAIGNS_CLEAN);
+
+    -- Premier passage ou reconstruction demandée
+    IF (FULL_REFRESH OR hwm IS NULL) THEN
+        CREATE OR REPLACE TABLE VENTES_ENRICHIES AS
+        SELECT * FROM VENTES_ENRICHIES_SOURCE;
+        DELETE FROM VENTES_ENRICHIES_DELTA;
+        refresh_mode := 'FULL';
+    ELSE
+        -- 1. Tranches date x région touchées par un ajout / une suppression /
+        --    une modification (différence symétrique avec la photo)
+        CREATE OR REPLACE TEMPORARY TABLE VE_TRANCHES_MODIFIEES AS
+        SELECT DISTINCT region, start_date, end_date
+        FROM (
+            (SELECT * FROM VE_INTERVALLES_ACTUELS
+             EXCEPT
+             SELECT * FROM VENTES_ENRICHIES_REF_INTERVALLES)
+            UNION ALL
+            (SELECT * FROM VENTES_ENRICHIES_REF_INTERVALLES
+             EXCEPT
+             SELECT * FROM VE_INTERVALLES_ACTUELS)
+        );
+        SELECT COUNT(*) INTO :nb_tranches FROM VE_TRANCHES_MODIFIEES;
+
+        -- 2. Transactions à recalculer : delta du jour + tranches modifiées
+        CREATE OR REPLACE TEMPORARY TABLE VE_TRANSACTIONS_A_RECALCULER (
+            TRANSACTION_ID VARCHAR
+        );
+
+        INSERT INTO VE_TRANSACTIONS_A_RECALCULER
+        SELECT ft.transaction_id
+        FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN ft
+        WHERE ft.transaction_date >= DATEADD(day, -:LOOKBACK_DAYS, :hwm)
+        UNION
+        SELECT ft.transaction_id
+        FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN ft
+        JOIN VE_TRANCHES_MODIFIEES t
+            ON ft.region = t.region
+            AND ft.transaction_date BETWEEN t.start_date AND t.end_date;
+
+        -- Réconciliation : transactions SILVER absentes de VENTES_ENRICHIES
+        SELECT COUNT(DISTINCT transaction_id) INTO :enriched_count FROM VENTES_ENRICHIES;
+        SELECT COUNT(*) INTO :source_count FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN;
+
+        IF (enriched_count <> source_count) THEN
+            INSERT INTO VE_TRANSACTIONS_A_RECALCULER
+            SELECT ft.transaction_id
+            FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN ft
+            WHERE NOT EXISTS (
+                SELECT 1 FROM VENTES_ENRICHIES v WHERE v.transaction_id = ft.transaction_id
+            );
+
+            -- Transactions disparues de SILVER
+            INSERT INTO VE_TRANSACTIONS_A_RECALCULER
+            SELECT DISTINCT v.transaction_id
+            FROM VENTES_ENRICHIES v
+            WHERE NOT EXISTS (
+                SELECT 1 FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN ft
+                WHERE ft.transaction_id = v.transaction_id
+            );
+            refresh_mode := 'INCREMENTAL (réconciliation)';
+        END IF;
+
+        SELECT COUNT(DISTINCT transaction_id) INTO :nb_transactions FROM VE_TRANSACTIONS_A_RECALCULER;
+
+        -- 3. Bridges : jointure d'intervalle limitée aux transactions du delta
+        DELETE FROM ANYCOMPANY_LAB.SILVER.BRIDGE_TRANSACTION_PROMOTION
+        WHERE transaction_id IN (SELECT transaction_id FROM VE_TRANSACTIONS_A_RECALCULER);
+
+        INSERT INTO ANYCOMPANY_LAB.SILVER.BRIDGE_TRANSACTION_PROMOTION (transaction_id, promotion_id)
+        SELECT ft.transaction_id, p.promotion_id
+        FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN ft
+        JOIN (SELECT DISTINCT transaction_id FROM VE_TRANSACTIONS_A_RECALCULER) r
+            ON r.transaction_id = ft.transaction_id
+        JOIN ANYCOMPANY_LAB.SILVER.PROMOTIONS_CLEAN p
+            ON ft.region = p.region
+            AND ft.transaction_date BETWEEN p.start_date AND p.end_date;
+
+        DELETE FROM ANYCOMPANY_LAB.SILVER.BRIDGE_TRANSACTION_CAMPAIGN
+        WHERE transaction_id IN (SELECT transaction_id FROM VE_TRANSACTIONS_A_RECALCULER);
+
+        INSERT INTO ANYCOMPANY_LAB.SILVER.BRIDGE_TRANSACTION_CAMPAIGN (transaction_id, campaign_id)
+        SELECT ft.transaction_id, mc.campaign_id
+        FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN ft
+        JOIN (SELECT DISTINCT transaction_id FROM VE_TRANSACTIONS_A_RECALCULER) r
+            ON r.transaction_id = ft.transaction_id
+        JOIN ANYCOMPANY_LAB.SILVER.MARKETING_CAMPAIGNS_CLEAN mc
+            ON ft.region = mc.region
+            AND ft.transaction_date BETWEEN mc.start_date AND mc.end_date;
+
+        -- Journal du delta, avec le client d'avant recalcul
+        DELETE FROM VENTES_ENRICHIES_DELTA;
+        INSERT INTO VENTES_ENRICHIES_DELTA
+        SELECT r.transaction_id, MAX(v.client)
+        FROM (SELECT DISTINCT transaction_id FROM VE_TRANSACTIONS_A_RECALCULER) r
+        LEFT JOIN VENTES_ENRICHIES v ON v.transaction_id = r.transaction_id
+        GROUP BY r.transaction_id;
+
+        -- 4. Remplacement des lignes enrichies correspondantes
+        DELETE FROM VENTES_ENRICHIES
+        WHERE transaction_id IN (SELECT transaction_id FROM VE_TRANSACTIONS_A_RECALCULER);
+
+        INSERT INTO VENTES_ENRICHIES
+        SELECT s.*
+        FROM VENTES_ENRICHIES_SOURCE s
+        WHERE s.transaction_id IN (SELECT transaction_id FROM VE_TRANSACTIONS_A_RECALCULER);
+    END IF;
+
+    -- Contrôle final, repli sur la reconstruction complète si écart persistant
+    SELECT COUNT(DISTINCT transaction_id) INTO :enriched_count FROM VENTES_ENRICHIES;
+    SELECT COUNT(*) INTO :source_count FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN;
+
+    IF (enriched_count <> source_count AND refresh_mode <> 'FULL') THEN
+        CREATE OR REPLACE TABLE VENTES_ENRICHIES AS
+        SELECT * FROM VENTES_ENRICHIES_SOURCE;
+        DELETE FROM VENTES_ENRICHIES_DELTA;
+        refresh_mode := 'FULL (reconciliation)';
+        SELECT COUNT(DISTINCT transaction_id) INTO :enriched_count FROM VENTES_ENRICHIES;
+    END IF;
+
+    -- Nouvelle photo des intervalles
+    DELETE FROM VENTES_ENRICHIES_REF_INTERVALLES;
+    INSERT INTO VENTES_ENRICHIES_REF_INTERVALLES SELECT * FROM VE_INTERVALLES_ACTUELS;
+
+    -- Mise à jour du high-water mark
+    -- (SILVER_ROW_COUNT = transactions enrichies, BRONZE_ROW_COUNT = transactions SILVER)
+    MERGE INTO ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS w
+    USING (
+        SELECT
+            'VENTES_ENRICHIES' AS TABLE_NAME,
+            MAX(transaction_date) AS HIGH_WATER_MARK
+        FROM VENTES_ENRICHIES
+    ) s
+    ON w.TABLE_NAME = s.TABLE_NAME
+    WHEN MATCHED THEN UPDATE SET
+        HIGH_WATER_MARK = s.HIGH_WATER_MARK,
+        LAST_MODE = :refresh_mode,
+        LAST_ROWS_MERGED = :nb_transactions,
+        SILVER_ROW_COUNT = :enriched_count,
+        BRONZE_ROW_COUNT = :source_count,
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        TABLE_NAME, HIGH_WATER_MARK, LAST_MODE, LAST_ROWS_MERGED,
+        SILVER_ROW_COUNT, BRONZE_ROW_COUNT, UPDATED_AT
+    ) VALUES (
+        s.TABLE_NAME, s.HIGH_WATER_MARK, :refresh_mode, :nb_transactions,
+        :enriched_count, :source_count, CURRENT_TIMESTAMP()
+    );
+
+    RETURN refresh_mode || ' : ' || nb_transactions || ' transactions recalculées ('
+        || nb_tranches || ' tranches promo / campagne modifiées), '
+        || enriched_count || ' transactions enrichies / ' || source_count || ' attendues';
+END;
+$$;
+
+
+-- EXÉCUTION QUOTIDIENNE
+
+CALL REFRESH_VENTES_ENRICHIES(FALSE, 3);
+
+-- Nouvelles versions de tables pour le cache des dashboards (sql/3d)
+CALL ANYCOMPANY_LAB.SILVER.STAMP_TABLE_VERSIONS();
+
+
+-- VÉRIFICATIONS
+
+-- Dernier passage : mode, volumes et high-water mark
+SELECT * FROM ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS WHERE TABLE_NAME = 'VENTES_ENRICHIES';
+
+-- Contrôle : aucune transaction SILVER sans ligne enrichie
+SELECT COUNT(*) AS transactions_manquantes
+FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN ft
+WHERE NOT EXISTS (
+    SELECT 1 FROM VENTES_ENRICHIES v WHERE v.transaction_id = ft.transaction_id
+);
@@ -0,0 +1,171 @@
+-- ============================================================================
+-- PHASE 3.1c – ROLLUPS GOLD JOUR x RÉGION
+-- A exécuter après 3c Rafraîchissement incrémental SILVER.sql (SILVER à jour)
+-- ============================================================================
+--
+-- Deux agrégats additifs de FINANCIAL_TRANSACTIONS_CLEAN :
+--   ROLLUP_VENTES_JOUR_REGION_PAIEMENT   grain jour x région x moyen de paiement
+--   ROLLUP_VENTES_JOUR_REGION            grain jour x région (dérivé du précédent)
+-- avec, par ligne : nombre de transactions, somme, somme des carrés, minimum
+-- et maximum des montants. Sommes, moyennes, écarts-types et comptages par
+-- mois, trimestre, jour de semaine ou région s'en déduisent exactement :
+-- les dashboards y redirigent automatiquement les requêtes éligibles
+-- (Streamlit/core/rollups.py) au lieu de parcourir les transactions.
+--
+-- Rafraîchissement : les jours >= high-water mark moins N jours (même
+-- fenêtre de rattrapage que 3c) sont supprimés puis recalculés. Si les
+-- totaux (nombre et somme des montants) divergent ensuite de SILVER
+-- (transaction modifiée hors fenêtre, reconstruction de SILVER...), bascule
+-- sur la reconstruction complète.
+--
+-- Utilisation :
+--   CALL REFRESH_ROLLUPS_VENTES(FALSE, 3);   -- incrémental
+--   CALL REFRESH_ROLLUPS_VENTES(TRUE, 0);    -- reconstruction complète
+
+CREATE SCHEMA IF NOT EXISTS ANYCOMPANY_LAB.GOLD;
+USE SCHEMA ANYCOMPANY_LAB.GOLD;
+
+
+-- Grain le plus fin, calculé depuis les transactions
+CREATE OR REPLACE VIEW ROLLUP_VENTES_JOUR_REGION_PAIEMENT_SOURCE AS
+SELECT
+    transaction_date,
+    region,
+    payment_method,
+    COUNT(*) AS nb_transactions,
+    SUM(amount) AS sum_amount,
+    SUM(amount * amount) AS sum_amount_sq,
+    MIN(amount) AS min_amount,
+    MAX(amount) AS max_amount
+FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN
+GROUP BY transaction_date, region, payment_method;
+
+CREATE TABLE IF NOT EXISTS ROLLUP_VENTES_JOUR_REGION_PAIEMENT AS
+SELECT * FROM ROLLUP_VENTES_JOUR_REGION_PAIEMENT_SOURCE;
+
+
+-- Grain jour x région : ré-agrégation du grain fin (toutes les mesures sont additives)
+CREATE OR REPLACE VIEW ROLLUP_VENTES_JOUR_REGION_SOURCE AS
+SELECT
+    transaction_date,
+    region,
+    SUM(nb_transactions) AS nb_transactions,
+    SUM(sum_amount) AS sum_amount,
+    SUM(sum_amount_sq) AS sum_amount_sq,
+    MIN(min_amount) AS min_amount,
+    MAX(max_amount) AS max_amount
+FROM ROLLUP_VENTES_JOUR_REGION_PAIEMENT
+GROUP BY transaction_date, region;
+
+CREATE TABLE IF NOT EXISTS ROLLUP_VENTES_JOUR_REGION AS
+SELECT * FROM ROLLUP_VENTES_JOUR_REGION_SOURCE;
+
+
+CREATE OR REPLACE PROCEDURE REFRESH_ROLLUPS_VENTES(FULL_REFRESH BOOLEAN, LOOKBACK_DAYS NUMBER)
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    hwm DATE;
+    from_date DATE;
+    refresh_mode VARCHAR DEFAULT 'INCREMENTAL';
+    nb_rows NUMBER DEFAULT 0;
+    rollup_count NUMBER;
+    source_count NUMBER;
+    rollup_amount NUMBER(38, 2);
+    source_amount NUMBER(38, 2);
+BEGIN
+    SELECT MAX(HIGH_WATER_MARK) INTO :hwm
+    FROM ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS
+    WHERE TABLE_NAME = 'ROLLUP_VENTES_JOUR_REGION';
+
+    IF (FULL_REFRESH OR hwm IS NULL) THEN
+        CREATE OR REPLACE TABLE ROLLUP_VENTES_JOUR_REGION_PAIEMENT AS
+        SELECT * FROM ROLLUP_VENTES_JOUR_REGION_PAIEMENT_SOURCE;
+        CREATE OR REPLACE TABLE ROLLUP_VENTES_JOUR_REGION AS
+        SELECT * FROM ROLLUP_VENTES_JOUR_REGION_SOURCE;
+        refresh_mode := 'FULL';
+    ELSE
+        -- Fenêtre de rattrapage : jours recalculés en entier
+        from_date := DATEADD(day, -:LOOKBACK_DAYS, :hwm);
+
+        DELETE FROM ROLLUP_VENTES_JOUR_REGION_PAIEMENT WHERE transaction_date >= :from_date;
+        INSERT INTO ROLLUP_VENTES_JOUR_REGION_PAIEMENT
+        SELECT * FROM ROLLUP_VENTES_JOUR_REGION_PAIEMENT_SOURCE
+        WHERE transaction_date >= :from_date;
+        nb_rows := SQLROWCOUNT;
+
+        DELETE FROM ROLLUP_VENTES_JOUR_REGION WHERE transaction_date >= :from_date;
+        INSERT INTO ROLLUP_VENTES_JOUR_REGION
+        SELECT * FROM ROLLUP_VENTES_JOUR_REGION_SOURCE
+        WHERE transaction_date >= :from_date;
+    END IF;
+
+    -- Réconciliation : mêmes totaux que SILVER, sinon reconstruction complète
+    SELECT COALESCE(SUM(nb_transactions), 0), COALESCE(SUM(sum_amount), 0)
+    INTO :rollup_count, :rollup_amount
+    FROM ROLLUP_VENTES_JOUR_REGION;
+    SELECT COUNT(*), COALESCE(SUM(amount), 0)
+    INTO :source_count, :source_amount
+    FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN;
+
+    IF ((rollup_count <> source_count OR rollup_amount <> source_amount) AND refresh_mode <> 'FULL') THEN
+        CREATE OR REPLACE TABLE ROLLUP_VENTES_JOUR_REGION_PAIEMENT AS
+        SELECT * FROM ROLLUP_VENTES_JOUR_REGION_PAIEMENT_SOURCE;
+        CREATE OR REPLACE TABLE ROLLUP_VENTES_JOUR_REGION AS
+        SELECT * FROM ROLLUP_VENTES_JOUR_REGION_SOURCE;
+        refresh_mode := 'FULL (réconciliation)';
+        SELECT COALESCE(SUM(nb_transactions), 0) INTO :rollup_count FROM ROLLUP_VENTES_JOUR_REGION;
+    END IF;
+
+    -- Mise à jour du high-water mark
+    -- (SILVER_ROW_COUNT = transactions couvertes par le rollup, BRONZE_ROW_COUNT = transactions SILVER)
+    MERGE INTO ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS w
+    USING (
+        SELECT
+            'ROLLUP_VENTES_JOUR_REGION' AS TABLE_NAME,
+            MAX(transaction_date) AS HIGH_WATER_MARK
+        FROM ROLLUP_VENTES_JOUR_REGION
+    ) s
+    ON w.TABLE_NAME = s.TABLE_NAME
+    WHEN MATCHED THEN UPDATE SET
+        HIGH_WATER_MARK = s.HIGH_WATER_MARK,
+        LAST_MODE = :refresh_mode,
+        LAST_ROWS_MERGED = :nb_rows,
+        SILVER_ROW_COUNT = :rollup_count,
+        BRONZE_ROW_COUNT = :source_count,
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        TABLE_NAME, HIGH_WATER_MARK, LAST_MODE, LAST_ROWS_MERGED,
+        SILVER_ROW_COUNT, BRONZE_ROW_COUNT, UPDATED_AT
+    ) VALUES (
+        s.TABLE_NAME, s.HIGH_WATER_MARK, :refresh_mode, :nb_rows,
+        :rollup_count, :source_count, CURRENT_TIMESTAMP()
+    );
+
+    RETURN refresh_mode || ' : ' || nb_rows || ' lignes jour x région x paiement recalculées, '
+        || rollup_count || ' transactions couvertes / ' || source_count || ' attendues';
+END;
+$$;
+
+
+-- EXÉCUTION QUOTIDIENNE
+
+CALL REFRESH_ROLLUPS_VENTES(FALSE, 3);
+
+-- Nouvelles versions de tables pour le cache des dashboards (sql/3d) :
+-- les rollups n'y figurent qu'une fois construits, ce qui active le routage
+CALL ANYCOMPANY_LAB.SILVER.STAMP_TABLE_VERSIONS();
+
+
+-- VÉRIFICATIONS
+
+-- Dernier passage : mode, volumes et high-water mark
+SELECT * FROM ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS WHERE TABLE_NAME = 'ROLLUP_VENTES_JOUR_REGION';
+
+-- Facteur de réduction : lignes lues par une requête routée vs transactions
+SELECT
+    (SELECT COUNT(*) FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN) AS transactions,
+    (SELECT COUNT(*) FROM ROLLUP_VENTES_JOUR_REGION_PAIEMENT) AS lignes_jour_region_paiement,
+    (SELECT COUNT(*) FROM ROLLUP_VENTES_JOUR_REGION) AS lignes_jour_region;
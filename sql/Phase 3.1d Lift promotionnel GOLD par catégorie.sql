@@ -0,0 +1,120 @@
+-- ============================================================================
+-- PHASE 3.1d – LIFT PROMOTIONNEL PAR CATÉGORIE (GOLD)
+-- A exécuter après 3b Bridges intervalles SILVER.sql (bridge à jour)
+-- ============================================================================
+--
+-- Table lue par les panneaux « Sensibilité des Catégories aux Promotions »
+-- et « Recommandations Stratégiques » du dashboard promotions. Elle
+-- remplace la requête du panneau, qui croisait toutes les transactions avec
+-- tout l'inventaire (CROSS JOIN, coût transactions x lignes d'inventaire)
+-- avant de chercher les transactions sans promotion de chaque catégorie.
+--
+-- Calcul en un passage linéaire sur BRIDGE_TRANSACTION_PROMOTION :
+--   - avec promotion : transactions couvertes par une promotion de la
+--     catégorie (agrégées depuis le bridge) ;
+--   - sans promotion : totaux de toutes les transactions MOINS ceux des
+--     transactions avec promotion de la catégorie (transaction_id unique et
+--     montant non nul en SILVER, cf. 3 Nettoyage SILVER.sql).
+-- Mêmes valeurs que l'ancienne requête : moyenne avec promotion pondérée
+-- par le nombre de promotions couvrant la transaction, moyennes arrondies
+-- à 2 décimales avant le calcul du lift, mêmes seuils de classification.
+--
+-- Reconstruite en entier à chaque exécution (une ligne par catégorie).
+
+CREATE SCHEMA IF NOT EXISTS ANYCOMPANY_LAB.GOLD;
+USE SCHEMA ANYCOMPANY_LAB.SILVER;
+
+
+CREATE OR REPLACE TABLE ANYCOMPANY_LAB.GOLD.PROMO_LIFT_CATEGORIE AS
+WITH transactions_promo AS (
+    -- Une ligne par (transaction, catégorie promue)
+    SELECT
+        b.transaction_id,
+        p.product_category,
+        COUNT(*) AS nb_promotions,
+        SUM(p.discount_percentage) AS sum_discount
+    FROM BRIDGE_TRANSACTION_PROMOTION b
+    INNER JOIN PROMOTIONS_CLEAN p
+        ON p.promotion_id = b.promotion_id
+    GROUP BY b.transaction_id, p.product_category
+),
+category_with_promo AS (
+    SELECT
+        tp.product_category,
+        COUNT(*) AS transactions_with_promo,
+        SUM(ft.amount) AS amount_with_promo,
+        SUM(tp.nb_promotions) AS nb_couples,
+        SUM(ft.amount * tp.nb_promotions) AS amount_couples,
+        SUM(tp.sum_discount) AS sum_discount
+    FROM transactions_promo tp
+    INNER JOIN FINANCIAL_TRANSACTIONS_CLEAN ft
+        ON ft.transaction_id = tp.transaction_id
+    GROUP BY tp.product_category
+),
+totals AS (
+    SELECT COUNT(*) AS nb_transactions, SUM(amount) AS amount
+    FROM FINANCIAL_TRANSACTIONS_CLEAN
+),
+category_baseline AS (
+    -- Catégories de l'inventaire : toutes les transactions sauf celles promues dans la catégorie
+    SELECT
+        i.product_category,
+        t.nb_transactions - COALESCE(cp.transactions_with_promo, 0) AS transactions_no_promo,
+        ROUND(
+            (t.amount - COALESCE(cp.amount_with_promo, 0))
+            / NULLIF(t.nb_transactions - COALESCE(cp.transactions_with_promo, 0), 0),
+            2
+        ) AS avg_value_no_promo
+    FROM (SELECT DISTINCT product_category FROM INVENTORY_CLEAN) i
+    CROSS JOIN totals t
+    LEFT JOIN category_with_promo cp
+        ON cp.product_category = i.product_category
+),
+lift AS (
+    SELECT
+        COALESCE(cb.product_category, cp.product_category) AS category,
+        COALESCE(cb.transactions_no_promo, 0) AS transactions_no_promo,
+        COALESCE(cb.avg_value_no_promo, 0) AS avg_value_no_promo,
+        COALESCE(cp.transactions_with_promo, 0) AS transactions_with_promo,
+        COALESCE(ROUND(cp.amount_couples / cp.nb_couples, 2), 0) AS avg_value_with_promo,
+        COALESCE(ROUND(cp.sum_discount / cp.nb_couples * 100, 2), 0) AS avg_discount,
+        (COALESCE(ROUND(cp.amount_couples / cp.nb_couples, 2), 0) - COALESCE(cb.avg_value_no_promo, 0))
+            / NULLIF(cb.avg_value_no_promo, 1) * 100 AS lift
+    FROM category_baseline cb
+    FULL OUTER JOIN category_with_promo cp
+        ON cb.product_category = cp.product_category
+    WHERE COALESCE(cb.product_category, cp.product_category) IS NOT NULL
+)
+SELECT
+    category,
+    transactions_no_promo,
+    avg_value_no_promo,
+    transactions_with_promo,
+    avg_value_with_promo,
+    avg_discount,
+    ROUND(lift, 2) AS lift_percentage,
+    CASE
+        WHEN lift > 20 THEN 'Très sensible'
+        WHEN lift BETWEEN 5 AND 20 THEN 'Sensible'
+        WHEN lift BETWEEN -5 AND 5 THEN 'Neutre'
+        ELSE 'Peu sensible'
+    END AS sensitivity_level
+FROM lift;
+
+
+-- Nouvelles versions de tables pour le cache des dashboards (sql/3d)
+CALL ANYCOMPANY_LAB.SILVER.STAMP_TABLE_VERSIONS();
+
+
+-- VÉRIFICATIONS
+
+-- Contenu : une ligne par catégorie, du plus fort au plus faible lift
+SELECT * FROM ANYCOMPANY_LAB.GOLD.PROMO_LIFT_CATEGORIE ORDER BY lift_percentage DESC NULLS LAST;
+
+-- Cohérence : transactions avec + sans promotion = toutes les transactions (catégories de l'inventaire)
+SELECT
+    category,
+    transactions_no_promo + transactions_with_promo AS total,
+    (SELECT COUNT(*) FROM ANYCOMPANY_LAB.SILVER.FINANCIAL_TRANSACTIONS_CLEAN) AS attendu
+FROM ANYCOMPANY_LAB.GOLD.PROMO_LIFT_CATEGORIE
+WHERE category IN (SELECT product_category FROM ANYCOMPANY_LAB.SILVER.INVENTORY_CLEAN);
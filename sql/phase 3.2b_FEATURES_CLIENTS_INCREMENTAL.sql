@@ -0,0 +1,461 @@
+-- ============================================================================
+-- RAFRAÎCHISSEMENT INCRÉMENTAL DE FEATURES_CLIENTS
+-- A exécuter après Phase 3.1b Rafraîchissement incrémental VENTES_ENRICHIES.sql,
+-- à la place de la reconstruction complète de la table 1 de la phase 3.2
+-- ============================================================================
+--
+-- Principe :
+--   1. CLIENTS_RFM_ETAT garde, par client, l'état cumulé nécessaire aux
+--      features : premier / dernier achat, nombre d'achats, somme dépensée,
+--      nombre d'achats avec promo.
+--   2. Chaque passage lit le journal VENTES_ENRICHIES_DELTA (écrit par la
+--      Phase 3.1b) :
+--        - transactions enrichies pour la première fois -> l'état du client
+--          est mis à jour par addition (MIN / MAX / + / +) ;
+--        - transactions ré-enrichies (fenêtre de rattrapage, promo modifiée,
+--          réconciliation) -> l'état de ces seuls clients est recalculé.
+--   3. Les features dérivées (CLV, fréquence mensuelle, durée de vie, flags,
+--      segments) ne sont recalculées que pour les clients dont l'état a
+--      changé. Les colonnes relatives à la date du jour (récence, tendance,
+--      risque churn, segment d'activité) sont mises à jour sur place, sans
+--      relire les transactions.
+--   4. Les scores RFM ne viennent plus de NTILE(5) (tri global de tous les
+--      clients) mais des quintiles stockés dans RFM_CUT_POINTS, recalibrés à
+--      la reconstruction complète ou sur demande. Les ex-aequo reçoivent
+--      désormais le même score.
+--   5. Réconciliation : la somme des nb_achats de l'état doit être égale au
+--      nombre de lignes de VENTES_ENRICHIES, sinon reconstruction complète.
+--
+-- Utilisation :
+--   CALL REFRESH_FEATURES_CLIENTS(FALSE, FALSE);   -- incrémental
+--   CALL REFRESH_FEATURES_CLIENTS(FALSE, TRUE);    -- incrémental + recalibrage des quintiles RFM
+--   CALL REFRESH_FEATURES_CLIENTS(TRUE, TRUE);     -- reconstruction complète
+
+USE SCHEMA ANYCOMPANY_LAB.ANALYTICS;
+
+
+-- État cumulé par client
+CREATE TABLE IF NOT EXISTS CLIENTS_RFM_ETAT (
+    CLIENT              VARCHAR,
+    PREMIER_ACHAT       DATE,
+    DERNIER_ACHAT       DATE,
+    NB_ACHATS           NUMBER,
+    SOMME_DEPENSE       FLOAT,
+    ACHATS_AVEC_PROMO   NUMBER,
+    UPDATED_AT          TIMESTAMP_LTZ
+);
+
+-- Quintiles RFM (une ligne : bornes hautes des scores 1 à 4)
+-- La récence garde l'ordre de PROFIL_CLIENTS : score 1 = achat le plus récent
+CREATE TABLE IF NOT EXISTS RFM_CUT_POINTS (
+    RECENCE_1           DATE,
+    RECENCE_2           DATE,
+    RECENCE_3           DATE,
+    RECENCE_4           DATE,
+    FREQUENCE_1         NUMBER,
+    FREQUENCE_2         NUMBER,
+    FREQUENCE_3         NUMBER,
+    FREQUENCE_4         NUMBER,
+    MONETAIRE_1         FLOAT,
+    MONETAIRE_2         FLOAT,
+    MONETAIRE_3         FLOAT,
+    MONETAIRE_4         FLOAT,
+    CALCULE_LE          TIMESTAMP_LTZ
+);
+
+
+-- ============================================================================
+-- VUE DES FEATURES CALCULÉES DEPUIS L'ÉTAT
+-- Mêmes colonnes et mêmes règles que PROFIL_CLIENTS (Phase 3.1) puis
+-- FEATURES_CLIENTS (phase 3.2), sans repasser par les transactions
+-- ============================================================================
+
+CREATE OR REPLACE VIEW FEATURES_CLIENTS_SOURCE AS
+WITH profil AS (
+    SELECT
+        e.client,
+        cd.name,
+        cd.gender,
+        cd.age,
+        cd.marital_status,
+        cd.annual_income,
+        cd.region,
+        cd.country,
+
+        e.nb_achats,
+        ROUND(e.somme_depense, 2) as total_depense,
+        ROUND(e.somme_depense / e.nb_achats, 2) as panier_moyen,
+        e.premier_achat,
+        e.dernier_achat,
+        e.achats_avec_promo,
+
+        DATEDIFF(day, e.dernier_achat, CURRENT_DATE()) as jours_depuis_dernier_achat,
+        ROUND(e.achats_avec_promo * 100.0 / e.nb_achats, 1) as pct_achats_promo,
+
+        CASE
+            WHEN ROUND(e.somme_depense, 2) >= 50000 THEN 'VIP'
+            WHEN ROUND(e.somme_depense, 2) >= 20000 THEN 'Gros client'
+            WHEN ROUND(e.somme_depense, 2) >= 5000 THEN 'Client moyen'
+            ELSE 'Petit client'
+        END as segment_valeur,
+
+        CASE
+            WHEN DATEDIFF(day, e.dernier_achat, CURRENT_DATE()) <= 30 THEN 'Actif'
+            WHEN DATEDIFF(day, e.dernier_achat, CURRENT_DATE()) <= 90 THEN 'A risque'
+            WHEN DATEDIFF(day, e.dernier_achat, CURRENT_DATE()) <= 180 THEN 'Inactif'
+            ELSE 'Perdu'
+        END as segment_activite,
+
+        -- Scores RFM (1 à 5) à partir des quintiles stockés
+        CASE
+            WHEN e.dernier_achat >= q.recence_1 THEN 1
+            WHEN e.dernier_achat >= q.recence_2 THEN 2
+            WHEN e.dernier_achat >= q.recence_3 THEN 3
+            WHEN e.dernier_achat >= q.recence_4 THEN 4
+            ELSE 5
+        END as score_recence,
+        CASE
+            WHEN e.nb_achats <= q.frequence_1 THEN 1
+            WHEN e.nb_achats <= q.frequence_2 THEN 2
+            WHEN e.nb_achats <= q.frequence_3 THEN 3
+            WHEN e.nb_achats <= q.frequence_4 THEN 4
+            ELSE 5
+        END as score_frequence,
+        CASE
+            WHEN e.somme_depense <= q.monetaire_1 THEN 1
+            WHEN e.somme_depense <= q.monetaire_2 THEN 2
+            WHEN e.somme_depense <= q.monetaire_3 THEN 3
+            WHEN e.somme_depense <= q.monetaire_4 THEN 4
+            ELSE 5
+        END as score_monetaire
+
+    FROM CLIENTS_RFM_ETAT e
+    CROSS JOIN RFM_CUT_POINTS q
+    LEFT JOIN ANYCOMPANY_LAB.SILVER.CUSTOMER_DEMOGRAPHICS_CLEAN cd
+        ON e.client = cd.name
+)
+SELECT
+    client,
+    name,
+    score_recence,
+    score_frequence,
+    score_monetaire,
+    score_recence + score_frequence + score_monetaire as score_rfm_total,
+    CONCAT(score_recence, score_frequence, score_monetaire) as rfm_segment,
+    nb_achats,
+    total_depense,
+    panier_moyen,
+    jours_depuis_dernier_achat,
+    pct_achats_promo,
+    CASE
+        WHEN DATEDIFF(day, premier_achat, dernier_achat) > 0
+        THEN ROUND(nb_achats * 30.0 / DATEDIFF(day, premier_achat, dernier_achat), 2)
+        ELSE nb_achats
+    END as frequence_mensuelle,
+    DATEDIFF(day, premier_achat, dernier_achat) as duree_vie_client_jours,
+    ROUND(DATEDIFF(day, premier_achat, dernier_achat) / 30.0, 1) as duree_vie_client_mois,
+    age,
+    gender,
+    annual_income,
+    marital_status,
+    region,
+    country,
+    CASE
+        WHEN age < 25 THEN '18-25'
+        WHEN age BETWEEN 25 AND 35 THEN '25-35'
+        WHEN age BETWEEN 36 AND 50 THEN '36-50'
+        WHEN age BETWEEN 51 AND 65 THEN '51-65'
+        ELSE '65+'
+    END as tranche_age,
+    CASE
+        WHEN annual_income < 30000 THEN 'Bas'
+        WHEN annual_income BETWEEN 30000 AND 70000 THEN 'Moyen'
+        ELSE 'Élevé'
+    END as tranche_revenu,
+    CASE
+        WHEN DATEDIFF(day, premier_achat, dernier_achat) > 0
+        THEN ROUND(total_depense / (DATEDIFF(day, premier_achat, dernier_achat) / 365.0), 2)
+        ELSE total_depense
+    END as clv_annuelle_estimee,
+    CASE
+        WHEN jours_depuis_dernier_achat <= 90 THEN 'Actif récent'
+        WHEN jours_depuis_dernier_achat BETWEEN 91 AND 180 THEN 'Ralenti'
+        ELSE 'Inactif'
+    END as tendance_achat,
+    CASE
+        WHEN annual_income > 0
+        THEN ROUND(total_depense * 100.0 / annual_income, 2)
+        ELSE NULL
+    END as ratio_depense_revenu,
+    CASE
+        WHEN total_depense >= 30000 AND nb_achats >= 15 THEN 1
+        ELSE 0
+    END as flag_client_premium,
+    CASE
+        WHEN jours_depuis_dernier_achat > 90 AND nb_achats >= 3 THEN 1
+        ELSE 0
+    END as flag_risque_churn,
+    CASE
+        WHEN pct_achats_promo >= 50 THEN 1
+        ELSE 0
+    END as flag_sensible_promo,
+    segment_valeur,
+    segment_activite,
+    CASE segment_valeur
+        WHEN 'VIP' THEN 4
+        WHEN 'Gros client' THEN 3
+        WHEN 'Client moyen' THEN 2
+        WHEN 'Petit client' THEN 1
+    END as segment_valeur_num,
+    CASE segment_activite
+        WHEN 'Actif' THEN 4
+        WHEN 'A risque' THEN 3
+        WHEN 'Inactif' THEN 2
+        WHEN 'Perdu' THEN 1
+    END as segment_activite_num,
+    -- Date de référence des colonnes relatives au jour
+    dernier_achat
+FROM profil;
+
+
+-- ============================================================================
+-- PROCÉDURE DE RAFRAÎCHISSEMENT
+-- ============================================================================
+
+CREATE OR REPLACE PROCEDURE REFRESH_FEATURES_CLIENTS(FULL_REFRESH BOOLEAN, RECALIBRATE_RFM BOOLEAN)
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    ve_mode VARCHAR;
+    refresh_mode VARCHAR DEFAULT 'INCREMENTAL';
+    nb_etats NUMBER;
+    nb_quintiles NUMBER;
+    nb_clients NUMBER DEFAULT 0;
+    achats_etat NUMBER;
+    lignes_ventes NUMBER;
+BEGIN
+    SELECT MAX(LAST_MODE) INTO :ve_mode
+    FROM ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS
+    WHERE TABLE_NAME = 'VENTES_ENRICHIES';
+    SELECT COUNT(*) INTO :nb_etats FROM CLIENTS_RFM_ETAT;
+
+    -- Premier passage, reconstruction demandée ou VENTES_ENRICHIES reconstruite
+    -- (pas de journal de delta exploitable)
+    IF (FULL_REFRESH OR nb_etats = 0 OR ve_mode LIKE 'FULL%') THEN
+        refresh_mode := 'FULL';
+    ELSE
+        -- 1. Clients touchés par le delta ; recalcul complet de l'état dès
+        --    qu'une de leurs transactions était déjà enrichie
+        CREATE OR REPLACE TEMPORARY TABLE FC_CLIENTS_MODIFIES AS
+        SELECT client, BOOLOR_AGG(recalcul) AS recalcul
+        FROM (
+            SELECT v.client, d.ancien_client IS NOT NULL AS recalcul
+            FROM VENTES_ENRICHIES_DELTA d
+            JOIN VENTES_ENRICHIES v ON v.transaction_id = d.transaction_id
+            UNION ALL
+            -- Client d'avant recalcul (transaction réaffectée ou supprimée)
+            SELECT d.ancien_client, TRUE
+            FROM VENTES_ENRICHIES_DELTA d
+            WHERE d.ancien_client IS NOT NULL
+        )
+        GROUP BY client;
+        SELECT COUNT(*) INTO :nb_clients FROM FC_CLIENTS_MODIFIES;
+
+        -- 2a. Transactions nouvelles : mise à jour de l'état par addition
+        MERGE INTO CLIENTS_RFM_ETAT e
+        USING (
+            SELECT
+                v.client,
+                MIN(v.transaction_date) AS premier_achat,
+                MAX(v.transaction_date) AS dernier_achat,
+                COUNT(*) AS nb_achats,
+                SUM(v.amount) AS somme_depense,
+                COUNT(CASE WHEN v.avec_promo = 'Oui' THEN 1 END) AS achats_avec_promo
+            FROM VENTES_ENRICHIES_DELTA d
+            JOIN VENTES_ENRICHIES v ON v.transaction_id = d.transaction_id
+            JOIN FC_CLIENTS_MODIFIES m ON m.client = v.client AND NOT m.recalcul
+            GROUP BY v.client
+        ) s
+        ON e.client = s.client
+        WHEN MATCHED THEN UPDATE SET
+            PREMIER_ACHAT = LEAST(e.premier_achat, s.premier_achat),
+            DERNIER_ACHAT = GREATEST(e.dernier_achat, s.dernier_achat),
+            NB_ACHATS = e.nb_achats + s.nb_achats,
+            SOMME_DEPENSE = e.somme_depense + s.somme_depense,
+            ACHATS_AVEC_PROMO = e.achats_avec_promo + s.achats_avec_promo,
+            UPDATED_AT = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN INSERT (
+            CLIENT, PREMIER_ACHAT, DERNIER_ACHAT, NB_ACHATS,
+            SOMME_DEPENSE, ACHATS_AVEC_PROMO, UPDATED_AT
+        ) VALUES (
+            s.client, s.premier_achat, s.dernier_achat, s.nb_achats,
+            s.somme_depense, s.achats_avec_promo, CURRENT_TIMESTAMP()
+        );
+
+        -- 2b. Transactions ré-enrichies : état recalculé pour ces seuls clients
+        DELETE FROM CLIENTS_RFM_ETAT
+        WHERE client IN (SELECT client FROM FC_CLIENTS_MODIFIES WHERE recalcul);
+
+        INSERT INTO CLIENTS_RFM_ETAT
+        SELECT
+            v.client,
+            MIN(v.transaction_date),
+            MAX(v.transaction_date),
+            COUNT(*),
+            SUM(v.amount),
+            COUNT(CASE WHEN v.avec_promo = 'Oui' THEN 1 END),
+            CURRENT_TIMESTAMP()
+        FROM VENTES_ENRICHIES v
+        JOIN FC_CLIENTS_MODIFIES m ON m.client = v.client AND m.recalcul
+        GROUP BY v.client;
+
+        -- Réconciliation : un achat de l'état = une ligne de VENTES_ENRICHIES
+        SELECT SUM(nb_achats) INTO :achats_etat FROM CLIENTS_RFM_ETAT;
+        SELECT COUNT(*) INTO :lignes_ventes FROM VENTES_ENRICHIES;
+        IF (achats_etat <> lignes_ventes) THEN
+            refresh_mode := 'FULL (reconciliation)';
+        END IF;
+    END IF;
+
+    -- Reconstruction complète de l'état (une seule agrégation des ventes)
+    IF (refresh_mode LIKE 'FULL%') THEN
+        DELETE FROM CLIENTS_RFM_ETAT;
+        INSERT INTO CLIENTS_RFM_ETAT
+        SELECT
+            client,
+            MIN(transaction_date),
+            MAX(transaction_date),
+            COUNT(*),
+            SUM(amount),
+            COUNT(CASE WHEN avec_promo = 'Oui' THEN 1 END),
+            CURRENT_TIMESTAMP()
+        FROM VENTES_ENRICHIES
+        GROUP BY client;
+    END IF;
+
+    -- Quintiles RFM : recalibrés sur l'état (pas sur les transactions)
+    SELECT COUNT(*) INTO :nb_quintiles FROM RFM_CUT_POINTS;
+    IF (RECALIBRATE_RFM OR nb_quintiles = 0 OR refresh_mode LIKE 'FULL%') THEN
+        DELETE FROM RFM_CUT_POINTS;
+        INSERT INTO RFM_CUT_POINTS
+        SELECT
+            PERCENTILE_DISC(0.8) WITHIN GROUP (ORDER BY dernier_achat),
+            PERCENTILE_DISC(0.6) WITHIN GROUP (ORDER BY dernier_achat),
+            PERCENTILE_DISC(0.4) WITHIN GROUP (ORDER BY dernier_achat),
+            PERCENTILE_DISC(0.2) WITHIN GROUP (ORDER BY dernier_achat),
+            PERCENTILE_DISC(0.2) WITHIN GROUP (ORDER BY nb_achats),
+            PERCENTILE_DISC(0.4) WITHIN GROUP (ORDER BY nb_achats),
+            PERCENTILE_DISC(0.6) WITHIN GROUP (ORDER BY nb_achats),
+            PERCENTILE_DISC(0.8) WITHIN GROUP (ORDER BY nb_achats),
+            PERCENTILE_DISC(0.2) WITHIN GROUP (ORDER BY somme_depense),
+            PERCENTILE_DISC(0.4) WITHIN GROUP (ORDER BY somme_depense),
+            PERCENTILE_DISC(0.6) WITHIN GROUP (ORDER BY somme_depense),
+            PERCENTILE_DISC(0.8) WITHIN GROUP (ORDER BY somme_depense),
+            CURRENT_TIMESTAMP()
+        FROM CLIENTS_RFM_ETAT;
+        IF (refresh_mode = 'INCREMENTAL') THEN
+            refresh_mode := 'INCREMENTAL (recalibrage RFM)';
+        END IF;
+    END IF;
+
+    -- 3. Features : tous les clients si l'état ou les quintiles ont été
+    --    reconstruits, sinon uniquement les clients modifiés
+    IF (refresh_mode <> 'INCREMENTAL') THEN
+        CREATE OR REPLACE TABLE FEATURES_CLIENTS AS
+        SELECT * FROM FEATURES_CLIENTS_SOURCE;
+        SELECT COUNT(*) INTO :nb_clients FROM FEATURES_CLIENTS;
+    ELSE
+        DELETE FROM FEATURES_CLIENTS
+        WHERE client IN (SELECT client FROM FC_CLIENTS_MODIFIES);
+
+        INSERT INTO FEATURES_CLIENTS
+        SELECT * FROM FEATURES_CLIENTS_SOURCE
+        WHERE client IN (SELECT client FROM FC_CLIENTS_MODIFIES);
+
+        -- Colonnes relatives à la date du jour, sans relire les transactions
+        UPDATE FEATURES_CLIENTS SET
+            jours_depuis_dernier_achat = DATEDIFF(day, dernier_achat, CURRENT_DATE()),
+            tendance_achat = CASE
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) <= 90 THEN 'Actif récent'
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) BETWEEN 91 AND 180 THEN 'Ralenti'
+                ELSE 'Inactif'
+            END,
+            flag_risque_churn = CASE
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) > 90 AND nb_achats >= 3 THEN 1
+                ELSE 0
+            END,
+            segment_activite = CASE
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) <= 30 THEN 'Actif'
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) <= 90 THEN 'A risque'
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) <= 180 THEN 'Inactif'
+                ELSE 'Perdu'
+            END,
+            segment_activite_num = CASE
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) <= 30 THEN 4
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) <= 90 THEN 3
+                WHEN DATEDIFF(day, dernier_achat, CURRENT_DATE()) <= 180 THEN 2
+                ELSE 1
+            END
+        WHERE jours_depuis_dernier_achat <> DATEDIFF(day, dernier_achat, CURRENT_DATE());
+    END IF;
+
+    SELECT SUM(nb_achats) INTO :achats_etat FROM CLIENTS_RFM_ETAT;
+    SELECT COUNT(*) INTO :lignes_ventes FROM VENTES_ENRICHIES;
+
+    -- Bilan du passage
+    -- (SILVER_ROW_COUNT = achats cumulés dans l'état, BRONZE_ROW_COUNT = lignes de VENTES_ENRICHIES)
+    MERGE INTO ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS w
+    USING (
+        SELECT
+            'FEATURES_CLIENTS' AS TABLE_NAME,
+            MAX(dernier_achat) AS HIGH_WATER_MARK
+        FROM CLIENTS_RFM_ETAT
+    ) s
+    ON w.TABLE_NAME = s.TABLE_NAME
+    WHEN MATCHED THEN UPDATE SET
+        HIGH_WATER_MARK = s.HIGH_WATER_MARK,
+        LAST_MODE = :refresh_mode,
+        LAST_ROWS_MERGED = :nb_clients,
+        SILVER_ROW_COUNT = :achats_etat,
+        BRONZE_ROW_COUNT = :lignes_ventes,
+        UPDATED_AT = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT (
+        TABLE_NAME, HIGH_WATER_MARK, LAST_MODE, LAST_ROWS_MERGED,
+        SILVER_ROW_COUNT, BRONZE_ROW_COUNT, UPDATED_AT
+    ) VALUES (
+        s.TABLE_NAME, s.HIGH_WATER_MARK, :refresh_mode, :nb_clients,
+        :achats_etat, :lignes_ventes, CURRENT_TIMESTAMP()
+    );
+
+    RETURN refresh_mode || ' : ' || nb_clients || ' clients recalculés, '
+        || achats_etat || ' achats dans l''état / ' || lignes_ventes || ' ventes enrichies';
+END;
+$$;
+
+
+-- EXÉCUTION QUOTIDIENNE
+
+CALL REFRESH_FEATURES_CLIENTS(FALSE, FALSE);
+
+-- Nouvelles versions de tables pour le cache des dashboards (sql/3d)
+CALL ANYCOMPANY_LAB.SILVER.STAMP_TABLE_VERSIONS();
+
+
+-- VÉRIFICATIONS
+
+-- Dernier passage
+SELECT * FROM ANYCOMPANY_LAB.SILVER.PIPELINE_WATERMARKS WHERE TABLE_NAME = 'FEATURES_CLIENTS';
+
+-- Quintiles en vigueur
+SELECT * FROM RFM_CUT_POINTS;
+
+-- Répartition des scores (proche de 20 % par score, hors ex-aequo et dérive depuis le recalibrage)
+SELECT
+    score_monetaire,
+    COUNT(*) as nb_clients,
+    ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 1) as pct_clients
+FROM FEATURES_CLIENTS
+GROUP BY score_monetaire
+ORDER BY score_monetaire;
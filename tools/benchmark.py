@@ -0,0 +1,572 @@
+"""
+Benchmark des requêtes des dashboards sur un jeu de données local à l'échelle
+
+1. Découverte : chaque dashboard est exécuté (streamlit.testing) pour toutes
+   les combinaisons de valeurs des filtres de la sidebar ; chaque requête
+   envoyée au backend (texte SQL + paramètres) est enregistrée.
+2. Mise à l'échelle : FINANCIAL_TRANSACTIONS_CLEAN est répliquée jusqu'au
+   nombre de transactions demandé (10k, 1M, 10M, 100M...) ; les bridges
+   transaction -> promotion / campagne sont reconstruits au chargement.
+3. Mesure : chaque requête unique est exécutée `--repeat` fois par échelle
+   sur le backend DuckDB tel que les dashboards l'obtiennent
+   (core.backends.create_backend : routage vers les rollups compris, sauf
+   ANYCOMPANY_ROLLUP_ROUTING=0), sans le cache de résultats : percentiles
+   de latence, phases (sql / fetch / build), pic de mémoire résidente,
+   lignes et octets du résultat.
+4. Vérification du routage : à chaque échelle, des formes d'agrégats
+   (COUNT(*), COUNT(1), COUNT(region), SUM(1), AVG / STDDEV(amount)...) sont
+   exécutées sur la source puis via le routage vers les rollups
+   (core/rollups.py) ; tout écart de valeur ou de type est signalé.
+5. Erreur HyperLogLog : APPROX_COUNT_DISTINCT de DuckDB est comparé au
+   comptage exact sur des identifiants texte de 1 000 à 1 000 000 valeurs ;
+   moyenne et maximum de l'erreur relative (source des valeurs DuckDB de
+   core.approx.HLL_ERRORS). `--hll-only` n'exécute que cette mesure.
+6. Comparaison : avec `--baseline`, toute requête dont le p50 dépasse celui
+   de la référence de plus de `--tolerance` (et de plus de `--min-delta-ms`)
+   est signalée comme régression ; code de sortie 1 s'il y en a.
+
+Exemple :
+    python tools/benchmark.py --data-dir data/parquet --scales 10k,1M,10M \\
+        --output bench/results.json --baseline bench/baseline.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+STREAMLIT_DIR = ROOT / "Streamlit"
+sys.path.insert(0, str(STREAMLIT_DIR))
+
+from core import backends  # noqa: E402
+from core.instrumentation import QueryLog, current_panel  # noqa: E402
+from core.interval_bridge import BRIDGES  # noqa: E402
+from core.result_cache import normalize_sql  # noqa: E402
+
+DASHBOARDS = ("sales_dashboard", "promotion_analysis", "marketing_roi")
+
+TRANSACTIONS = "FINANCIAL_TRANSACTIONS_CLEAN"
+
+# Cases de la sidebar qui ne sont pas des filtres (panneau de temps)
+IGNORED_WIDGETS = ("timing_panel",)
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Mesure de l'erreur HyperLogLog : nombres de valeurs distinctes x séries
+HLL_SIZES = (1_000, 3_000, 10_000, 30_000, 100_000, 300_000, 1_000_000)
+HLL_SERIES = 3
+
+# Formes d'agrégats sur les transactions : routées ou non, même résultat que la source
+ROLLUP_CHECKS = (
+    f"SELECT region, COUNT(*) AS n, SUM(amount) AS total FROM {TRANSACTIONS} GROUP BY region ORDER BY region",
+    f"SELECT region, COUNT(1) AS n FROM {TRANSACTIONS} GROUP BY region ORDER BY region",
+    f"SELECT region, COUNT(region) AS n FROM {TRANSACTIONS} GROUP BY region ORDER BY region",
+    f"SELECT payment_method, COUNT(amount) AS n FROM {TRANSACTIONS} GROUP BY payment_method ORDER BY payment_method",
+    f"SELECT SUM(1) AS n FROM {TRANSACTIONS}",
+    f"SELECT COUNT(*) AS n FROM {TRANSACTIONS} WHERE region = 'North'",
+    f"SELECT DATE_TRUNC('month', transaction_date) AS month, AVG(amount) AS avg_amount, "
+    f"MIN(amount) AS min_amount, MAX(amount) AS max_amount, STDDEV(amount) AS sd_amount "
+    f"FROM {TRANSACTIONS} GROUP BY month ORDER BY month",
+    f"SELECT region, MEDIAN(amount) AS median_amount FROM {TRANSACTIONS} GROUP BY region ORDER BY region",
+)
+
+
+# ============================================================================
+# DÉCOUVERTE DES REQUÊTES
+# ============================================================================
+
+def create_backend(data_dir):
+    """Backend DuckDB des dashboards sur `data_dir`, cache de résultats désactivé
+
+    Sans cache, chaque répétition exécute la requête ; les variables
+    ANYCOMPANY_BACKEND / ANYCOMPANY_PARQUET_DIR sont ignorées le temps de
+    l'instanciation (elles visent le backend cible, cf. tools/prewarm.py).
+    """
+    secrets = dict(
+        backend=dict(engine="duckdb", parquet_dir=str(data_dir)),
+        cache=dict(enabled=False)
+    )
+    saved = {
+        name: os.environ.pop(name)
+        for name in ("ANYCOMPANY_BACKEND", "ANYCOMPANY_PARQUET_DIR")
+        if name in os.environ
+    }
+    try:
+        return backends.create_backend(secrets)
+    finally:
+        os.environ.update(saved)
+
+
+class RecordingBackend:
+    """Backend qui enregistre chaque requête exécutée avant de la déléguer"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.dashboard = None
+        # Vue par défaut (premier affichage, filtres inchangés) en cours d'exécution
+        self.default_view = False
+        self.queries = {}
+        self._lock = threading.Lock()
+
+    def run_query(self, query, params=None):
+        key = query_key(query, params)
+        with self._lock:
+            if key not in self.queries:
+                self.queries[key] = dict(
+                    id=key,
+                    dashboard=self.dashboard,
+                    panel=current_panel(),
+                    sql=query,
+                    params=params,
+                    default_view=self.default_view
+                )
+        return self.backend.run_query(query, params)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+def query_key(query, params):
+    """Identifiant stable d'une requête : texte normalisé et paramètres"""
+    payload = json.dumps([normalize_sql(query), params or {}], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def _filter_widgets(at):
+    """Filtres de la sidebar, dans l'ordre d'affichage"""
+    widgets = []
+
+    def visit(node):
+        if node.type in ("selectbox", "radio", "checkbox"):
+            if node.key not in IGNORED_WIDGETS:
+                widgets.append(node)
+        for child in getattr(node, "children", {}).values():
+            visit(child)
+
+    visit(at.sidebar)
+    return widgets
+
+
+def _choices(widget):
+    if widget.type == "checkbox":
+        return [False, True]
+    return list(widget.options)
+
+
+def _find(at, label):
+    return next(widget for widget in _filter_widgets(at) if widget.label == label)
+
+
+def explore(dashboard, recorder, timeout=600):
+    """Exécute le dashboard pour chaque combinaison de filtres ; renvoie le nombre de combinaisons.
+
+    Parcours en profondeur sur une seule session : chaque filtre est fixé à
+    chacune de ses valeurs puis les filtres suivants sont parcourus. Les
+    filtres dépendants (ex. « Région » affiché seulement si « Filtrer par
+    région » est cochée) apparaissent au fil des exécutions.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    recorder.dashboard = dashboard
+    recorder.default_view = True
+    at = AppTest.from_file(str(STREAMLIT_DIR / f"{dashboard}.py"), default_timeout=timeout).run()
+    recorder.default_view = False
+
+    def walk(assigned):
+        if at.exception:
+            raise RuntimeError(f"{dashboard} {assigned}: {at.exception[0].message}")
+        pending = [widget for widget in _filter_widgets(at) if widget.label not in assigned]
+        if not pending:
+            return 1
+        label = pending[0].label
+        combinations = 0
+        for value in _choices(pending[0]):
+            _find(at, label).set_value(value).run()
+            combinations += walk(assigned | {label})
+        return combinations
+
+    return walk(frozenset())
+
+
+def discover_queries(data_dir, dashboards):
+    """Requêtes uniques des dashboards, toutes combinaisons de filtres confondues"""
+    import streamlit as st
+    from core import data
+
+    recorder = RecordingBackend(create_backend(data_dir))
+    # Les dashboards obtiennent leur backend via core.data.create_backend : on le remplace
+    original = data.create_backend
+    data.create_backend = lambda secrets: recorder
+    os.environ["ANYCOMPANY_QUERY_LOG"] = ""
+    # Toutes les sections exécutées, pas seulement l'onglet ouvert
+    os.environ["ANYCOMPANY_LAZY_SECTIONS"] = "0"
+    combinations = {}
+    try:
+        for dashboard in dashboards:
+            st.cache_resource.clear()
+            st.cache_data.clear()
+            combinations[dashboard] = explore(dashboard, recorder)
+            print(f"{dashboard}: {combinations[dashboard]} combinaisons de filtres", file=sys.stderr)
+    finally:
+        data.create_backend = original
+        recorder.backend.close()
+    return list(recorder.queries.values()), combinations
+
+
+# ============================================================================
+# JEUX DE DONNÉES À L'ÉCHELLE
+# ============================================================================
+
+def parse_scale(text):
+    """'10k' -> 10_000, '1M' -> 1_000_000, '250000' -> 250_000"""
+    text = text.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}.get(text[-1:], 1)
+    number = text[:-1] if factor > 1 else text
+    return int(float(number) * factor)
+
+
+def scale_dataset(source, target, rows):
+    """Copie le dossier Parquet en répliquant les transactions jusqu'à `rows` lignes.
+
+    Les copies gardent dates, régions et montants (mêmes distributions, même
+    densité de chevauchement avec les promotions) ; seul transaction_id est
+    suffixé. Les bridges ne sont pas copiés : le backend les reconstruit.
+    """
+    import duckdb
+
+    marker = target / ".rows"
+    if marker.exists() and marker.read_text() == str(rows):
+        return target
+    if target.exists():
+        shutil.rmtree(target)
+
+    transactions = None
+    for path in sorted(source.rglob("*.parquet")):
+        name = path.stem.upper()
+        if name in BRIDGES:
+            continue
+        destination = target / path.relative_to(source)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if name == TRANSACTIONS:
+            transactions = (path, destination)
+        else:
+            shutil.copy2(path, destination)
+    if transactions is None:
+        raise FileNotFoundError(f"{TRANSACTIONS}.parquet introuvable sous {source}")
+
+    path, destination = transactions
+    conn = duckdb.connect()
+    base = conn.execute(f"SELECT COUNT(*) FROM read_parquet('{path.as_posix()}')").fetchone()[0]
+    columns = [row[0] for row in conn.execute(f"DESCRIBE SELECT * FROM read_parquet('{path.as_posix()}')").fetchall()]
+    id_column = next(column for column in columns if column.lower() == "transaction_id")
+    copies = -(-rows // base)
+    conn.execute(f"""
+        COPY (
+            SELECT * EXCLUDE (file_row_number)
+                REPLACE (CASE WHEN r.i = 0 THEN {id_column}
+                              ELSE {id_column} || '-' || r.i END AS {id_column})
+            FROM read_parquet('{path.as_posix()}', file_row_number = true), range({copies}) r(i)
+            WHERE r.i * {base} + file_row_number < {rows}
+        ) TO '{destination.as_posix()}' (FORMAT PARQUET)
+    """)
+    conn.close()
+    marker.write_text(str(rows))
+    return target
+
+
+# ============================================================================
+# MESURES
+# ============================================================================
+
+def _rss():
+    """Mémoire résidente du processus en octets (Linux), None ailleurs"""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemorySampler:
+    """Pic de mémoire résidente pendant le bloc `with`, relevé toutes les `interval` s.
+
+    Le moteur DuckDB alloue hors de Python : la mémoire du processus est la
+    seule mesure qui couvre exécution, lecture Arrow et DataFrame.
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak = 0
+
+    def _sample(self):
+        while not self._stop.is_set():
+            rss = _rss()
+            if rss is not None:
+                self.peak = max(self.peak, rss - self.start)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = _rss() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def measure(backend, query, repeat, warmup):
+    """Exécute la requête `warmup + repeat` fois ; statistiques des `repeat` dernières"""
+    timer = QueryLog(None).run("benchmark")
+    for _ in range(warmup):
+        backend.run_query(query["sql"], query["params"])
+    timings, peaks, phases = [], [], {}
+    for _ in range(repeat):
+        with MemorySampler() as memory, timer.query(query["sql"], query["panel"]) as record:
+            df = backend.run_query(query["sql"], query["params"])
+            record.result(df)
+        timings.append(record.wall * 1000)
+        peaks.append(memory.peak)
+        for name, seconds in record.phases.items():
+            phases.setdefault(name, []).append(seconds * 1000)
+    stats = {f"p{p}_ms": round(float(np.percentile(timings, p)), 3) for p in PERCENTILES}
+    stats.update(
+        min_ms=round(min(timings), 3),
+        max_ms=round(max(timings), 3),
+        mean_ms=round(float(np.mean(timings)), 3),
+        phases_p50_ms={name: round(float(np.median(values)), 3) for name, values in phases.items()},
+        peak_rss_mb=round(max(peaks) / 2**20, 2),
+        rows=int(len(df)),
+        result_mb=round(df.memory_usage(index=False, deep=True).sum() / 2**20, 3)
+    )
+    return stats
+
+
+def check_rollups(backend):
+    """Exécute ROLLUP_CHECKS sur la source et via le routage ; renvoie les écarts"""
+    import pandas as pd
+    from core.rollups import RoutedBackend
+
+    # Source non routée : le moteur sous le RoutedBackend de create_backend
+    engine = backend.backend if isinstance(backend, RoutedBackend) else backend
+    routed_backend = RoutedBackend(engine)
+    failures = []
+    for query in ROLLUP_CHECKS:
+        sql, rollup = routed_backend.routed(query)
+        expected = engine.run_query(query)
+        actual = engine.run_query(sql)
+        status = "ok"
+        try:
+            # Sommes flottantes dans un autre ordre : tolérance relative seulement
+            pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-9)
+        except AssertionError as exc:
+            status = "écart"
+            failures.append(dict(query=normalize_sql(query), rollup=rollup, error=str(exc)))
+        print(f"  {status:<5}  {rollup or 'non routée':<34}  {normalize_sql(query)[:80]}", file=sys.stderr)
+    return failures
+
+
+def check_hll():
+    """Erreur relative d'APPROX_COUNT_DISTINCT (DuckDB) face au comptage exact
+
+    Identifiants texte déterministes ('C' + nombre pseudo-aléatoire sur 10
+    chiffres, une permutation par série) : la mesure est reproductible.
+    """
+    import duckdb
+    from core.approx import HLL_ERRORS
+
+    conn = duckdb.connect()
+    errors = []
+    try:
+        for size in HLL_SIZES:
+            for series in range(HLL_SERIES):
+                exact, approx = conn.execute(f"""
+                    SELECT COUNT(DISTINCT id), APPROX_COUNT_DISTINCT(id)
+                    FROM (
+                        SELECT 'C' || LPAD(((i * 2654435761 + {series} * 97) % 4294967291)::VARCHAR, 10, '0') AS id
+                        FROM range({size}) t(i)
+                    )
+                """).fetchone()
+                errors.append(abs(approx - exact) / exact)
+    finally:
+        conn.close()
+    measured = dict(
+        mean=round(float(np.mean(errors)), 4),
+        max=round(float(np.max(errors)), 4),
+        samples=len(errors)
+    )
+    mean_error, max_error = HLL_ERRORS["duckdb"]
+    # Comparaison à la précision de la légende (0,1 %)
+    status = "ok" if round(measured["mean"], 3) <= mean_error and measured["max"] <= max_error else "écart"
+    print(
+        f"HyperLogLog DuckDB : {measured['mean']:.1%} en moyenne, {measured['max']:.1%} au plus "
+        f"({measured['samples']} mesures) ; affiché {mean_error:.0%} / {max_error:.0%} : {status}",
+        file=sys.stderr
+    )
+    return dict(measured, displayed=dict(mean=mean_error, max=max_error), status=status)
+
+
+def run_benchmark(queries, datasets, repeat, warmup):
+    """Mesures de toutes les requêtes à toutes les échelles (et vérification du routage)"""
+    results, loads, failures = [], {}, []
+    for label, (rows, path) in datasets.items():
+        start = time.perf_counter()
+        backend = create_backend(path)
+        # Chargement en mémoire et construction des bridges (range joins)
+        loads[label] = dict(rows=rows, load_s=round(time.perf_counter() - start, 3))
+        print(f"échelle {label} : chargée en {loads[label]['load_s']} s", file=sys.stderr)
+        try:
+            failures += [dict(entry, scale=label) for entry in check_rollups(backend)]
+            for query in queries:
+                stats = measure(backend, query, repeat, warmup)
+                results.append(dict(
+                    query=query["id"],
+                    dashboard=query["dashboard"],
+                    panel=query["panel"],
+                    scale=label,
+                    transactions=rows,
+                    **stats
+                ))
+        finally:
+            backend.close()
+    return results, loads, failures
+
+
+# ============================================================================
+# COMPARAISON À LA RÉFÉRENCE
+# ============================================================================
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Annote les résultats avec la référence ; renvoie les régressions"""
+    reference = {(entry["query"], entry["scale"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        base = reference.get((entry["query"], entry["scale"]))
+        if base is None:
+            entry["status"] = "nouvelle"
+            continue
+        delta = entry["p50_ms"] - base["p50_ms"]
+        entry["baseline_p50_ms"] = base["p50_ms"]
+        entry["ratio"] = round(entry["p50_ms"] / base["p50_ms"], 3) if base["p50_ms"] else None
+        if delta > min_delta_ms and entry["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            entry["status"] = "régression"
+            regressions.append(entry)
+        else:
+            entry["status"] = "ok"
+    return regressions
+
+
+def print_report(results):
+    header = f"{'échelle':>8}  {'p50 ms':>10}  {'p95 ms':>10}  {'RSS Mo':>8}  {'lignes':>8}  {'statut':<11}  panneau"
+    print(header, file=sys.stderr)
+    for entry in sorted(results, key=lambda e: (e["transactions"], -e["p50_ms"])):
+        print(
+            f"{entry['scale']:>8}  {entry['p50_ms']:>10.1f}  {entry['p95_ms']:>10.1f}  "
+            f"{entry['peak_rss_mb']:>8.1f}  {entry['rows']:>8}  {entry.get('status', ''):<11}  "
+            f"{entry['dashboard']} / {entry['panel']} ({entry['query']})",
+            file=sys.stderr
+        )
+
+
+# ============================================================================
+# POINT D'ENTRÉE
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark des requêtes des dashboards (DuckDB local)")
+    parser.add_argument("--data-dir", default="data/parquet",
+                        help="dossier Parquet de référence (<SCHEMA>/<TABLE>.parquet)")
+    parser.add_argument("--scales", default="10k,1M",
+                        help="nombres de transactions, ex. 10k,1M,10M,100M")
+    parser.add_argument("--work-dir", default=".cache/bench",
+                        help="dossier des jeux de données mis à l'échelle (réutilisés)")
+    parser.add_argument("--dashboards", default=",".join(DASHBOARDS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="résultats de référence (JSON produit par ce script)")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="hausse relative du p50 tolérée (0.2 = +20 %%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="hausse absolue du p50 en dessous de laquelle on ignore l'écart")
+    parser.add_argument("--hll-only", action="store_true",
+                        help="mesure seulement l'erreur HyperLogLog de DuckDB")
+    args = parser.parse_args(argv)
+
+    hll = check_hll()
+    if args.hll_only:
+        print(json.dumps(hll, indent=2, ensure_ascii=False))
+        return 0
+
+    data_dir = Path(args.data_dir)
+    dashboards = [name.strip() for name in args.dashboards.split(",") if name.strip()]
+    queries, combinations = discover_queries(data_dir, dashboards)
+    print(f"{len(queries)} requêtes uniques", file=sys.stderr)
+
+    datasets = {}
+    for label in args.scales.split(","):
+        rows = parse_scale(label)
+        datasets[label.strip()] = (rows, scale_dataset(data_dir, Path(args.work_dir) / f"{rows}", rows))
+
+    results, loads, rollup_failures = run_benchmark(queries, datasets, args.repeat, args.warmup)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.tolerance, args.min_delta_ms)
+
+    report = dict(
+        meta=dict(
+            created=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            python=platform.python_version(),
+            duckdb=__import__("duckdb").__version__,
+            rollup_routing=os.environ.get("ANYCOMPANY_ROLLUP_ROUTING", "1"),
+            machine=platform.machine(),
+            cpus=os.cpu_count(),
+            repeat=args.repeat,
+            warmup=args.warmup,
+            combinations=combinations,
+            scales=loads,
+            baseline=args.baseline,
+            tolerance=args.tolerance
+        ),
+        queries={query["id"]: dict(
+            dashboard=query["dashboard"],
+            panel=query["panel"],
+            sql=normalize_sql(query["sql"]),
+            params=query["params"]
+        ) for query in queries},
+        results=results,
+        regressions=[entry["query"] + "@" + entry["scale"] for entry in regressions],
+        rollup_failures=rollup_failures,
+        hll_errors=hll
+    )
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+
+    print_report(results)
+    if rollup_failures:
+        print(f"{len(rollup_failures)} écart(s) entre requêtes routées vers les rollups et source",
+              file=sys.stderr)
+        return 1
+    if regressions:
+        print(f"{len(regressions)} régression(s) par rapport à {args.baseline}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
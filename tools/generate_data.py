@@ -0,0 +1,746 @@
+"""
+Générateur déterministe de données synthétiques au format BRONZE
+
+Produit les 11 fichiers sources attendus par `sql/2 Chargement données et
+Typage.sql` (mêmes noms, mêmes colonnes que `sql/1 Création.sql`) :
+
+- CSV : customer_demographics, customer_service_interactions,
+        financial_transactions, promotions-data, marketing_campaigns,
+        logistics_and_shipping, supplier_information, employee_records
+- TSV : product_reviews.csv (tabulation, sans guillemets, 14 colonnes)
+- JSON : inventory.json, store_locations.json (tableau d'objets)
+
+Réalisme :
+- saisonnalité (cycle annuel, week-ends, pic de fin d'année, tendance)
+- ventes plus fortes les jours de promotion dans la région
+- densité de chevauchement des promotions / campagnes réglable
+  (nombre moyen d'opérations actives par région et par jour)
+- gros clients : ENTITY tiré selon une loi de Zipf parmi les NAME de
+  CUSTOMER_DEMOGRAPHICS (jointure client du Data Product)
+- lignes sales en faible proportion (montants nuls ou négatifs, doublons,
+  dates manquantes...) pour exercer le nettoyage SILVER
+
+Déterminisme : chaque bloc de lignes a sa propre graine (graine, table,
+numéro de bloc). Le résultat ne dépend ni du nombre de processus ni de
+l'ordre d'exécution ; les blocs sont concaténés dans l'ordre.
+
+Exemple (échelle 1 = 100 000 transactions, 1000 = 100 M) :
+    python tools/generate_data.py --output data/bronze --scale 1000 --seed 42 --workers 8
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    # Sans pyarrow : écriture CSV par pandas (plus lente)
+    pa = None
+
+# Transactions à l'échelle 1
+BASE_TRANSACTIONS = 100_000
+
+# Lignes par bloc (unité de parallélisme et de graine)
+CHUNK_ROWS = 500_000
+
+# ============================================================================
+# RÉFÉRENTIELS
+# ============================================================================
+
+# Région : (part du CA, panier moyen, {pays: [villes]})
+REGIONS = {
+    "Europe": (0.35, 85.0, {
+        "France": ["Paris", "Lyon", "Marseille", "Toulouse"],
+        "Germany": ["Berlin", "Munich", "Hamburg"],
+        "United Kingdom": ["London", "Manchester", "Birmingham"],
+        "Spain": ["Madrid", "Barcelona"],
+        "Italy": ["Rome", "Milan"],
+    }),
+    "North America": (0.28, 92.0, {
+        "United States": ["New York", "Chicago", "Los Angeles", "Houston"],
+        "Canada": ["Toronto", "Montreal", "Vancouver"],
+        "Mexico": ["Mexico City", "Guadalajara"],
+    }),
+    "Asia": (0.18, 70.0, {
+        "Japan": ["Tokyo", "Osaka"],
+        "China": ["Shanghai", "Beijing", "Shenzhen"],
+        "India": ["Mumbai", "Delhi", "Bangalore"],
+        "Singapore": ["Singapore"],
+    }),
+    "Oceania": (0.08, 88.0, {
+        "Australia": ["Sydney", "Melbourne", "Brisbane"],
+        "New Zealand": ["Auckland", "Wellington"],
+    }),
+    "South America": (0.06, 60.0, {
+        "Brazil": ["Sao Paulo", "Rio de Janeiro"],
+        "Argentina": ["Buenos Aires", "Cordoba"],
+    }),
+    "Africa": (0.03, 55.0, {
+        "South Africa": ["Johannesburg", "Cape Town"],
+        "Nigeria": ["Lagos"],
+    }),
+    "Middle East": (0.02, 95.0, {
+        "United Arab Emirates": ["Dubai", "Abu Dhabi"],
+        "Saudi Arabia": ["Riyadh"],
+    }),
+}
+
+REGION_NAMES = list(REGIONS)
+REGION_WEIGHTS = np.array([REGIONS[r][0] for r in REGION_NAMES])
+REGION_BASKETS = np.array([REGIONS[r][1] for r in REGION_NAMES])
+
+# (région, pays, ville) aplatis, et plage de villes de chaque région
+PLACES = [
+    (region, country, city)
+    for region, (_, _, countries) in REGIONS.items()
+    for country, cities in countries.items()
+    for city in cities
+]
+PLACE_RANGES = []
+for _region in REGION_NAMES:
+    _indexes = [i for i, place in enumerate(PLACES) if place[0] == _region]
+    PLACE_RANGES.append((_indexes[0], _indexes[-1] + 1))
+
+# Catégorie : sensibilité aux promotions (part des promotions)
+CATEGORIES = {
+    "Snacks": 0.20,
+    "Beverages": 0.18,
+    "Personal Care": 0.14,
+    "Dairy": 0.10,
+    "Bakery": 0.10,
+    "Frozen Foods": 0.09,
+    "Household": 0.08,
+    "Baby Food": 0.06,
+    "Electronics": 0.05,
+}
+CATEGORY_NAMES = list(CATEGORIES)
+CATEGORY_WEIGHTS = np.array(list(CATEGORIES.values()))
+
+TRANSACTION_TYPES = (["Sale", "Purchase", "Refund", "Transfer"], [0.82, 0.07, 0.06, 0.05])
+PAYMENT_METHODS = (["Credit Card", "Debit Card", "Cash", "Bank Transfer", "PayPal"], [0.40, 0.25, 0.15, 0.10, 0.10])
+PROMOTION_TYPES = (["Percentage Discount", "Buy One Get One", "Bundle", "Flash Sale", "Clearance"], [0.40, 0.20, 0.15, 0.15, 0.10])
+CAMPAIGN_TYPES = (["Email", "Social Media", "TV", "Radio", "Print", "Display", "Influencer"],
+                  [0.25, 0.25, 0.12, 0.08, 0.08, 0.12, 0.10])
+AUDIENCES = (["Young Adults", "Families", "Seniors", "Professionals", "Students"], [0.25, 0.30, 0.15, 0.20, 0.10])
+SHIPPING_METHODS = (["Standard", "Express", "Overnight", "Freight"], [0.60, 0.25, 0.10, 0.05])
+SHIPPING_STATUSES = (["Delivered", "delivered ", "In Transit", "Pending", "Returned", "Lost"],
+                     [0.62, 0.08, 0.15, 0.08, 0.05, 0.02])
+CARRIERS = ["DHL", "FedEx", "UPS", "La Poste", "DPD", "Maersk"]
+INTERACTION_TYPES = (["Phone", "Email", "Chat", "In-Person"], [0.35, 0.30, 0.30, 0.05])
+ISSUE_CATEGORIES = ["Delivery", "Product Quality", "Billing", "Returns", "Account", "Other"]
+RESOLUTION_STATUSES = (["Resolved", "Pending", "Escalated", "Closed"], [0.65, 0.15, 0.08, 0.12])
+STORE_TYPES = (["Supermarket", "Convenience", "Hypermarket", "Express", "Online Hub"], [0.35, 0.25, 0.15, 0.15, 0.10])
+DEPARTMENTS = {
+    "Sales": ["Sales Representative", "Account Manager", "Sales Director"],
+    "Marketing": ["Marketing Analyst", "Marketing Executive", "Brand Manager"],
+    "Operations": ["Warehouse Associate", "Logistics Coordinator", "Operations Manager"],
+    "Finance": ["Accountant", "Financial Analyst", "Controller"],
+    "IT": ["Data Engineer", "Developer", "IT Support"],
+    "HR": ["HR Specialist", "Recruiter"],
+}
+FIRST_NAMES = [
+    "Emma", "Louis", "Jade", "Gabriel", "Alice", "Lucas", "Chloe", "Hugo", "Lina", "Arthur",
+    "Olivia", "Noah", "Mia", "Liam", "Sofia", "Ethan", "Aiko", "Kenji", "Priya", "Arjun",
+    "Wei", "Mei", "Carlos", "Lucia", "Mateo", "Valentina", "Amara", "Kwame", "Fatima", "Omar",
+    "Hannah", "Jonas", "Elena", "Marco", "Isla", "Jack", "Grace", "Leo", "Zoe", "Adam",
+]
+LAST_NAMES = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Lopez", "Wilson",
+    "Muller", "Schmidt", "Schneider", "Fischer", "Rossi", "Russo", "Ferrari", "Tanaka", "Suzuki", "Sato",
+    "Wang", "Li", "Zhang", "Sharma", "Patel", "Singh", "Silva", "Santos", "Okafor", "Haddad",
+    "Nguyen", "Kim", "Park", "Cohen", "Novak", "Kowalski", "Jensen", "Larsen", "Murphy", "Kelly",
+]
+REVIEW_TITLES = {
+    5: ["Excellent", "Love it", "Best purchase", "Highly recommend"],
+    4: ["Very good", "Tasty", "Good value", "Would buy again"],
+    3: ["Average", "Okay", "Not bad", "Decent"],
+    2: ["Disappointing", "Not great", "Too expensive"],
+    1: ["Terrible", "Do not buy", "Arrived damaged"],
+}
+REVIEW_TEXTS = {
+    5: "Great taste and quality. Fast delivery and well packaged.",
+    4: "Good product overall, slightly pricey but worth it.",
+    3: "Does the job. Nothing special compared to other brands.",
+    2: "Quality was lower than expected for the price.",
+    1: "Product was stale and customer service did not help.",
+}
+
+
+# ============================================================================
+# OUTILS VECTORISÉS
+# ============================================================================
+
+def _rng(seed, table, chunk):
+    """Générateur propre à un bloc : même graine, mêmes lignes, quel que soit le processus"""
+    return np.random.default_rng([seed, zlib.crc32(table.encode()), chunk])
+
+
+def _pick(rng, values, n, p=None):
+    """Tirage de n valeurs (tableau objet, pour les colonnes texte)"""
+    if isinstance(values, tuple):
+        values, p = values
+    p = None if p is None else np.asarray(p, dtype=float) / np.sum(p)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n, p=p)]
+
+
+def _ids(prefix, start, n, width):
+    """Identifiants 'PREFIX-000123' pour les lignes start .. start+n-1"""
+    numbers = np.arange(start + 1, start + n + 1).astype(str)
+    return np.char.add(prefix, np.char.zfill(numbers, width)).astype(object)
+
+
+def _dates(days):
+    """Jours (datetime64[D]) -> 'YYYY-MM-DD'"""
+    return np.datetime_as_string(days, unit="D").astype(object)
+
+
+def _dirty(rng, n, rate):
+    """Masque des lignes volontairement sales"""
+    return rng.random(n) < rate
+
+
+def customer_names(count):
+    """NAME des clients : même fonction pour CUSTOMER_DEMOGRAPHICS et ENTITY"""
+    first, last = len(FIRST_NAMES), len(LAST_NAMES)
+    names = []
+    for i in range(count):
+        name = f"{FIRST_NAMES[i % first]} {LAST_NAMES[(i // first) % last]}"
+        suffix = i // (first * last)
+        names.append(f"{name} {suffix}" if suffix else name)
+    return np.asarray(names, dtype=object)
+
+
+# ============================================================================
+# CALENDRIER ET DENSITÉ DES OPÉRATIONS
+# ============================================================================
+
+class Plan:
+    """Paramètres partagés par tous les blocs (calculés une fois, envoyés aux processus)"""
+
+    def __init__(self, seed, scale, start, end, promo_density, campaign_density, dirty_rate, client_skew):
+        self.seed = seed
+        self.scale = scale
+        self.start = np.datetime64(start, "D")
+        self.end = np.datetime64(end, "D")
+        self.days = np.arange(self.start, self.end + 1)
+        self.promo_density = promo_density
+        self.campaign_density = campaign_density
+        self.dirty_rate = dirty_rate
+        self.client_skew = client_skew
+
+        dimension = math.sqrt(scale)
+        n_days, n_regions = len(self.days), len(REGION_NAMES)
+        self.rows = {
+            "financial_transactions": int(BASE_TRANSACTIONS * scale),
+            "logistics_and_shipping": int(BASE_TRANSACTIONS * scale * 0.3),
+            "product_reviews": int(BASE_TRANSACTIONS * scale * 0.2),
+            "customer_service_interactions": int(BASE_TRANSACTIONS * scale * 0.1),
+            "customer_demographics": max(100, int(5_000 * dimension)),
+            "employee_records": max(20, int(1_000 * dimension)),
+            "supplier_information": max(10, int(200 * dimension)),
+            "inventory": max(20, int(2_000 * dimension)),
+            "store_locations": max(10, int(500 * dimension)),
+            # Densité : opérations actives par région et par jour x durée moyenne
+            "promotions": max(1, round(promo_density * n_regions * n_days / 21)),
+            "marketing_campaigns": max(1, round(campaign_density * n_regions * n_days / 45)),
+        }
+        self.products = max(50, int(1_000 * dimension))
+
+        promotions = generate_promotions(self)
+        self.promotions = promotions
+        self.day_region_weights = self._day_region_weights(promotions)
+
+    def seasonality(self):
+        """Poids de chaque jour : cycle annuel, week-end, fin d'année, tendance"""
+        days = self.days
+        day_of_year = (days - days.astype("datetime64[Y]")).astype(int)
+        weekday = (days.astype(int) + 3) % 7  # 0 = lundi
+        month_day = days.astype("datetime64[M]")
+        weights = 1 + 0.15 * np.sin(2 * np.pi * (day_of_year - 80) / 365.25)
+        weights *= np.where(weekday >= 5, 1.25, 1.0)
+        late_year = (days - month_day).astype(int) >= 19
+        weights *= np.where((month_day.astype(int) % 12 == 10) & late_year, 1.4, 1.0)
+        weights *= np.where(month_day.astype(int) % 12 == 11, 1.5, 1.0)
+        weights *= 1 + 0.08 * np.arange(len(days)) / 365.25
+        return weights
+
+    def _day_region_weights(self, promotions):
+        """Probabilité de (jour, région) : saisonnalité x part régionale x promotions actives"""
+        active = np.zeros((len(self.days), len(REGION_NAMES)))
+        valid = ~promotions["_dirty"]
+        first = (promotions["_start"][valid] - self.start).astype(int).clip(0, len(self.days) - 1)
+        last = (promotions["_end"][valid] - self.start).astype(int).clip(0, len(self.days) - 1)
+        regions = promotions["_region"][valid]
+        # Nombre de promotions actives par jour et par région (sommes cumulées)
+        np.add.at(active, (first, regions), 1)
+        np.add.at(active, ((last + 1).clip(max=len(self.days) - 1), regions), -1)
+        active = np.cumsum(active, axis=0).clip(min=0)
+        weights = self.seasonality()[:, None] * REGION_WEIGHTS[None, :] * (1 + 0.06 * active)
+        return (weights / weights.sum()).ravel()
+
+
+# ============================================================================
+# TABLES
+# ============================================================================
+
+def generate_promotions(plan):
+    """PROMOTIONS_DATA (une seule passe : petite table, utilisée par le calendrier)"""
+    rng = _rng(plan.seed, "promotions", 0)
+    n = plan.rows["promotions"]
+    region = rng.choice(len(REGION_NAMES), size=n)
+    # Plus de promotions en fin d'année et l'été
+    seasonal = plan.seasonality()
+    start = plan.days[rng.choice(len(plan.days), size=n, p=seasonal / seasonal.sum())]
+    duration = np.minimum(rng.geometric(1 / 21, size=n), 90)
+    end = start + duration.astype("timedelta64[D]")
+    discount = np.round(rng.choice([5, 10, 15, 20, 25, 30, 40, 50], size=n,
+                                   p=[.1, .2, .2, .2, .1, .1, .05, .05]) + rng.normal(0, 0.5, n), 2)
+    dirty = _dirty(rng, n, plan.dirty_rate * 5)
+    # Lignes sales : fin avant début, remise hors bornes
+    end = np.where(dirty, start - np.timedelta64(3, "D"), end)
+    discount = np.where(dirty & (rng.random(n) < 0.5), 120.0, discount)
+    return dict(
+        PROMOTION_ID=_ids("PROMO-", 0, n, 6),
+        PRODUCT_CATEGORY=_pick(rng, CATEGORY_NAMES, n, CATEGORY_WEIGHTS),
+        PROMOTION_TYPE=_pick(rng, PROMOTION_TYPES, n),
+        DISCOUNT_PERCENTAGE=discount,
+        START_DATE=_dates(start),
+        END_DATE=_dates(end),
+        REGION=np.asarray(REGION_NAMES, dtype=object)[region],
+        _start=start, _end=end, _region=region, _dirty=dirty,
+    )
+
+
+def generate_transactions(plan, rng, offset, n):
+    cell = rng.choice(len(plan.day_region_weights), size=n, p=plan.day_region_weights)
+    day, region = np.divmod(cell, len(REGION_NAMES))
+    kind = _pick(rng, TRANSACTION_TYPES, n)
+    amount = np.round(rng.lognormal(np.log(REGION_BASKETS[region]) - 0.4, 0.9), 2)
+    amount = np.where(kind == "Refund", -amount, amount)
+
+    # Gros clients : rang tiré selon Zipf, rang -> client par permutation fixe
+    customers = plan.rows["customer_demographics"]
+    ranks = np.arange(1, customers + 1, dtype=float) ** -plan.client_skew
+    rank = rng.choice(customers, size=n, p=ranks / ranks.sum())
+    client = np.random.default_rng([plan.seed, 7]).permutation(customers)[rank]
+
+    ids = _ids("TXN-", offset, n, 10)
+    dirty = _dirty(rng, n, plan.dirty_rate)
+    kind_of_dirt = rng.integers(0, 3, size=n)
+    # Doublons (id de la ligne précédente), montants nuls, dates manquantes
+    duplicate = dirty & (kind_of_dirt == 0)
+    duplicate[0] = False
+    ids[duplicate] = ids[np.flatnonzero(duplicate) - 1]
+    amount = np.where(dirty & (kind_of_dirt == 1), 0.0, amount)
+    return dict(
+        TRANSACTION_ID=ids,
+        TRANSACTION_DATE=_dates(plan.days[day]),
+        TRANSACTION_TYPE=kind,
+        AMOUNT=amount,
+        PAYMENT_METHOD=_pick(rng, PAYMENT_METHODS, n),
+        ENTITY=customer_names(customers)[client],
+        REGION=np.asarray(REGION_NAMES, dtype=object)[region],
+        ACCOUNT_CODE=np.char.add("ACC-", rng.integers(1000, 1100, size=n).astype(str)).astype(object),
+    ), dict(TRANSACTION_DATE=dirty & (kind_of_dirt == 2))
+
+
+def generate_campaigns(plan, rng, offset, n):
+    start = plan.days[rng.integers(0, len(plan.days), size=n)]
+    end = start + np.minimum(rng.geometric(1 / 45, size=n), 180).astype("timedelta64[D]")
+    kind = _pick(rng, CAMPAIGN_TYPES, n)
+    category = _pick(rng, CATEGORY_NAMES, n, CATEGORY_WEIGHTS)
+    budget = np.round(rng.lognormal(np.log(25_000), 0.8, n), 2)
+    reach = np.round(budget * rng.lognormal(np.log(12), 0.6, n)).astype(np.int64)
+    # Email : meilleure conversion ; TV / Print : plus faible
+    base_rate = np.select([kind == "Email", kind == "Social Media", np.isin(kind, ["TV", "Print"])],
+                          [0.085, 0.06, 0.03], 0.045)
+    rate = np.round(np.clip(rng.normal(base_rate, 0.015), 0.005, 0.3), 2)
+    dirty = _dirty(rng, n, plan.dirty_rate * 5)
+    budget = np.where(dirty, -budget, budget)
+    years = start.astype("datetime64[Y]").astype(int) + 1970
+    names = (pd.Series(kind) + " " + pd.Series(category) + " " + pd.Series(years).astype(str)
+             + " #" + pd.Series(np.arange(offset + 1, offset + n + 1)).astype(str)).to_numpy(dtype=object)
+    return dict(
+        CAMPAIGN_ID=_ids("CMP-", offset, n, 6),
+        CAMPAIGN_NAME=names,
+        CAMPAIGN_TYPE=kind,
+        PRODUCT_CATEGORY=category,
+        TARGET_AUDIENCE=_pick(rng, AUDIENCES, n),
+        START_DATE=_dates(start),
+        END_DATE=_dates(end),
+        REGION=_pick(rng, REGION_NAMES, n, REGION_WEIGHTS),
+        BUDGET=budget,
+        REACH=reach,
+        CONVERSION_RATE=rate,
+    ), {}
+
+
+def _places(rng, region):
+    """Pays et ville cohérents avec la région"""
+    place = np.empty(len(region), dtype=np.int64)
+    for r, (low, high) in enumerate(PLACE_RANGES):
+        mask = region == r
+        place[mask] = rng.integers(low, high, size=mask.sum())
+    countries = np.asarray([p[1] for p in PLACES], dtype=object)[place]
+    cities = np.asarray([p[2] for p in PLACES], dtype=object)[place]
+    return countries, cities
+
+
+def generate_customers(plan, rng, offset, n):
+    region = rng.choice(len(REGION_NAMES), size=n, p=REGION_WEIGHTS)
+    country, city = _places(rng, region)
+    birth = np.datetime64("1945-01-01") + rng.integers(0, 60 * 365, size=n).astype("timedelta64[D]")
+    return dict(
+        CUSTOMER_ID=_ids("CUST-", offset, n, 7),
+        NAME=customer_names(offset + n)[offset:],
+        DATE_OF_BIRTH=_dates(birth),
+        GENDER=_pick(rng, ["Male", "Female", "Other"], n, [0.48, 0.49, 0.03]),
+        REGION=np.asarray(REGION_NAMES, dtype=object)[region],
+        COUNTRY=country,
+        CITY=city,
+        MARITAL_STATUS=_pick(rng, ["Single", "Married", "Divorced", "Widowed"], n, [0.38, 0.45, 0.12, 0.05]),
+        ANNUAL_INCOME=np.round(rng.lognormal(np.log(42_000), 0.55, n), 2),
+    ), dict(DATE_OF_BIRTH=_dirty(rng, n, plan.dirty_rate))
+
+
+def generate_interactions(plan, rng, offset, n):
+    day = plan.days[rng.integers(0, len(plan.days), size=n)]
+    satisfaction = np.round(np.clip(rng.normal(3.7, 1.0, n), 1, 5), 1)
+    resolution = _pick(rng, RESOLUTION_STATUSES, n)
+    issue = _pick(rng, ISSUE_CATEGORIES, n)
+    return dict(
+        INTERACTION_ID=_ids("INT-", offset, n, 9),
+        INTERACTION_DATE=_dates(day),
+        INTERACTION_TYPE=_pick(rng, INTERACTION_TYPES, n),
+        ISSUE_CATEGORY=issue,
+        DESCRIPTION=(pd.Series(issue).str.lower().radd("Customer contacted support about ")).to_numpy(dtype=object),
+        DURATION_MINUTES=np.round(rng.gamma(2.0, 6.0, n), 2),
+        RESOLUTION_STATUS=resolution,
+        FOLLOW_UP_REQUIRED=np.where((resolution != "Resolved") | (rng.random(n) < 0.1), "Yes", "No").astype(object),
+        CUSTOMER_SATISFACTION=satisfaction,
+    ), {}
+
+
+def generate_reviews(plan, rng, offset, n):
+    rating = rng.choice([5, 4, 3, 2, 1], size=n, p=[0.45, 0.25, 0.12, 0.08, 0.10])
+    total = rng.poisson(4, n)
+    helpful = np.minimum(rng.binomial(total, 0.6), total)
+    seconds = rng.integers(0, 86_400, size=n).astype("timedelta64[s]")
+    moment = plan.days[rng.integers(0, len(plan.days), size=n)].astype("datetime64[s]") + seconds
+    product = rng.zipf(1.3, size=n) % plan.products
+    category = np.asarray(CATEGORY_NAMES, dtype=object)[product % len(CATEGORY_NAMES)]
+    titles = np.empty(n, dtype=object)
+    texts = np.empty(n, dtype=object)
+    for stars in range(1, 6):
+        mask = rating == stars
+        titles[mask] = _pick(rng, REVIEW_TITLES[stars], mask.sum())
+        texts[mask] = REVIEW_TEXTS[stars]
+    reviewer = rng.integers(0, plan.rows["customer_demographics"], size=n)
+    return dict(
+        review_id=np.arange(offset + 1, offset + n + 1),
+        product_id=np.char.add("PRD-", np.char.zfill(product.astype(str), 6)).astype(object),
+        reviewer_id=np.char.add("RVW-", np.char.zfill(reviewer.astype(str), 7)).astype(object),
+        reviewer_name=customer_names(plan.rows["customer_demographics"])[reviewer],
+        helpful_votes=helpful,
+        total_votes=total,
+        rating=rating,
+        review_datetime=np.char.replace(np.datetime_as_string(moment, unit="s"), "T", " ").astype(object),
+        review_title=titles,
+        review_text=texts,
+        product_category_1="Food & Beverage",
+        product_category_2=category,
+        product_description=(pd.Series(category) + " product").to_numpy(dtype=object),
+        empty_col="",
+    ), {}
+
+
+def generate_shipments(plan, rng, offset, n):
+    ship = plan.days[rng.integers(0, len(plan.days), size=n)]
+    method = _pick(rng, SHIPPING_METHODS, n)
+    delay = np.select([method == "Overnight", method == "Express", method == "Freight"], [1, 2, 10], 5)
+    estimated = ship + (delay + rng.integers(0, 3, size=n)).astype("timedelta64[D]")
+    # Quelques estimations antérieures à l'expédition (retards détectés en SILVER)
+    late = rng.random(n) < 0.04
+    estimated = np.where(late, ship - np.timedelta64(1, "D"), estimated)
+    region = rng.choice(len(REGION_NAMES), size=n, p=REGION_WEIGHTS)
+    country, _ = _places(rng, region)
+    order = rng.integers(0, plan.rows["financial_transactions"], size=n)
+    return dict(
+        SHIPMENT_ID=_ids("SHP-", offset, n, 9),
+        ORDER_ID=np.char.add("ORD-", np.char.zfill(order.astype(str), 10)).astype(object),
+        SHIP_DATE=_dates(ship),
+        ESTIMATED_DELIVERY=_dates(estimated),
+        SHIPPING_METHOD=method,
+        STATUS=_pick(rng, SHIPPING_STATUSES, n),
+        SHIPPING_COST=np.round(rng.gamma(2.0, 6.0, n) * np.where(method == "Freight", 8, 1), 2),
+        DESTINATION_REGION=np.asarray(REGION_NAMES, dtype=object)[region],
+        DESTINATION_COUNTRY=country,
+        CARRIER=_pick(rng, CARRIERS, n),
+    ), {}
+
+
+def generate_suppliers(plan, rng, offset, n):
+    region = rng.choice(len(REGION_NAMES), size=n, p=REGION_WEIGHTS)
+    country, city = _places(rng, region)
+    return dict(
+        SUPPLIER_ID=_ids("SUP-", offset, n, 5),
+        SUPPLIER_NAME=(pd.Series(_pick(rng, LAST_NAMES, n)) + " "
+                       + pd.Series(_pick(rng, ["Foods", "Farms", "Trading", "Distribution", "Ltd"], n))).to_numpy(dtype=object),
+        PRODUCT_CATEGORY=_pick(rng, CATEGORY_NAMES, n, CATEGORY_WEIGHTS),
+        REGION=np.asarray(REGION_NAMES, dtype=object)[region],
+        COUNTRY=country,
+        CITY=city,
+        LEAD_TIME=rng.integers(2, 45, size=n),
+        RELIABILITY_SCORE=np.round(np.clip(rng.beta(8, 2, n), 0, 1), 2),
+        QUALITY_RATING=_pick(rng, ["A", "B", "C", " a", "D"], n, [0.35, 0.35, 0.2, 0.05, 0.05]),
+    ), {}
+
+
+def generate_employees(plan, rng, offset, n):
+    region = rng.choice(len(REGION_NAMES), size=n, p=REGION_WEIGHTS)
+    country, _ = _places(rng, region)
+    department = _pick(rng, list(DEPARTMENTS), n, [0.3, 0.15, 0.3, 0.1, 0.1, 0.05])
+    titles = np.empty(n, dtype=object)
+    for name, jobs in DEPARTMENTS.items():
+        mask = department == name
+        titles[mask] = _pick(rng, jobs, mask.sum())
+    birth = np.datetime64("1960-01-01") + rng.integers(0, 40 * 365, size=n).astype("timedelta64[D]")
+    hire = np.maximum(birth + np.timedelta64(20 * 365, "D"), np.datetime64("2000-01-01")) \
+        + rng.integers(0, 15 * 365, size=n).astype("timedelta64[D]")
+    hire = np.minimum(hire, plan.end)
+    first = _pick(rng, FIRST_NAMES, n)
+    last = _pick(rng, LAST_NAMES, n)
+    ids = _ids("EMP-", offset, n, 6)
+    return dict(
+        EMPLOYEE_ID=ids,
+        NAME=(pd.Series(first) + " " + pd.Series(last)).to_numpy(dtype=object),
+        DATE_OF_BIRTH=_dates(birth),
+        HIRE_DATE=_dates(hire),
+        DEPARTMENT=department,
+        JOB_TITLE=titles,
+        SALARY=np.round(rng.lognormal(np.log(48_000), 0.35, n), 2),
+        REGION=np.asarray(REGION_NAMES, dtype=object)[region],
+        COUNTRY=country,
+        EMAIL=(pd.Series(first).str.lower() + "." + pd.Series(last).str.lower() + "."
+               + pd.Series(ids).str[4:] + "@anycompany.com").to_numpy(dtype=object),
+    ), {}
+
+
+def generate_inventory(plan, rng, offset, n):
+    region = rng.choice(len(REGION_NAMES), size=n, p=REGION_WEIGHTS)
+    country, _ = _places(rng, region)
+    reorder = rng.integers(20, 200, size=n)
+    restock = plan.end - rng.integers(0, 120, size=n).astype("timedelta64[D]")
+    product = np.arange(offset, offset + n) % plan.products
+    return dict(
+        product_id=np.char.add("PRD-", np.char.zfill(product.astype(str), 6)).astype(object),
+        product_category=np.asarray(CATEGORY_NAMES, dtype=object)[product % len(CATEGORY_NAMES)],
+        region=np.asarray(REGION_NAMES, dtype=object)[region],
+        country=country,
+        warehouse=np.char.add("WH-", rng.integers(1, 40, size=n).astype(str)).astype(object),
+        current_stock=np.maximum(rng.normal(reorder * 2, reorder), -5).astype(np.int64),
+        reorder_point=reorder,
+        lead_time=rng.integers(1, 30, size=n),
+        last_restock_date=_dates(restock),
+    ), {}
+
+
+def generate_stores(plan, rng, offset, n):
+    region = rng.choice(len(REGION_NAMES), size=n, p=REGION_WEIGHTS)
+    country, city = _places(rng, region)
+    kind = _pick(rng, STORE_TYPES, n)
+    footage = np.round(np.where(kind == "Hypermarket", 8, 1) * rng.lognormal(np.log(1_500), 0.5, n), 2)
+    return dict(
+        store_id=_ids("STR-", offset, n, 5),
+        store_name=(pd.Series(city) + " " + pd.Series(kind) + " " + pd.Series(np.arange(offset + 1, offset + n + 1)).astype(str)).to_numpy(dtype=object),
+        store_type=kind,
+        region=np.asarray(REGION_NAMES, dtype=object)[region],
+        country=country,
+        city=city,
+        address=(pd.Series(rng.integers(1, 300, size=n)).astype(str) + " Main Street").to_numpy(dtype=object),
+        postal_code=rng.integers(10_000, 99_999, size=n),
+        square_footage=footage,
+        employee_count=np.maximum(np.round(footage / 120 + rng.normal(0, 3, n)), 1).astype(np.int64),
+    ), {}
+
+
+# Fichier : (générateur, clé du nombre de lignes, format)
+TABLES = {
+    "customer_demographics.csv": (generate_customers, "customer_demographics", "csv"),
+    "customer_service_interactions.csv": (generate_interactions, "customer_service_interactions", "csv"),
+    "financial_transactions.csv": (generate_transactions, "financial_transactions", "csv"),
+    "promotions-data.csv": (None, "promotions", "csv"),
+    "marketing_campaigns.csv": (generate_campaigns, "marketing_campaigns", "csv"),
+    "logistics_and_shipping.csv": (generate_shipments, "logistics_and_shipping", "csv"),
+    "supplier_information.csv": (generate_suppliers, "supplier_information", "csv"),
+    "employee_records.csv": (generate_employees, "employee_records", "csv"),
+    "product_reviews.csv": (generate_reviews, "product_reviews", "tsv"),
+    "inventory.json": (generate_inventory, "inventory", "json"),
+    "store_locations.json": (generate_stores, "store_locations", "json"),
+}
+
+
+# ============================================================================
+# ÉCRITURE
+# ============================================================================
+
+def write_part(columns, nulls, path, fmt, header):
+    """Écrit un bloc ; les valeurs masquées dans `nulls` sont écrites vides (NULL_IF '')"""
+    columns = {name: values for name, values in columns.items() if not name.startswith("_")}
+    if fmt == "json":
+        df = pd.DataFrame(columns)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(df.to_dict(orient="records"), handle, ensure_ascii=False, default=int)
+        return
+
+    delimiter = "\t" if fmt == "tsv" else ","
+    n = len(next(v for v in columns.values() if isinstance(v, np.ndarray)))
+    if pa is not None:
+        arrays = {}
+        for name, values in columns.items():
+            if not isinstance(values, np.ndarray):
+                values = np.full(n, values, dtype=object)
+            mask = nulls.get(name)
+            arrays[name] = pa.array(values, mask=mask) if mask is not None else pa.array(values)
+        if fmt == "tsv":
+            # Avis : format sans guillemets (FIELD_OPTIONALLY_ENCLOSED_BY = NONE), en-tête compris
+            with open(path, "w", encoding="utf-8") as handle:
+                if header:
+                    handle.write(delimiter.join(arrays) + "\n")
+            with open(path, "ab") as handle:
+                pa_csv.write_csv(pa.table(arrays), handle, write_options=pa_csv.WriteOptions(
+                    include_header=False, delimiter=delimiter, quoting_style="none"
+                ))
+            return
+        options = pa_csv.WriteOptions(include_header=header, delimiter=delimiter, quoting_style="needed")
+        pa_csv.write_csv(pa.table(arrays), path, write_options=options)
+        return
+
+    df = pd.DataFrame(columns)
+    for name, mask in nulls.items():
+        df[name] = df[name].where(~mask)
+    df.to_csv(path, sep=delimiter, index=False, header=header,
+              quoting=3 if fmt == "tsv" else 0)
+
+
+def generate_chunk(plan, filename, chunk, offset, n, directory):
+    """Tâche d'un processus : génère et écrit un bloc, renvoie son chemin"""
+    generator, _, fmt = TABLES[filename]
+    rng = _rng(plan.seed, filename, chunk)
+    columns, nulls = generator(plan, rng, offset, n)
+    path = Path(directory) / f"{filename}.part{chunk:05d}"
+    write_part(columns, nulls, path, fmt, header=chunk == 0)
+    return path
+
+
+def concatenate(parts, target, fmt):
+    """Assemble les blocs dans l'ordre (un seul tableau JSON pour les documents)"""
+    with open(target, "wb") as out:
+        if fmt == "json":
+            out.write(b"[")
+            first = True
+            for part in parts:
+                body = part.read_bytes()[1:-1]
+                if body:
+                    out.write(body if first else b"," + body)
+                    first = False
+            out.write(b"]")
+        else:
+            for part in parts:
+                with open(part, "rb") as handle:
+                    shutil.copyfileobj(handle, out, 1 << 20)
+    for part in parts:
+        part.unlink()
+
+
+# ============================================================================
+# POINT D'ENTRÉE
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Données synthétiques BRONZE (CSV / TSV / JSON)")
+    parser.add_argument("--output", default="data/bronze")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"facteur d'échelle (1 = {BASE_TRANSACTIONS:,} transactions)")
+    parser.add_argument("--start", default="2021-01-01")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--promo-density", type=float, default=3.0,
+                        help="promotions actives en moyenne par région et par jour")
+    parser.add_argument("--campaign-density", type=float, default=1.5,
+                        help="campagnes actives en moyenne par région et par jour")
+    parser.add_argument("--client-skew", type=float, default=0.8,
+                        help="exposant de Zipf des clients (plus grand = gros clients plus dominants)")
+    parser.add_argument("--dirty-rate", type=float, default=0.002,
+                        help="part de lignes sales (nettoyage SILVER)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--tables", help="sous-ensemble de fichiers, ex. financial_transactions.csv")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    plan = Plan(args.seed, args.scale, date.fromisoformat(args.start), date.fromisoformat(args.end),
+                args.promo_density, args.campaign_density, args.dirty_rate, args.client_skew)
+    selected = args.tables.split(",") if args.tables else list(TABLES)
+
+    # Promotions : déjà générées pour le calendrier des transactions
+    if "promotions-data.csv" in selected:
+        write_part(plan.promotions, {}, output / "promotions-data.csv", "csv", header=True)
+
+    tasks = []
+    for filename in selected:
+        generator, rows_key, fmt = TABLES[filename]
+        if generator is None:
+            continue
+        total = plan.rows[rows_key]
+        for chunk, offset in enumerate(range(0, max(total, 1), args.chunk_rows)):
+            tasks.append((filename, chunk, offset, min(args.chunk_rows, total - offset)))
+
+    parts = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [
+            (filename, executor.submit(generate_chunk, plan, filename, chunk, offset, n, output))
+            for filename, chunk, offset, n in tasks
+        ]
+        for filename, future in futures:
+            parts.setdefault(filename, []).append(future.result())
+
+    for filename, paths in parts.items():
+        concatenate(paths, output / filename, TABLES[filename][2])
+
+    manifest = dict(
+        seed=args.seed,
+        scale=args.scale,
+        start=args.start,
+        end=args.end,
+        promo_density=args.promo_density,
+        campaign_density=args.campaign_density,
+        dirty_rate=args.dirty_rate,
+        client_skew=args.client_skew,
+        rows={filename: plan.rows[TABLES[filename][1]] for filename in selected},
+        seconds=round(time.perf_counter() - started, 1)
+    )
+    (output / "_manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    for filename in selected:
+        print(f"{filename:<36} {plan.rows[TABLES[filename][1]]:>12,} lignes", file=sys.stderr)
+    print(f"Généré en {manifest['seconds']} s dans {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
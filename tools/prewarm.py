@@ -0,0 +1,227 @@
+"""
+Préchauffage du cache de résultats après une exécution du pipeline
+
+Après la reconstruction nocturne de SILVER / ANALYTICS / GOLD, les versions
+des tables changent : toutes les entrées du cache de résultats sur disque
+(Streamlit/core/result_cache.py) deviennent inutilisables et les premiers
+utilisateurs de la journée paieraient chaque requête à froid. Ce script les
+exécute à leur place :
+
+1. Découverte : chaque dashboard est exécuté (streamlit.testing) sur le jeu
+   Parquet local `--data-dir`, vue par défaut puis toutes les combinaisons
+   de filtres de la sidebar (même parcours que tools/benchmark.py) ; chaque
+   requête (texte SQL + paramètres) est relevée.
+2. Valeurs de production : les filtres étant des paramètres liés (`:region`,
+   `:product_category`...), chaque requête filtrée est déclinée sur toutes
+   les combinaisons présentes dans le catalogue des dimensions du backend
+   cible (région x catégorie pour les promotions, type x audience x région
+   pour les campagnes ; core/catalog.py).
+3. Exécution : les requêtes (vues par défaut d'abord) passent par le backend
+   configuré dans secrets.toml, avec au plus `--max-workers` requêtes
+   simultanées ; leurs résultats sont écrits dans le cache partagé.
+
+Le rapport donne la couverture (requêtes en cache / requêtes attendues, par
+dashboard), le nombre de requêtes calculées ou déjà en cache, les échecs et
+la durée du préchauffage.
+
+A lancer depuis le dossier d'où Streamlit est démarré (même dossier de
+cache relatif), juste après l'exécution quotidienne (incrémentale) du pipeline :
+    python tools/run_pipeline.py --engine snowflake && \\
+        python tools/prewarm.py --data-dir data/parquet --max-workers 4 --report logs/prewarm.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+STREAMLIT_DIR = ROOT / "Streamlit"
+sys.path.insert(0, str(STREAMLIT_DIR))
+
+from benchmark import DASHBOARDS, discover_queries, query_key  # noqa: E402
+from core.backends import create_backend  # noqa: E402
+from core.catalog import catalog_query  # noqa: E402
+from core.instrumentation import create_query_log  # noqa: E402
+from core.result_cache import CachedBackend  # noqa: E402
+
+# Table du catalogue dont les combinaisons alimentent les filtres de chaque dashboard
+DASHBOARD_TABLES = {
+    "promotion_analysis": "PROMOTIONS_CLEAN",
+    "marketing_roi": "MARKETING_CAMPAIGNS_CLEAN",
+}
+
+
+# ============================================================================
+# REQUÊTES À PRÉCHAUFFER
+# ============================================================================
+
+def expand_params(queries, catalog):
+    """Décline chaque requête filtrée sur les combinaisons de valeurs du catalogue"""
+    expanded = {}
+    for query in queries:
+        params = query["params"] or {}
+        table = DASHBOARD_TABLES.get(query["dashboard"])
+        dimensions = [name for name in params if name.upper() in catalog.columns]
+        combinations = [params]
+        if table is not None and dimensions:
+            rows = catalog[catalog["TABLE_NAME"] == table][[name.upper() for name in dimensions]]
+            rows = rows.dropna().drop_duplicates()
+            combinations = [
+                {**params, **{name: value for name, value in zip(dimensions, values)}}
+                for values in rows.itertuples(index=False)
+            ]
+        for values in combinations:
+            key = query_key(query["sql"], values or None)
+            if key not in expanded:
+                expanded[key] = dict(query, id=key, params=values or None)
+    # Vues par défaut d'abord : ce sont les premières pages ouvertes
+    return sorted(expanded.values(), key=lambda query: not query["default_view"])
+
+
+# ============================================================================
+# EXÉCUTION
+# ============================================================================
+
+def warm(backend, queries, max_workers, timer):
+    """Exécute les requêtes, au plus `max_workers` à la fois ; une entrée de rapport par requête"""
+
+    def run(query):
+        start = time.perf_counter()
+        try:
+            with timer.query(query["sql"], f"{query['dashboard']} / {query['panel']}") as record:
+                df = backend.run_query(query["sql"], query["params"])
+                record.result(df)
+            status = "calculée" if record.cache == "warehouse" else "déjà en cache"
+            error = None
+        except Exception as exc:
+            status, error = "échec", f"{type(exc).__name__}: {exc}"
+        return dict(
+            query=query["id"],
+            dashboard=query["dashboard"],
+            panel=query["panel"],
+            default_view=query["default_view"],
+            params=query["params"],
+            status=status,
+            wall_s=round(time.perf_counter() - start, 4),
+            error=error
+        )
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prewarm") as executor:
+        futures = [executor.submit(run, query) for query in queries]
+        for done, future in enumerate(as_completed(futures), 1):
+            entry = future.result()
+            results.append(entry)
+            print(f"[{done:>5}/{len(futures)}] {entry['status']:<13} {entry['wall_s']:>8.2f} s  "
+                  f"{entry['dashboard']} / {entry['panel']} ({entry['query']})", file=sys.stderr, flush=True)
+    return results
+
+
+def coverage(results):
+    """Requêtes en cache / attendues, par dashboard et au total"""
+    rows = {}
+    for entry in sorted(results, key=lambda entry: entry["dashboard"]):
+        row = rows.setdefault(entry["dashboard"], {"requetes": 0, "calculée": 0, "déjà en cache": 0, "échec": 0})
+        row["requetes"] += 1
+        row[entry["status"]] += 1
+    rows["total"] = {
+        name: sum(row[name] for row in rows.values())
+        for name in ("requetes", "calculée", "déjà en cache", "échec")
+    }
+    for row in rows.values():
+        row["couverture"] = round((row["calculée"] + row["déjà en cache"]) / max(row["requetes"], 1), 4)
+    return rows
+
+
+def print_report(rows, elapsed, results):
+    print(f"{'dashboard':<20}  {'requêtes':>8}  {'calculées':>9}  {'en cache':>8}  {'échecs':>6}  couverture",
+          file=sys.stderr)
+    for name, row in rows.items():
+        print(f"{name:<20}  {row['requetes']:>8}  {row['calculée']:>9}  {row['déjà en cache']:>8}  "
+              f"{row['échec']:>6}  {row['couverture']:.1%}", file=sys.stderr)
+    walls = [entry["wall_s"] for entry in results] or [0.0]
+    print(f"préchauffage : {elapsed:.1f} s (somme des requêtes {sum(walls):.1f} s, "
+          f"p50 {np.percentile(walls, 50):.2f} s, max {max(walls):.2f} s)", file=sys.stderr)
+    for entry in results:
+        if entry["error"]:
+            print(f"  échec {entry['dashboard']} / {entry['panel']} ({entry['query']}) : {entry['error']}",
+                  file=sys.stderr)
+
+
+# ============================================================================
+# POINT D'ENTRÉE
+# ============================================================================
+
+def _load_secrets(path):
+    import tomllib
+    if not Path(path).is_file():
+        # Pas de secrets.toml : configuration uniquement par variables d'environnement
+        return {}
+    with open(path, "rb") as handle:
+        return tomllib.load(handle)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Préchauffage du cache de résultats des dashboards")
+    parser.add_argument("--data-dir", default="data/parquet",
+                        help="jeu Parquet local pour découvrir les requêtes (<SCHEMA>/<TABLE>.parquet)")
+    parser.add_argument("--secrets", default=str(STREAMLIT_DIR / ".streamlit" / "secrets.toml"),
+                        help="secrets.toml du backend à préchauffer")
+    parser.add_argument("--dashboards", default=",".join(DASHBOARDS))
+    parser.add_argument("--max-workers", type=int, default=4, help="requêtes simultanées au plus")
+    parser.add_argument("--report", help="rapport JSON (couverture, durées, requête par requête)")
+    args = parser.parse_args(argv)
+
+    dashboards = [name.strip() for name in args.dashboards.split(",") if name.strip()]
+    secrets = _load_secrets(args.secrets)
+    backend = create_backend(secrets)
+    if not isinstance(backend, CachedBackend):
+        print("Cache de résultats désactivé ([cache] enabled / ANYCOMPANY_CACHE_DIR) : rien à préchauffer",
+              file=sys.stderr)
+        return 1
+
+    # Journal ouvert avant la découverte, qui désactive celui des dashboards
+    timer = create_query_log(secrets).run("prewarm")
+
+    start = time.perf_counter()
+    discovered, combinations = discover_queries(Path(args.data_dir), dashboards)
+    catalog = backend.run_query(catalog_query(backend))
+    queries = expand_params(discovered, catalog)
+    discovery = time.perf_counter() - start
+    print(f"{len(discovered)} requêtes découvertes, {len(queries)} avec les valeurs de filtres du backend "
+          f"({discovery:.1f} s)", file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        results = warm(backend, queries, args.max_workers, timer)
+    finally:
+        backend.close()
+    elapsed = time.perf_counter() - start
+    rows = coverage(results)
+    print_report(rows, elapsed, results)
+
+    if args.report:
+        report = dict(
+            created=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            backend=backend.name,
+            max_workers=args.max_workers,
+            discovery_s=round(discovery, 3),
+            warm_s=round(elapsed, 3),
+            combinations=combinations,
+            coverage=rows,
+            results=sorted(results, key=lambda entry: -entry["wall_s"])
+        )
+        Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.report).write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str),
+                                     encoding="utf-8")
+
+    return 1 if rows.get("total", {}).get("échec") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,937 @@
+"""
+Exécution parallèle des scripts SQL du pipeline
+
+Les scripts de `sql/` sont découpés en instructions ; les dépendances entre
+instructions sont déduites des tables lues (FROM / JOIN / USING / CLONE, y
+compris à travers les vues et le corps des procédures appelées par CALL) et
+écrites (CREATE, INSERT, MERGE, UPDATE, DELETE, TRUNCATE, COPY INTO) :
+
+- lecture après écriture, écriture après écriture, écriture après lecture
+- CREATE DATABASE / SCHEMA, lectures d'INFORMATION_SCHEMA et instructions
+  non reconnues : barrières (attendent tout ce qui précède)
+- tables temporaires : liées à la session qui les a créées, les
+  instructions qui les lisent s'exécutent sur la même connexion
+
+Les instructions indépendantes (les 11 CREATE TABLE ... _CLEAN de
+`3 Nettoyage SILVER.sql`, les 5 FEATURES_* de la phase 3.2...) sont lancées
+en parallèle, au plus `--max-workers` à la fois. Les SELECT / SHOW / LIST de
+vérification sont ignorés. Le rapport donne le temps de chaque instruction,
+le temps total face à la somme des durées et le chemin critique.
+
+Moteurs :
+- snowflake  connexions du pool (section [snowflake] de secrets.toml)
+- duckdb     base locale (au mieux) : stages remplacés par `--stage-dir`
+             (fichiers de tools/generate_data.py), procédures et CALL
+             ignorés (Snowflake Scripting)
+
+Plans :
+- initialisation (`--full`, une seule fois) : étapes 1 à 6b, création de la
+  base, chargement du bronze et reconstructions complètes, puis premier
+  passage des procédures incrémentales
+- quotidien (par défaut) : procédures incrémentales (3c, 3.1b, 3.1c, 3.2b),
+  reconstructions complètes des tables sans high-water mark (les 10 tables
+  SILVER hors transactions de l'étape 3, data products des phases 3.1 et
+  3.2 hors VENTES_ENRICHIES / FEATURES_CLIENTS), tables dérivées (3e, 3.1d)
+  et versions des tables. Les instructions de NIGHTLY_EXCLUDED (création
+  du schéma ANALYTICS, reconstructions des tables incrémentales) sont
+  retirées du plan : la base, PIPELINE_WATERMARKS, CLIENTS_RFM_ETAT et le
+  journal des deltas sont conservés d'une exécution à l'autre.
+
+Exemples :
+    python tools/run_pipeline.py --full --dry-run
+    python tools/run_pipeline.py --full --engine snowflake --max-workers 8 --report logs/pipeline.json
+    python tools/run_pipeline.py --engine snowflake --report logs/pipeline.json
+    python tools/run_pipeline.py --full --engine duckdb --stage-dir data/raw --database .cache/lab.duckdb
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+STREAMLIT_DIR = ROOT / "Streamlit"
+sys.path.insert(0, str(STREAMLIT_DIR))
+
+from core.pool import ConnectionPool  # noqa: E402
+from core.sql_translate import skip_literal, to_duckdb  # noqa: E402
+
+SQL_DIR = ROOT / "sql"
+
+# Initialisation : ordre du README (étapes 1 à 6b, hors exploration et analyses).
+# Recrée la base : à ne lancer qu'une fois (ou pour repartir de zéro)
+BOOTSTRAP = (
+    "1 Création.sql",
+    "2 Chargement données et Typage.sql",
+    "3 Nettoyage SILVER.sql",
+    "3b Bridges intervalles SILVER.sql",
+    "3c Rafraîchissement incrémental SILVER.sql",
+    "3d Versions des tables.sql",
+    "3e Catalogue des dimensions SILVER.sql",
+    "Phase 3.1 Création du Data Product.sql",
+    "Phase 3.1b Rafraîchissement incrémental VENTES_ENRICHIES.sql",
+    "Phase 3.1c Rollups GOLD jour x région.sql",
+    "Phase 3.1d Lift promotionnel GOLD par catégorie.sql",
+    "phase 3.2_FEATURE_ENGINEERING.sql",
+    "phase 3.2b_FEATURES_CLIENTS_INCREMENTAL.sql",
+)
+
+# Exécution quotidienne, sans 1 Création (CREATE OR REPLACE DATABASE), 2
+# (chargement du bronze, fait par l'ingestion) ni 3b (bridges maintenus par
+# 3.1b). Tables SILVER relues du bronze avant 3c, data products reconstruits
+# après leurs entrées incrémentales et avant le dernier STAMP_TABLE_VERSIONS
+NIGHTLY = (
+    "3 Nettoyage SILVER.sql",
+    "3c Rafraîchissement incrémental SILVER.sql",
+    "3d Versions des tables.sql",
+    "3e Catalogue des dimensions SILVER.sql",
+    "Phase 3.1b Rafraîchissement incrémental VENTES_ENRICHIES.sql",
+    "Phase 3.1 Création du Data Product.sql",
+    "Phase 3.1c Rollups GOLD jour x région.sql",
+    "Phase 3.1d Lift promotionnel GOLD par catégorie.sql",
+    "phase 3.2_FEATURE_ENGINEERING.sql",
+    "phase 3.2b_FEATURES_CLIENTS_INCREMENTAL.sql",
+)
+
+# Instructions retirées du plan quotidien (cibles SCHEMA ou SCHEMA.TABLE) :
+# elles effaceraient les tables maintenues par les procédures incrémentales
+NIGHTLY_EXCLUDED = {
+    "3 Nettoyage SILVER.sql": ("SILVER.FINANCIAL_TRANSACTIONS_CLEAN",),
+    "Phase 3.1 Création du Data Product.sql": ("ANALYTICS", "ANALYTICS.VENTES_ENRICHIES"),
+    "phase 3.2_FEATURE_ENGINEERING.sql": ("ANALYTICS.FEATURES_CLIENTS",),
+}
+
+# Base créée par 1 Création.sql (contexte des scripts en `USE SCHEMA SILVER`)
+DATABASE = "ANYCOMPANY_LAB"
+
+# ============================================================================
+# DÉCOUPAGE DES SCRIPTS
+# ============================================================================
+
+def read_script(path):
+    """Texte d'un script (UTF-8, ou Windows-1252 pour les plus anciens)"""
+    data = Path(path).read_bytes()
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+def _skip(text, pos):
+    """Position qui suit la chaîne, le commentaire ou le corps $$ ... $$ en `pos`"""
+    if text.startswith("$$", pos):
+        end = text.find("$$", pos + 2)
+        return len(text) if end == -1 else end + 2
+    return skip_literal(text, pos)
+
+
+def split_statements(text):
+    """Découpe un script en instructions : (ligne, texte) pour chacune.
+
+    Le `;` ne sépare pas dans les chaînes, les commentaires et les corps de
+    procédure `$$ ... $$`.
+    """
+    statements, start, pos = [], 0, 0
+    while pos <= len(text):
+        if pos == len(text) or text[pos] == ";":
+            chunk = text[start:pos]
+            code = mask(chunk)
+            if code.strip():
+                offset = len(code) - len(code.lstrip())
+                line = text.count("\n", 0, start + offset) + 1
+                statements.append((line, chunk[offset:].rstrip()))
+            start = pos = pos + 1
+            continue
+        skipped = _skip(text, pos)
+        pos = skipped if skipped != pos else pos + 1
+    return statements
+
+
+def mask(sql):
+    """Remplace chaînes, commentaires et corps $$ par des espaces.
+
+    Les identifiants entre guillemets sont conservés.
+    """
+    parts, pos = [], 0
+    while pos < len(sql):
+        skipped = _skip(sql, pos) if sql[pos] != '"' else pos
+        if skipped != pos:
+            parts.append(" " * (skipped - pos))
+            pos = skipped
+            continue
+        if sql[pos] == '"':
+            end = sql.find('"', pos + 1)
+            end = len(sql) if end == -1 else end + 1
+            parts.append(sql[pos:end])
+            pos = end
+            continue
+        parts.append(sql[pos])
+        pos += 1
+    return "".join(parts)
+
+
+def procedure_body(sql):
+    """Corps $$ ... $$ d'un CREATE PROCEDURE (None s'il n'y en a pas)"""
+    match = re.search(r"\$\$(.*?)\$\$", sql, re.DOTALL)
+    return match.group(1) if match else None
+
+
+# ============================================================================
+# ANALYSE DES INSTRUCTIONS
+# ============================================================================
+
+_IDENT = r'(?:"[^"]+"|[A-Za-z_][\w$]*)'
+_NAME = rf"({_IDENT}(?:\.{_IDENT}){{0,2}})"
+
+_CREATE = re.compile(
+    r"^CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:LOCAL|GLOBAL)\s+)?"
+    r"(TRANSIENT\s+|TEMP(?:ORARY)?\s+|VOLATILE\s+)?"
+    r"(DATABASE|SCHEMA|TABLE|VIEW|MATERIALIZED\s+VIEW|PROCEDURE|FUNCTION|"
+    r"STAGE|FILE\s+FORMAT|SEQUENCE|TASK|STREAM)\s+"
+    rf"(?:IF\s+NOT\s+EXISTS\s+)?{_NAME}",
+    re.IGNORECASE
+)
+_USE = re.compile(rf"^USE\s+(?:(DATABASE|SCHEMA)\s+)?{_NAME}\s*$", re.IGNORECASE)
+_CALL = re.compile(rf"^CALL\s+{_NAME}\s*\(", re.IGNORECASE)
+_COPY = re.compile(rf"^COPY\s+INTO\s+{_NAME}\s+FROM\s+@([\w$.]+)(/\S*)?", re.IGNORECASE)
+_DML = re.compile(
+    r"^(?:INSERT\s+(?:OVERWRITE\s+)?INTO|MERGE\s+INTO|UPDATE|DELETE\s+FROM|"
+    rf"TRUNCATE\s+(?:TABLE\s+)?(?:IF\s+EXISTS\s+)?){_NAME}",
+    re.IGNORECASE
+)
+_DDL = re.compile(
+    rf"^(?:ALTER|DROP)\s+(?:TABLE|VIEW)\s+(?:IF\s+EXISTS\s+)?{_NAME}", re.IGNORECASE
+)
+_VERIFICATION = re.compile(r"^(?:SELECT|WITH|SHOW|LIST|LS|DESC|DESCRIBE)\b", re.IGNORECASE)
+
+_READS = re.compile(rf"\b(?:FROM|JOIN|USING|CLONE)\s+{_NAME}(?!\s*\()", re.IGNORECASE)
+_WRITES = re.compile(
+    r"\b(?:CREATE\s+(?:OR\s+REPLACE\s+)?(?:TRANSIENT\s+|TEMP(?:ORARY)?\s+)?TABLE\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?|INSERT\s+(?:OVERWRITE\s+)?INTO\s+|MERGE\s+INTO\s+|"
+    rf"UPDATE\s+|DELETE\s+FROM\s+|TRUNCATE\s+(?:TABLE\s+)?(?:IF\s+EXISTS\s+)?){_NAME}",
+    re.IGNORECASE
+)
+_TEMPORARY = re.compile(
+    r"\bCREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:LOCAL|GLOBAL)\s+)?TEMP(?:ORARY)?\s+TABLE\s+"
+    rf"(?:IF\s+NOT\s+EXISTS\s+)?{_NAME}",
+    re.IGNORECASE
+)
+_CTE = re.compile(rf"(?:\bWITH\s+(?:RECURSIVE\s+)?|,\s*)({_IDENT})\s+AS\s*\(", re.IGNORECASE)
+_FORMAT_NAME = re.compile(
+    rf"FILE_FORMAT\s*=\s*(?:\(\s*FORMAT_NAME\s*=\s*'?{_NAME}'?\s*\)|{_NAME})", re.IGNORECASE
+)
+
+# Mots-clés qui peuvent suivre UPDATE / FROM sans être une table
+_KEYWORDS = {"SET", "SELECT", "VALUES", "LATERAL", "TABLE"}
+
+
+def _part(ident):
+    return ident[1:-1] if ident.startswith('"') else ident.upper()
+
+
+def resolve(name, context):
+    """Nom complet BASE.SCHEMA.OBJET dans le contexte (base, schéma) courant"""
+    parts = [_part(p) for p in re.findall(_IDENT, name)]
+    database, schema = context
+    if len(parts) == 1:
+        parts = [database or "?", schema or "?"] + parts
+    elif len(parts) == 2:
+        parts = [database or "?"] + parts
+    return ".".join(parts)
+
+
+def resolve_schema(name, context):
+    """(base, schéma) désignés par `SCHEMA` ou `BASE.SCHEMA`"""
+    parts = [_part(p) for p in re.findall(_IDENT, name)]
+    return (parts[0], parts[1]) if len(parts) == 2 else (context[0] or "?", parts[0])
+
+
+def _names(pattern, code, context, exclude=()):
+    names = set()
+    for match in pattern.finditer(code):
+        name = match.group(1)
+        if _part(name) in _KEYWORDS or _part(name) in exclude:
+            continue
+        names.add(resolve(name, context))
+    return names
+
+
+def table_references(code, context):
+    """Tables lues et écrites par un bloc SQL (hors CTE et tables temporaires
+    créées dans le bloc) ; `barrier` si INFORMATION_SCHEMA est lu"""
+    ctes = {_part(name) for name in _CTE.findall(code)}
+    temporary = _names(_TEMPORARY, code, context)
+    reads = _names(_READS, code, context, ctes) - temporary
+    writes = _names(_WRITES, code, context, ctes) - temporary
+    barrier = any(".INFORMATION_SCHEMA." in name for name in reads)
+    return reads, writes, barrier
+
+
+class Statement:
+    """Instruction d'un script et ses dépendances"""
+
+    def __init__(self, script, line, text, context):
+        self.script = script
+        self.line = line
+        self.text = text
+        self.context = context
+        self.id = None
+        self.kind = None
+        self.target = None
+        self.label = None
+        self.reads = set()
+        self.writes = set()
+        self.barrier = False
+        self.temporary = False
+        self.session = None
+        self.deps = set()
+
+    @property
+    def location(self):
+        return f"{self.script}:{self.line}"
+
+    def to_dict(self):
+        return dict(
+            id=self.id, script=self.script, line=self.line, kind=self.kind,
+            label=self.label, deps=sorted(self.deps), session=self.session
+        )
+
+
+class Plan:
+    """Graphe des instructions de plusieurs scripts, dans l'ordre d'exécution"""
+
+    def __init__(self, database=None):
+        self.statements = []
+        self.verifications = {}
+        self.excluded = {}
+        self.context = (database, None)
+        self.views = {}
+        self.procedures = {}
+        self.temporaries = {}
+        self._writer = {}
+        self._readers = {}
+        self._barrier = None
+
+    # ------------------------------------------------------------------------
+
+    def add_script(self, path, exclude=()):
+        """Ajoute les instructions du script, sauf celles dont la cible est dans `exclude`"""
+        path = Path(path)
+        for line, text in split_statements(read_script(path)):
+            self._add(Statement(path.name, line, text, self.context), exclude)
+
+    def _add(self, statement, exclude=()):
+        code = mask(statement.text).strip()
+        context = self.context
+
+        match = _USE.match(code)
+        if match:
+            kind, name = (match.group(1) or "DATABASE").upper(), match.group(2)
+            if kind == "DATABASE":
+                self.context = (_part(name), "PUBLIC")
+            else:
+                self.context = resolve_schema(name, context)
+            return
+
+        if _VERIFICATION.match(code):
+            self.verifications[statement.script] = self.verifications.get(statement.script, 0) + 1
+            return
+
+        statement.id = len(self.statements) + 1
+        self._classify(statement, code)
+        if statement.target and any(
+            statement.target == name or statement.target.endswith("." + name) for name in exclude
+        ):
+            self.excluded[statement.script] = self.excluded.get(statement.script, 0) + 1
+            return
+        self.statements.append(statement)
+        self._link(statement)
+
+    def _classify(self, statement, code):
+        context = statement.context
+        create = _CREATE.match(code)
+        if create:
+            modifier, kind, name = create.groups()
+            kind = " ".join(kind.upper().split())
+            modifier = " ".join((modifier or "").upper().split())
+            statement.label = " ".join(filter(None, ("CREATE", modifier, kind, name)))
+            if kind == "DATABASE":
+                statement.kind, statement.barrier = "database", True
+                statement.target = _part(name)
+                self.context = (statement.target, "PUBLIC")
+            elif kind == "SCHEMA":
+                statement.kind, statement.barrier = "schema", True
+                self.context = resolve_schema(name, context)
+                statement.target = ".".join(self.context)
+            elif kind in ("TABLE", "VIEW", "MATERIALIZED VIEW"):
+                statement.kind = "view" if "VIEW" in kind else "table"
+                statement.target = resolve(name, context)
+                statement.temporary = modifier.startswith("TEMP")
+                reads, _, statement.barrier = table_references(code, context)
+                statement.reads = self._expand(reads - {statement.target}, statement)
+                statement.writes = {statement.target}
+                if statement.kind == "view":
+                    self.views[statement.target] = statement.reads
+            elif kind == "PROCEDURE":
+                statement.kind = "procedure"
+                statement.target = resolve(name, context)
+                body = procedure_body(statement.text) or ""
+                reads, writes, barrier = table_references(mask(body), context)
+                self.procedures[statement.target] = (reads, writes, barrier)
+                statement.writes = {"PROCEDURE:" + statement.target}
+            else:
+                statement.kind = "object"
+                statement.target = resolve(name, context)
+                statement.writes = {f"{kind}:{statement.target}"}
+            return
+
+        call = _CALL.match(code)
+        if call:
+            statement.kind = "call"
+            statement.target = resolve(call.group(1), context)
+            statement.label = f"CALL {call.group(1)}"
+            if statement.target not in self.procedures:
+                # Procédure définie hors des scripts : effets inconnus
+                statement.barrier = True
+                return
+            reads, writes, statement.barrier = self.procedures[statement.target]
+            statement.reads = self._expand(reads, statement) | {"PROCEDURE:" + statement.target}
+            statement.writes = set(writes)
+            return
+
+        copy = _COPY.match(code)
+        if copy:
+            statement.kind = "copy"
+            statement.target = resolve(copy.group(1), context)
+            statement.label = f"COPY INTO {copy.group(1)}"
+            statement.writes = {statement.target}
+            statement.reads = {"STAGE:" + resolve(copy.group(2), context)}
+            file_format = _FORMAT_NAME.search(statement.text)
+            if file_format:
+                name = file_format.group(1) or file_format.group(2)
+                if _part(name) != "FORMAT_NAME":
+                    statement.reads.add("FILE FORMAT:" + resolve(name, context))
+            return
+
+        dml = _DML.match(code) or _DDL.match(code)
+        if dml:
+            statement.kind = "dml"
+            statement.target = resolve(dml.group(1), context)
+            statement.label = " ".join(code[:dml.start(1)].upper().split()) + " " + dml.group(1)
+            reads, writes, statement.barrier = table_references(code, context)
+            statement.writes = writes | {statement.target}
+            statement.reads = self._expand(reads - statement.writes, statement)
+            return
+
+        statement.kind = "other"
+        statement.label = " ".join(code.split()[:4])
+        statement.barrier = True
+
+    def _expand(self, reads, statement):
+        """Ajoute les sources des vues lues ; rattache la session des tables temporaires"""
+        expanded, stack = set(), list(reads)
+        while stack:
+            name = stack.pop()
+            if name in expanded:
+                continue
+            expanded.add(name)
+            stack.extend(self.views.get(name, ()))
+            if name in self.temporaries and statement.session is None:
+                statement.session = self.temporaries[name]
+        return expanded
+
+    def _link(self, statement):
+        """Dépendances vis-à-vis des instructions précédentes"""
+        if statement.temporary:
+            statement.session = statement.id
+            self.temporaries[statement.target] = statement.id
+        if statement.barrier:
+            statement.deps = {s.id for s in self.statements[:-1]}
+            self._barrier = statement.id
+        else:
+            deps = {self._barrier} if self._barrier else set()
+            for name in statement.reads | statement.writes:
+                if name in self._writer:
+                    deps.add(self._writer[name])
+            for name in statement.writes:
+                deps.update(self._readers.get(name, ()))
+            statement.deps = deps - {statement.id}
+        for name in statement.reads:
+            self._readers.setdefault(name, set()).add(statement.id)
+        for name in statement.writes:
+            self._writer[name] = statement.id
+            self._readers[name] = set()
+
+    # ------------------------------------------------------------------------
+
+    def waves(self):
+        """Niveaux du graphe : chaque vague ne dépend que des précédentes"""
+        level = {}
+        for statement in self.statements:
+            level[statement.id] = 1 + max((level[dep] for dep in statement.deps), default=0)
+        waves = {}
+        for statement in self.statements:
+            waves.setdefault(level[statement.id], []).append(statement)
+        return [waves[key] for key in sorted(waves)]
+
+    def critical_path(self, durations):
+        """Plus long chemin pondéré par les durées : (durée totale, instructions)"""
+        finish, previous = {}, {}
+        for statement in self.statements:
+            best = max(statement.deps, key=lambda dep: finish[dep], default=None)
+            finish[statement.id] = durations.get(statement.id, 0.0) + (finish[best] if best else 0.0)
+            previous[statement.id] = best
+        if not finish:
+            return 0.0, []
+        last = max(finish, key=finish.get)
+        path, node = [], last
+        while node:
+            path.append(self.statements[node - 1])
+            node = previous[node]
+        return finish[last], path[::-1]
+
+
+# ============================================================================
+# MOTEURS
+# ============================================================================
+
+class SnowflakeEngine:
+    """Exécution sur le warehouse (une connexion Snowflake par instruction en cours)"""
+
+    name = "snowflake"
+
+    def __init__(self, settings):
+        from core.backends import SnowflakeBackend
+        self.backend = SnowflakeBackend(
+            user=settings["user"],
+            password=settings["password"],
+            account=settings["account"],
+            warehouse=settings["warehouse"],
+            # La base n'existe pas encore au premier lancement du script 1
+            database=settings.get("database"),
+            schema=settings.get("schema")
+        )
+
+    def open(self):
+        return self.backend.connect()
+
+    def use(self, conn, statement):
+        database, schema = statement.context
+        if statement.kind == "database" or not database:
+            return
+        target = database if statement.kind == "schema" or not schema else f"{database}.{schema}"
+        conn.cursor().execute(f"USE {'DATABASE' if target == database else 'SCHEMA'} {target}")
+
+    def execute(self, conn, statement):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(statement.text)
+            return "ok", cursor.sfqid
+        finally:
+            cursor.close()
+
+
+class DuckDBEngine:
+    """Exécution locale au mieux : traduction Snowflake -> DuckDB des scripts"""
+
+    name = "duckdb"
+
+    def __init__(self, database_path=":memory:", stage_dir=None):
+        import duckdb
+        self.database_path = database_path
+        self.stage_dir = Path(stage_dir) if stage_dir else None
+        # Base de travail en mémoire ; la base créée par les scripts est attachée à `database_path`
+        self.conn = duckdb.connect()
+        self.formats = {}
+        self._lock = threading.Lock()
+
+    def open(self):
+        return self.conn.cursor()
+
+    def use(self, conn, statement):
+        database, schema = statement.context
+        if statement.kind in ("database", "schema") or not database:
+            # Noms complets pour CREATE DATABASE / SCHEMA
+            return
+        # Exécution quotidienne : base créée lors d'une initialisation précédente
+        self._attach(conn, database)
+        conn.execute(f"USE {database}.{schema or 'PUBLIC'}")
+
+    def _attach(self, conn, database):
+        path = self.database_path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            path = Path(path).as_posix()
+        with self._lock:
+            conn.execute(f"ATTACH IF NOT EXISTS '{path}' AS {database}")
+            conn.execute(f"CREATE SCHEMA IF NOT EXISTS {database}.PUBLIC")
+
+    def execute(self, conn, statement):
+        kind, code = statement.kind, mask(statement.text)
+        if kind == "database":
+            self._attach(conn, statement.target)
+            return "ok", None
+        if kind == "schema":
+            if re.match(r"^\s*CREATE\s+OR\s+REPLACE\b", code, re.IGNORECASE):
+                conn.execute(f"DROP SCHEMA IF EXISTS {statement.target} CASCADE")
+            conn.execute(f"CREATE SCHEMA IF NOT EXISTS {statement.target}")
+            return "ok", None
+        if kind in ("procedure", "call"):
+            return "ignoré", "Snowflake Scripting"
+        if kind == "object":
+            if statement.label.upper().startswith("CREATE FILE FORMAT"):
+                self.formats[statement.target] = _options(statement.text[_CREATE.match(code).end():])
+                return "ok", "format enregistré"
+            return "ignoré", "objet Snowflake"
+        if kind == "copy":
+            return self._copy(conn, statement, code)
+        conn.execute(duckdb_sql(statement.text))
+        return "ok", None
+
+    def _copy(self, conn, statement, code):
+        if self.stage_dir is None:
+            return "ignoré", "stage sans --stage-dir"
+        match = _COPY.match(code)
+        files = sorted(self.stage_dir.glob((match.group(3) or "/*").lstrip("/") or "*"))
+        if not files:
+            raise FileNotFoundError(f"Aucun fichier pour {match.group(3)} dans {self.stage_dir}")
+        options = _options(statement.text[match.end():])
+        file_format = options.pop("FILE_FORMAT", {})
+        if not isinstance(file_format, dict):
+            file_format = {"FORMAT_NAME": file_format}
+        if "FORMAT_NAME" in file_format:
+            name = resolve(file_format.pop("FORMAT_NAME"), statement.context)
+            file_format = {**self.formats.get(name, {}), **file_format}
+        paths = "[" + ", ".join(f"'{path.as_posix()}'" for path in files) + "]"
+        if file_format.get("TYPE", "CSV").upper() == "JSON":
+            layout = "array" if file_format.get("STRIP_OUTER_ARRAY", "").upper() == "TRUE" else "auto"
+            source = f"SELECT json FROM read_json_objects({paths}, format='{layout}')"
+        else:
+            quote = file_format.get("FIELD_OPTIONALLY_ENCLOSED_BY", "NONE")
+            settings = dict(
+                delim=file_format.get("FIELD_DELIMITER", ","),
+                header=int(file_format.get("SKIP_HEADER", "0")) > 0,
+                quote="" if quote.upper() == "NONE" else quote,
+                all_varchar=True,
+                ignore_errors=options.get("ON_ERROR", "ABORT_STATEMENT").upper() != "ABORT_STATEMENT",
+                null_padding=file_format.get("ERROR_ON_COLUMN_COUNT_MISMATCH", "TRUE").upper() == "FALSE"
+            )
+            args = ", ".join(
+                f"{key}={str(value).lower() if isinstance(value, bool) else _quote(value)}"
+                for key, value in settings.items()
+            )
+            source = f"SELECT * FROM read_csv({paths}, {args})"
+        width = len(conn.execute(f"DESCRIBE {statement.target}").fetchall())
+        columns = [row[0] for row in conn.execute(f"DESCRIBE {source}").fetchall()]
+        # Colonnes par position ; colonnes manquantes du fichier à NULL
+        select = ", ".join(f'"{name}"' for name in columns[:width]) + ", NULL" * max(width - len(columns), 0)
+        conn.execute(f"INSERT INTO {statement.target} SELECT {select} FROM ({source})")
+        return "ok", f"{len(files)} fichier(s)"
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _options(text):
+    """Options `NOM = valeur` d'un COPY / FILE FORMAT (valeurs entre parenthèses imbriquées)"""
+    options, pos = {}, 0
+    pattern = re.compile(r"\s*(\w+)\s*=\s*")
+    while pos < len(text):
+        match = pattern.match(text, pos)
+        if not match:
+            pos += 1
+            continue
+        key, pos = match.group(1).upper(), match.end()
+        if text.startswith("(", pos):
+            depth, end = 0, pos
+            while end < len(text):
+                skipped = _skip(text, end)
+                if skipped != end:
+                    end = skipped
+                    continue
+                depth += {"(": 1, ")": -1}.get(text[end], 0)
+                end += 1
+                if depth == 0:
+                    break
+            inner = text[pos + 1:end - 1]
+            options[key] = _options(inner) if "=" in mask(inner) else inner.strip()
+            pos = end
+        elif text.startswith("'", pos):
+            end = skip_literal(text, pos)
+            raw = text[pos + 1:end - 1].replace("''", "'")
+            # Séquences d'échappement Snowflake : '\t', '\042'...
+            options[key] = raw.encode("latin-1", "backslashreplace").decode("unicode_escape")
+            pos = end
+        else:
+            match = re.compile(r"[^\s,()]+").match(text, pos)
+            options[key] = match.group(0) if match else ""
+            pos = match.end() if match else pos + 1
+    return options
+
+
+_JSON_PATH = re.compile(r'\b(\w+):"([^"]+)"')
+_GENERATOR = re.compile(r"\bTABLE\s*\(\s*GENERATOR\s*\(\s*ROWCOUNT\s*=>\s*(\d+)\s*\)\s*\)", re.IGNORECASE)
+
+
+def duckdb_sql(sql):
+    """Traduit une instruction des scripts (DDL compris) en SQL DuckDB"""
+    sql = to_duckdb(sql)
+    sql = _JSON_PATH.sub(lambda m: f"json_extract_string({m.group(1)}, '$.{m.group(2)}')", sql)
+    sql = _GENERATOR.sub(r"range(\1) AS generator(seq)", sql)
+    sql = re.sub(r"\bSEQ4\s*\(\s*\)", "generator.seq", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bTRANSIENT\s+", "", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bVARIANT\b", "JSON", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bNUMBER\s*\(", "DECIMAL(", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bNUMBER\b", "DECIMAL(38,0)", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bTIMESTAMP_LTZ\b", "TIMESTAMPTZ", sql, flags=re.IGNORECASE)
+    return re.sub(r"\bTIMESTAMP_NTZ\b", "TIMESTAMP", sql, flags=re.IGNORECASE)
+
+
+# ============================================================================
+# EXÉCUTION
+# ============================================================================
+
+class Result:
+    """Résultat d'une instruction"""
+
+    def __init__(self, statement):
+        self.statement = statement
+        self.status = "en attente"
+        self.start = None
+        self.duration = 0.0
+        self.note = None
+
+    def to_dict(self):
+        entry = self.statement.to_dict()
+        entry.update(
+            status=self.status,
+            start_s=round(self.start, 4) if self.start is not None else None,
+            duration_s=round(self.duration, 4),
+            note=self.note
+        )
+        return entry
+
+
+class Runner:
+    """Ordonnanceur : lance chaque instruction dès que ses dépendances sont terminées"""
+
+    def __init__(self, plan, engine, max_workers=4):
+        self.plan = plan
+        self.engine = engine
+        self.max_workers = max_workers
+        sessions = {s.session for s in plan.statements if s.session}
+        # Connexions gardées par les sessions de tables temporaires en plus des workers
+        self.pool = ConnectionPool(engine.open, max_size=max_workers + len(sessions), timeout=3600)
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._contexts = {}
+        self.results = {s.id: Result(s) for s in plan.statements}
+
+    def _session(self, key):
+        with self._sessions_lock:
+            if key not in self._sessions:
+                self._sessions[key] = (self.pool.acquire(), threading.Lock())
+            return self._sessions[key]
+
+    def _execute(self, statement):
+        result = self.results[statement.id]
+        result.start = time.perf_counter() - self.started
+        started = time.perf_counter()
+        try:
+            if statement.session:
+                conn, lock = self._session(statement.session)
+                with lock:
+                    result.status, result.note = self._run(conn, statement)
+            else:
+                with self.pool.connection() as conn:
+                    result.status, result.note = self._run(conn, statement)
+        except Exception as error:
+            result.status, result.note = "échec", " ".join(str(error).split())[:300]
+        result.duration = time.perf_counter() - started
+        return result
+
+    def _run(self, conn, statement):
+        if self._contexts.get(id(conn)) != statement.context:
+            self.engine.use(conn, statement)
+            self._contexts[id(conn)] = statement.context
+        try:
+            return self.engine.execute(conn, statement)
+        finally:
+            if statement.kind in ("database", "schema"):
+                # CREATE DATABASE / SCHEMA changent la base ou le schéma de la session
+                self._contexts[id(conn)] = None
+
+    def run(self, on_done=None):
+        """Exécute le plan ; renvoie les résultats dans l'ordre des scripts"""
+        self.started = time.perf_counter()
+        waiting = {s.id: s for s in self.plan.statements}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sql") as executor:
+            while waiting or running:
+                for statement in list(waiting.values()):
+                    statuses = [self.results[dep].status for dep in statement.deps]
+                    if any(status in ("échec", "sauté") for status in statuses):
+                        # Dépendance en échec : on ne lance pas
+                        del waiting[statement.id]
+                        self.results[statement.id].status = "sauté"
+                        if on_done:
+                            on_done(self.results[statement.id])
+                    elif all(status in ("ok", "ignoré") for status in statuses):
+                        del waiting[statement.id]
+                        running[executor.submit(self._execute, statement)] = statement
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    if on_done:
+                        on_done(future.result())
+        self.elapsed = time.perf_counter() - self.started
+        for conn, _ in self._sessions.values():
+            self.pool.release(conn)
+        self.pool.close()
+        return [self.results[s.id] for s in self.plan.statements]
+
+
+# ============================================================================
+# RAPPORT
+# ============================================================================
+
+def _short(statement, width=60):
+    label = statement.label or statement.kind
+    return label if len(label) <= width else label[:width - 1] + "…"
+
+
+def print_plan(plan):
+    waves = plan.waves()
+    for number, wave in enumerate(waves, start=1):
+        print(f"Vague {number} ({len(wave)} instruction(s))")
+        for statement in wave:
+            deps = ",".join(str(dep) for dep in sorted(statement.deps)[-6:])
+            more = "…" if len(statement.deps) > 6 else ""
+            print(f"  #{statement.id:<4} {statement.location:<48} {_short(statement):<60} <- {more}{deps}")
+    _, path = plan.critical_path({s.id: 1.0 for s in plan.statements})
+    print(f"\n{len(plan.statements)} instructions, {len(waves)} vagues, "
+          f"jusqu'à {max((len(w) for w in waves), default=0)} en parallèle ; "
+          f"chaîne la plus longue : {len(path)} instructions")
+    _print_verifications(plan)
+
+
+def _print_verifications(plan):
+    if plan.verifications:
+        total = sum(plan.verifications.values())
+        print(f"{total} SELECT / SHOW / LIST de vérification ignorés")
+    if plan.excluded:
+        total = sum(plan.excluded.values())
+        print(f"{total} instruction(s) retirée(s) du plan quotidien (NIGHTLY_EXCLUDED)")
+
+
+def print_report(plan, runner, results):
+    print()
+    print(f"{'#':<5} {'script:ligne':<48} {'instruction':<60} {'statut':<8} {'début':>8} {'durée':>8}")
+    for result in results:
+        statement = result.statement
+        start = f"{result.start:.2f}" if result.start is not None else "-"
+        print(f"{statement.id:<5} {statement.location:<48} {_short(statement):<60} "
+              f"{result.status:<8} {start:>8} {result.duration:>8.2f}")
+        if result.status == "échec":
+            print(f"      ! {result.note}")
+
+    total = sum(result.duration for result in results)
+    length, path = plan.critical_path({r.statement.id: r.duration for r in results})
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    print(f"\nMoteur {runner.engine.name}, {runner.max_workers} workers : "
+          f"{runner.elapsed:.2f} s au total, somme des durées {total:.2f} s "
+          f"(parallélisme moyen x{total / runner.elapsed if runner.elapsed else 0:.1f})")
+    print("Statuts : " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+    _print_verifications(plan)
+    print(f"\nChemin critique : {length:.2f} s ({len(path)} instructions)")
+    for statement in path:
+        print(f"  {runner.results[statement.id].duration:>8.2f} s  #{statement.id:<4} "
+              f"{statement.location:<48} {_short(statement)}")
+    return length, path
+
+
+# ============================================================================
+# POINT D'ENTRÉE
+# ============================================================================
+
+def _load_secrets(path):
+    import tomllib
+    with open(path, "rb") as handle:
+        return tomllib.load(handle)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exécution parallèle des scripts SQL du pipeline")
+    parser.add_argument("scripts", nargs="*",
+                        help="scripts à exécuter dans l'ordre (défaut : plan quotidien, ou initialisation avec --full)")
+    parser.add_argument("--full", action="store_true",
+                        help="initialisation : étapes 1 à 6b (recrée la base, reconstructions complètes)")
+    parser.add_argument("--engine", choices=("snowflake", "duckdb"), default="snowflake")
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true",
+                        help="affiche le graphe (vagues parallèles) sans rien exécuter")
+    parser.add_argument("--secrets", default=str(STREAMLIT_DIR / ".streamlit" / "secrets.toml"),
+                        help="secrets.toml (section [snowflake])")
+    parser.add_argument("--database", default=":memory:",
+                        help="fichier DuckDB de la base ANYCOMPANY_LAB (moteur duckdb)")
+    parser.add_argument("--stage-dir", help="fichiers du stage pour les COPY INTO (moteur duckdb)")
+    parser.add_argument("--report", help="rapport JSON (instructions, durées, chemin critique)")
+    args = parser.parse_args(argv)
+
+    scripts = [Path(p) for p in args.scripts] or [
+        SQL_DIR / name for name in (BOOTSTRAP if args.full else NIGHTLY)
+    ]
+    nightly = not args.full and not args.scripts
+    plan = Plan(database=None if args.full else DATABASE)
+    for script in scripts:
+        plan.add_script(script, NIGHTLY_EXCLUDED.get(script.name, ()) if nightly else ())
+
+    if args.dry_run:
+        print_plan(plan)
+        return 0
+
+    if args.engine == "duckdb":
+        engine = DuckDBEngine(args.database, args.stage_dir)
+    else:
+        engine = SnowflakeEngine(_load_secrets(args.secrets)["snowflake"])
+
+    runner = Runner(plan, engine, max_workers=args.max_workers)
+
+    def progress(result):
+        print(f"[{result.status:<7}] #{result.statement.id:<4} {result.duration:>7.2f} s  "
+              f"{result.statement.location}  {_short(result.statement)}", flush=True)
+
+    results = runner.run(on_done=progress)
+    length, path = print_report(plan, runner, results)
+
+    if args.report:
+        report = dict(
+            engine=engine.name,
+            plan="initialisation" if args.full else "quotidien",
+            max_workers=args.max_workers,
+            scripts=[script.name for script in scripts],
+            elapsed_s=round(runner.elapsed, 4),
+            sum_durations_s=round(sum(r.duration for r in results), 4),
+            critical_path_s=round(length, 4),
+            critical_path=[statement.id for statement in path],
+            verifications_skipped=plan.verifications,
+            statements_excluded=plan.excluded,
+            statements=[result.to_dict() for result in results]
+        )
+        Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.report).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    return 1 if any(result.status in ("échec", "sauté") for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())